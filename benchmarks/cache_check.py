@@ -0,0 +1,182 @@
+"""Перевірка кешів тегів на синтетичних документах
+
+Форматує документи генератора corpus.py з розкиданими відступами та
+переносами строк кожним шаблоном з suite.TEMPLATES двічі: звичайно та
+з linter.VERIFY_CACHE, коли кожне кешоване значення перераховуєтся
+і застарілий кеш викликає AssertionError. Відформатований текст має
+збігатися, а застарілих кешів не має бути. Документи з перенесеним
+початковим тегом форматуются ще раз і мають лишитися без змін:
+
+    python benchmarks/cache_check.py --count 40 --seed 1
+
+Код завершення 1 означає розбіжність, перші розбіжності друкуются.
+
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from re import compile as re_compile
+
+from typing import List
+from typing import Optional
+
+from corpus import generate_document
+from suite import TEMPLATES
+from suite import create_template
+import linter
+
+
+# Перенос строки з відступом, який розкидаєтся у документі
+LINE_BREAK_RE = re_compile(r'\n[ \t]*')
+
+# Чим замінюєтся перенос строки з відступом
+LINE_BREAKS: List[str] = [' ', '', '\n', '\n\t', '\n      ', '\n\n  ',
+                          '\n \t ']
+
+# Атрібути, з якими початковий тег не вміщуєтся у строчку
+LONG_ATTRIBUTES: str = ' '.join('data-{}="{}"'.format(name, index)
+                                for index, name in enumerate('abcdefghijklm'))
+
+# Документи з перенесеним початковим тегом, перед текстом якого
+# вставляєтся перенос строки лише при першому форматуванні
+WRAPPED_TAG_DOCUMENTS: List[str] = [
+    '<!DOCTYPE html>\n<div {}><p>x</p></div>\n'.format(LONG_ATTRIBUTES),
+    '<!DOCTYPE html>\n<div {}>\n  {}\n</div>\n'.format(LONG_ATTRIBUTES,
+                                                     'lorem ipsum ' * 12),
+    '<!DOCTYPE html>\n<div {}>{}</div>\n'.format(LONG_ATTRIBUTES,
+                                               'lorem ipsum ' * 12),
+]
+
+# Шаблони, які переносять текст після початкового тегу
+SECOND_PASS_TEMPLATES: List[str] = ['default', 'align-text',
+                                    'balance-text', 'chop-down',
+                                    'wrap-always']
+
+
+def generate_messy_document(random: Random, seed: int) -> str:
+    """Функція генерує документ та розкидає у ньому відступи
+
+    Відступи генератора вже майже відформатовані, тому частина
+    переносів строк замінюєтся іншими, щоб правила змінювали текст.
+    """
+
+    text, _ = generate_document(
+        size=random.choice([1 << 10, 1 << 12]),
+        depth=random.randint(2, 6),
+        attributes=random.randint(0, 8),
+        text_length=random.choice([20, 80, 300]),
+        inline_density=random.choice([0.0, 0.1, 0.5]),
+        seed=seed,
+        indent=random.choice(['  ', '\t']),
+        blank_lines=random.randint(0, 2),
+    )
+
+    def replace_line_break(match) -> str:
+        if random.random() < 0.7:
+            return match.group()
+        return random.choice(LINE_BREAKS)
+
+    return LINE_BREAK_RE.sub(replace_line_break, text)
+
+
+def format_text(text: str, template: linter.CompiledTemplate,
+                verify: bool) -> str:
+    """Функція форматує текст, з перевіркою кешів або без неї"""
+
+    linter.VERIFY_CACHE = verify
+    try:
+        return linter.Html('document.html').format_text(text, template)
+    finally:
+        linter.VERIFY_CACHE = False
+
+
+def check_document(text: str, template: linter.CompiledTemplate
+                   ) -> Optional[str]:
+    """Функція порівнює форматування документа з кешами та без них
+
+    Returns
+    -------
+    problem : Optional[str]
+        Опис розбіжності, або None якщо її немає
+    """
+
+    expected = format_text(text, template, False)
+    try:
+        actual = format_text(text, template, True)
+    except AssertionError as error:
+        return str(error)
+    if actual != expected:
+        return 'текст з VERIFY_CACHE відрізняєтся'
+    return None
+
+
+def check_second_pass(text: str, template: linter.CompiledTemplate
+                      ) -> Optional[str]:
+    """Функція перевіряє що відформатований документ вже не змінюєтся
+
+    Returns
+    -------
+    problem : Optional[str]
+        Опис розбіжності, або None якщо її немає
+    """
+
+    expected = format_text(text, template, False)
+    if format_text(expected, template, False) != expected:
+        return 'повторне форматування змінює текст'
+    return None
+
+
+def run(count: int, seed: int, limit: int) -> int:
+    """Функція перевіряє count документів кожним шаблоном
+
+    Returns
+    -------
+    failures : int
+        Кількість перевірок з розбіжностями
+    """
+
+    templates = {name: create_template(overrides)
+                 for name, overrides in TEMPLATES.items()}
+    random = Random(seed)
+    failures = 0
+    for index in range(count):
+        text = generate_messy_document(random, seed * count + index)
+        for name, template in templates.items():
+            problem = check_document(text, template)
+            if problem is None:
+                continue
+            failures += 1
+            if failures <= limit:
+                print('документ {}, шаблон {}: {}'.format(index, name,
+                                                         problem))
+    for index, text in enumerate(WRAPPED_TAG_DOCUMENTS):
+        for name in SECOND_PASS_TEMPLATES:
+            problem = check_second_pass(text, templates[name])
+            if problem is None:
+                continue
+            failures += 1
+            if failures <= limit:
+                print('перенесений тег {}, шаблон {}: {}'.format(
+                    index, name, problem
+                ))
+    return failures
+
+
+def main() -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=40,
+                        help='кількість документів')
+    parser.add_argument('--seed', type=int, default=1,
+                        help='seed генератора документів')
+    parser.add_argument('--limit', type=int, default=5,
+                        help='скільки розбіжностей друкувати')
+    args = parser.parse_args()
+
+    failures = run(args.count, args.seed, args.limit)
+    print('Перевірено {} документів {} шаблонами, з розбіжностями {}'
+          .format(args.count, len(TEMPLATES), failures))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,217 @@
+"""Генератор синтетичних Html документів для бенчмарків
+
+Документ складається з блоків вкладених тегів з атрібутами, у яких
+є абзаци тексту з рядковими тегами. Однакові параметри та seed
+завжди дають однаковий документ:
+
+    python benchmarks/corpus.py out.html --size 65536 --depth 6
+
+Відступи можна зробити табуляцією з порожніми строчками між
+блоками, як у старих файлах:
+
+    python benchmarks/corpus.py out.html --tabs --blank-lines 2
+
+"""
+
+from argparse import ArgumentParser
+from random import Random
+
+from typing import List
+from typing import Tuple
+
+
+# Теги блоків документа, по черзі для кожного рівня вкладеності
+BLOCK_TAGS: List[str] = ['div', 'section', 'article', 'div', 'ul', 'li']
+
+# Рядкові теги всередині тексту
+INLINE_TAGS: List[str] = ['span', 'a', 'b', 'em', 'code', 'strong']
+
+WORDS: List[str] = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur',
+                    'adipiscing', 'elit', 'sed', 'do', 'eiusmod', 'tempor',
+                    'incididunt', 'ut', 'labore', 'et', 'dolore', 'magna']
+
+
+class DocumentGenerator:
+    """Клас який генерує синтетичний Html документ
+
+    Attributes
+    ----------
+    depth : int
+        Глибина вкладеності блоків
+    attributes : int
+        Кількість атрібутів у тегу блоку
+    text_length : int
+        Приблизна кількість символів тексту в абзаці
+    inline_density : float
+        Ймовірність рядкового тегу замість слова тексту
+    indent : str
+        Відступ одного рівня вкладеності
+    blank_lines : int
+        Кількість порожніх строчок після кожного блоку
+    tags_count : int
+        Кількість тегів у згенерованому документі
+
+    Methods
+    -------
+    generate(size: int) : str
+        Генерує документ розміром не менше size символів
+    """
+
+    def __init__(self, depth: int = 4, attributes: int = 2,
+                 text_length: int = 80, inline_density: float = 0.1,
+                 seed: int = 0, indent: str = '  ', blank_lines: int = 0):
+        """Конструктор класу
+
+        Parameters
+        ----------
+        depth : int
+            Глибина вкладеності блоків
+        attributes : int
+            Кількість атрібутів у тегу блоку
+        text_length : int
+            Приблизна кількість символів тексту в абзаці
+        inline_density : float
+            Ймовірність рядкового тегу замість слова тексту
+        seed : int
+            Початкове значення генератора випадкових чисел
+        indent : str
+            Відступ одного рівня вкладеності
+        blank_lines : int
+            Кількість порожніх строчок після кожного блоку
+        """
+
+        self.depth: int = depth
+        self.attributes: int = attributes
+        self.text_length: int = text_length
+        self.inline_density: float = inline_density
+        self.indent: str = indent
+        self.blank_lines: int = blank_lines
+        self.tags_count: int = 0
+        self._random: Random = Random(seed)
+
+    def generate(self, size: int) -> str:
+        """Генерує документ розміром не менше size символів"""
+
+        self.tags_count = 4
+        lines = ['<!DOCTYPE html>', '<html>', '<head>',
+                 '<title>Benchmark</title>', '</head>', '<body>']
+        length = sum(map(len, lines))
+        while length < size:
+            block: List[str] = []
+            self._add_block(block, 1)
+            lines.extend(block)
+            length += sum(map(len, block)) + len(block)
+        lines.extend(['</body>', '</html>', ''])
+        return '\n'.join(lines)
+
+    def _add_block(self, lines: List[str], level: int):
+        """Метод додає блок тегів рівня level та вкладені блоки"""
+
+        name = BLOCK_TAGS[(level - 1) % len(BLOCK_TAGS)]
+        indent = self.indent * level
+        lines.append('{}<{}{}>'.format(indent, name, self._get_attributes()))
+        self.tags_count += 1
+        if level < self.depth:
+            self._add_block(lines, level + 1)
+        lines.append('{}{}<p>{}</p>'.format(indent, self.indent,
+                                            self._get_text()))
+        self.tags_count += 1
+        lines.append('{}</{}>'.format(indent, name))
+        lines.extend([''] * self.blank_lines)
+
+    def _get_attributes(self) -> str:
+        """Метод вертає текст атрібутів тегу блоку"""
+
+        return ''.join(
+            ' data-{}="{}"'.format(index, self._random.choice(WORDS))
+            for index in range(self.attributes)
+        )
+
+    def _get_text(self) -> str:
+        """Метод вертає текст абзацу з рядковими тегами"""
+
+        random = self._random
+        words: List[str] = []
+        length = 0
+        while length < self.text_length:
+            word = random.choice(WORDS)
+            if random.random() < self.inline_density:
+                name = random.choice(INLINE_TAGS)
+                word = '<{0}>{1}</{0}>'.format(name, word)
+                self.tags_count += 1
+            words.append(word)
+            length += len(word) + 1
+        return ' '.join(words)
+
+
+def generate_document(size: int, depth: int = 4, attributes: int = 2,
+                      text_length: int = 80, inline_density: float = 0.1,
+                      seed: int = 0, indent: str = '  ',
+                      blank_lines: int = 0) -> Tuple[str, int]:
+    """Функція генерує синтетичний Html документ
+
+    Parameters
+    ----------
+    size : int
+        Мінімальний розмір документа у символах
+    depth : int
+        Глибина вкладеності блоків
+    attributes : int
+        Кількість атрібутів у тегу блоку
+    text_length : int
+        Приблизна кількість символів тексту в абзаці
+    inline_density : float
+        Ймовірність рядкового тегу замість слова тексту
+    seed : int
+        Початкове значення генератора випадкових чисел
+    indent : str
+        Відступ одного рівня вкладеності
+    blank_lines : int
+        Кількість порожніх строчок після кожного блоку
+
+    Returns
+    -------
+    text, tags_count : (str, int)
+        Текст документа та кількість тегів у ньому
+    """
+
+    generator = DocumentGenerator(depth, attributes, text_length,
+                                  inline_density, seed, indent, blank_lines)
+    text = generator.generate(size)
+    return text, generator.tags_count
+
+
+def main() -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', help='файл для документа')
+    parser.add_argument('--size', type=int, default=1 << 16,
+                        help='мінімальний розмір документа у символах')
+    parser.add_argument('--depth', type=int, default=4,
+                        help='глибина вкладеності блоків')
+    parser.add_argument('--attributes', type=int, default=2,
+                        help='кількість атрібутів у тегу блоку')
+    parser.add_argument('--text-length', type=int, default=80,
+                        help='кількість символів тексту в абзаці')
+    parser.add_argument('--inline-density', type=float, default=0.1,
+                        help='ймовірність рядкового тегу замість слова')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='початкове значення генератора')
+    parser.add_argument('--tabs', action='store_true',
+                        help='відступи табуляцією замість двох пробілів')
+    parser.add_argument('--blank-lines', type=int, default=0,
+                        help='кількість порожніх строчок після блоку')
+    args = parser.parse_args()
+
+    text, tags_count = generate_document(
+        args.size, args.depth, args.attributes, args.text_length,
+        args.inline_density, args.seed, '\t' if args.tabs else '  ',
+        args.blank_lines,
+    )
+    with open(args.output, 'w') as file:
+        file.write(text)
+    print('{} символів, {} тегів'.format(len(text), tags_count))
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
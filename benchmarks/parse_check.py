@@ -0,0 +1,199 @@
+"""Перевірка що власний розбір Html будує те саме дерево, що HTMLParser
+
+Генерує випадкові документи з атрібутами, коментарями, script
+та style з розміткою всередині, недійсною та обрізаною розміткою і
+розбирає кожен з Html.fast_scan та без нього, цілим текстом та
+шматками випадкової довжини, щоб розмітка розрізалась межами
+шматків. Будова дерева та повідомлення про недійсну розмітку мають
+збігатися, а текст дерева власного розбору - з текстом документа:
+
+    python benchmarks/parse_check.py --count 3000 --seed 1
+
+Код завершення 1 означає розбіжність, перші розбіжності друкуются.
+Документи без табів, бо HTMLParser рахує таб як один стовбчик.
+
+"""
+
+from argparse import ArgumentParser
+from html.parser import HTMLParser
+from os.path import abspath
+from os.path import dirname
+from random import Random
+from sys import path
+
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+
+import linter
+
+
+# Імена тегів документа, разом з тегами, текст яких не розбираєтся
+TAG_NAMES: List[str] = ['div', 'p', 'span', 'a', 'B', 'ul', 'li',
+                        'script', 'style', 'textarea', 'x-item']
+
+# Атрібути початкових тегів
+ATTRIBUTES: List[str] = ['', ' id="a"', " class='b c'", ' data-x=1',
+                         ' hidden', '\n  title="t > u"', ' a = "1"']
+
+# Розмітка без тегів та текст між тегами
+MARKUP: List[str] = ['text', ' ', '\n', '\n\n  ', '&amp;', '&lt;b&gt;',
+                     '<!-- note -->', '<!--\n<div>\n-->', '<!DOCTYPE html>',
+                     '<?php echo 1 ?>', '<![CDATA[x]]>', 'a < b', '<',
+                     '</>', '< p>', '<br/>', '<img src="i.png" />',
+                     '<1>']
+
+# Текст у script та style, схожий на розмітку
+CDATA_TEXT: List[str] = ['var a = "<div>";', 'if (a < b) {}', '</div>',
+                         '<!-- x -->', '</scr', 'p { color: red }']
+
+# Дерево тегів: ім'я та глибина кожного тегу по порядку обходу
+Shape = List[Tuple[str, int]]
+
+
+def generate_document(random: Random) -> str:
+    """Функція генерує випадковий документ
+
+    Більшість тегів закриваются по порядку, але частина лишається
+    незакритою або закриваєтся чужим кінцевим тегом.
+    """
+
+    parts: List[str] = []
+    stack: List[str] = []
+    for _ in range(random.randint(1, 40)):
+        choice = random.random()
+        if choice < 0.35:
+            name = random.choice(TAG_NAMES)
+            parts.append('<{}{}>'.format(name, random.choice(ATTRIBUTES)))
+            if name.lower() in HTMLParser.CDATA_CONTENT_ELEMENTS:
+                parts.append(random.choice(CDATA_TEXT))
+                if random.random() < 0.9:
+                    parts.append('</{}>'.format(name))
+                continue
+            stack.append(name)
+        elif choice < 0.6 and stack:
+            name = stack.pop()
+            if random.random() < 0.02:
+                name = random.choice(TAG_NAMES)
+            parts.append('</{}>'.format(name))
+        else:
+            parts.append(random.choice(MARKUP))
+    if random.random() < 0.9:
+        parts.extend('</{}>'.format(name) for name in reversed(stack))
+    if random.random() < 0.1:
+        # Розмітка, обрізана кінцем файлу
+        parts.append(random.choice(['<div class="a', '<!-- x', '</sp']))
+    return ''.join(parts)
+
+
+def get_shape(root_tag: linter.Tag) -> Shape:
+    """Функція вертає будову дерева тегів"""
+
+    shape: Shape = []
+    stack = [(root_tag, 0)]
+    while stack:
+        tag, depth = stack.pop()
+        shape.append((tag.name, depth))
+        stack.extend((child, depth + 1) for child in reversed(tag.childs))
+    return shape
+
+
+def parse(text: str, fast_scan: bool,
+          chunks: Optional[List[int]]) -> linter.Html:
+    """Функція розбирає текст цілим або шматками довжини chunks"""
+
+    html = linter.Html('document.html')
+    html.fast_scan = fast_scan
+    html.reset()
+    if chunks is None:
+        html.feed(text)
+    else:
+        position = 0
+        for size in chunks:
+            html.feed(text[position:position + size])
+            position += size
+    html.check_closed_tags()
+    return html
+
+
+def check_document(text: str, random: Random) -> List[str]:
+    """Функція порівнює розбори документа
+
+    Returns
+    -------
+    problems : List[str]
+        Опис кожної розбіжності
+    """
+
+    chunks: List[int] = []
+    while sum(chunks) < len(text):
+        chunks.append(random.randint(1, 16))
+
+    expected = parse(text, False, None)
+    expected_shape = None if expected.break_html else get_shape(
+        expected._root_tag
+    )
+    problems: List[str] = []
+    for fast_scan, parts in ((True, None), (True, chunks),
+                             (False, chunks)):
+        html = parse(text, fast_scan, parts)
+        mode = '{} {}'.format('fast' if fast_scan else 'HTMLParser',
+                              'chunks' if parts else 'whole')
+        if html.errors != expected.errors:
+            problems.append('{}: повідомлення {} замість {}'.format(
+                mode, html.errors, expected.errors
+            ))
+        elif expected_shape is not None:
+            if get_shape(html._root_tag) != expected_shape:
+                problems.append('{}: інша будова дерева'.format(mode))
+            elif fast_scan and html._root_tag.get_text() != text:
+                problems.append('{}: текст дерева не збігаєтся з '
+                                'документом'.format(mode))
+    return problems
+
+
+def run(count: int, seed: int, limit: int) -> int:
+    """Функція перевіряє count випадкових документів
+
+    Returns
+    -------
+    failures : int
+        Кількість документів з розбіжностями
+    """
+
+    random = Random(seed)
+    failures = 0
+    for _ in range(count):
+        text = generate_document(random)
+        problems = check_document(text, random)
+        if not problems:
+            continue
+        failures += 1
+        if failures <= limit:
+            print(repr(text))
+            for problem in problems:
+                print('    ' + problem)
+    return failures
+
+
+def main() -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=3000,
+                        help='кількість документів')
+    parser.add_argument('--seed', type=int, default=1,
+                        help='seed генератора документів')
+    parser.add_argument('--limit', type=int, default=5,
+                        help='скільки розбіжностей друкувати')
+    args = parser.parse_args()
+
+    failures = run(args.count, args.seed, args.limit)
+    print('Перевірено {} документів, з розбіжностями {}'.format(
+        args.count, failures
+    ))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    exit(main())
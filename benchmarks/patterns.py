@@ -0,0 +1,93 @@
+"""Мікро-бенчмарк скомпільованих регулярних виразів linter.py
+
+Порівнює виклик re.sub з рядком виразу, як раніше робили правила
+форматування, з викликом Pattern.sub скомпільованого виразу:
+
+    python benchmarks/patterns.py --number 100000
+
+"""
+
+from argparse import ArgumentParser
+from os.path import dirname
+from os.path import abspath
+from re import Pattern
+from re import sub
+from sys import path
+from timeit import timeit
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+
+import linter
+
+
+# Типовий текст тегу на якому виконуются правила
+SAMPLE_TEXT: str = (
+    '<div class="row" id = \'main\'\n'
+    '     data-value="1"  >\n'
+    '    text of the tag <span>inline</span>\n'
+    '    \n'
+    '</div>'
+)
+
+
+def get_patterns() -> dict:
+    """Функція вертає скомпільовані вирази модуля linter за назвою"""
+
+    return {
+        name: value for name, value in vars(linter).items()
+        if name.endswith('_RE') and isinstance(value, Pattern)
+    }
+
+
+def run(number: int) -> list:
+    """Функція міряє час виклику кожного виразу
+
+    Parameters
+    ----------
+    number : int
+        Кількість викликів кожного виразу
+
+    Returns
+    -------
+    rows : list
+        Назва виразу, нс на виклик з рядком, нс на виклик
+        скомпільованого виразу
+    """
+
+    rows = []
+    for name, pattern in sorted(get_patterns().items()):
+        string = pattern.pattern
+        string_time = timeit(lambda: sub(string, '', SAMPLE_TEXT),
+                             number=number)
+        compiled_time = timeit(lambda: pattern.sub('', SAMPLE_TEXT),
+                               number=number)
+        rows.append((name, string_time / number * 1e9,
+                     compiled_time / number * 1e9))
+    return rows
+
+
+def main() -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=100000,
+                        help='кількість викликів кожного виразу')
+    args = parser.parse_args()
+
+    rows = run(args.number)
+    print('{:<24}{:>12}{:>12}{:>8}'.format('pattern', 're.sub, ns',
+                                           'compiled', 'gain'))
+    for name, string_ns, compiled_ns in rows:
+        print('{:<24}{:>12.0f}{:>12.0f}{:>7.0f}%'.format(
+            name, string_ns, compiled_ns,
+            100 * (string_ns - compiled_ns) / string_ns,
+        ))
+    total_string = sum(row[1] for row in rows)
+    total_compiled = sum(row[2] for row in rows)
+    print('{:<24}{:>12.0f}{:>12.0f}{:>7.0f}%'.format(
+        'total', total_string, total_compiled,
+        100 * (total_string - total_compiled) / total_string,
+    ))
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
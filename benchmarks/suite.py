@@ -0,0 +1,480 @@
+"""Набір бенчмарків форматування на синтетичних документах
+
+Кожен документ з CORPUS перевіряється Html.check_file кожним шаблоном
+з TEMPLATES в окремому процесі, щоб пікова пам'ять не залежала від
+попередніх запусків. Результати пишуться у JSON файл:
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline results.json
+
+З --baseline час кожного запуску та степінь росту часу від розміру
+документа порівнюются з попередніми результатами, а код завершення 1
+означає регресію. Степінь близько 1 відповідає лінійному часу,
+близько 2 - квадратичному. Пам'ять дерева тегів після розбору
+документа записуєтся як кількість байт на тег. Швидкість розбору
+кожного документа міряєтся окремо для власного розбору Html,
+HTMLParser та перевірки тільки розмітки, див. Html.fast_scan та
+Html.validate_only, а також час повідомлення про недійсну розмітку
+документа без кінцевих тегів.
+
+"""
+
+from argparse import ArgumentParser
+from json import dump
+from json import load
+from math import log
+from multiprocessing import get_context
+from os import remove
+from os.path import abspath
+from os.path import dirname
+from platform import python_version
+from re import compile as re_compile
+from sys import path
+from tempfile import NamedTemporaryFile
+from time import perf_counter
+from tracemalloc import get_traced_memory
+from tracemalloc import start as start_tracing
+from tracemalloc import stop as stop_tracing
+
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+
+from corpus import generate_document
+import linter
+
+
+# Параметри документів: назва, розмір, глибина, кількість атрібутів,
+# дліна тексту абзацу, частка рядкових тегів, відступ та порожні
+# строчки після блоків. Документи з групи 'size' відрізняются тільки
+# розміром і рахують степінь росту часу.
+CORPUS: List[dict] = [
+    {'name': 'size-16k', 'group': 'size', 'size': 1 << 14},
+    {'name': 'size-32k', 'group': 'size', 'size': 1 << 15},
+    {'name': 'size-64k', 'group': 'size', 'size': 1 << 16},
+    {'name': 'deep', 'size': 1 << 15, 'depth': 24},
+    {'name': 'attributes', 'size': 1 << 15, 'attributes': 8},
+    {'name': 'attrs-400', 'size': 1 << 16, 'attributes': 400},
+    {'name': 'long-text', 'size': 1 << 15, 'text_length': 600},
+    {'name': 'text-100k', 'size': 1 << 17, 'text_length': 100000},
+    {'name': 'inline', 'size': 1 << 15, 'inline_density': 0.5},
+    {'name': 'tabs-legacy', 'size': 1 << 16, 'indent': '\t',
+     'blank_lines': 3},
+]
+
+# Шаблони: назва та налаштування, які відрізняются від
+# шаблону за замовчуванням
+TEMPLATES: Dict[str, dict] = {
+    'default': {},
+    'tabs': {'use_tab_character': True},
+    'smart-tab': {'use_tab_character': True, 'smart_tab': True},
+    'no-wrap-text': {'wrap_text': False},
+    'align-text': {'align_text': True},
+    'balance-text': {'balance_text': True},
+    'no-align-attributes': {'align_attributes': False},
+    'do-not-wrap': {'wrap_attributes': linter.Template.DO_NOT_WRAP},
+    'chop-down': {'wrap_attributes': linter.Template.CHOP_DOWN_IF_LONG},
+    'wrap-always': {'wrap_attributes': linter.Template.WRAP_ALWAYS},
+    'spaces': {'space_around_eq_in_attribute': True,
+               'space_after_tag_name': True, 'space_in_empty_tag': True},
+    'attr-new-lines': {'new_line_before_first_attr': True,
+                       'new_line_after_last_attr': True},
+    'keep-indents': {'keep_indents_on_empty_lines': True},
+    'no-line-breaks': {'keep_line_breaks': False,
+                       'keep_line_breaks_in_text': False,
+                       'wrap_text': False},
+    'dont-indent-size': {'dont_indent_child_tag_size': 10},
+}
+
+# Кінцеві теги, без яких документ має стільки незакритих тегів,
+# скільки в ньому відкритих
+END_TAG_RE = re_compile(r'</\w+>')
+
+
+def create_template(overrides: dict) -> linter.CompiledTemplate:
+    """Функція створює шаблон за замовчуванням зі зміненими налаштуваннями
+    """
+
+    template = linter.Template()
+    for name, value in overrides.items():
+        setattr(template, name, value)
+    return template.compile()
+
+
+def measure_tree(path: str) -> Tuple[int, int]:
+    """Функція міряє пам'ять дерева тегів документа
+
+    Returns
+    -------
+    size, nodes : (int, int)
+        Кількість байт, виділених під час розбору документа, та
+        кількість тегів у дереві
+    """
+
+    data = linter.read_file(path)
+    start_tracing()
+    html = linter.Html(path)
+    html.feed(data)
+    size = get_traced_memory()[0]
+    stop_tracing()
+
+    nodes = 0
+    stack = [html._root_tag]
+    while stack:
+        tag = stack.pop()
+        nodes += 1
+        stack.extend(tag.childs)
+    return size, nodes
+
+
+def measure_parse(text: str, fast_scan: bool, repeat: int = 3,
+                  validate_only: bool = False) -> float:
+    """Функція міряє швидкість розбору документа без форматування
+
+    Parameters
+    ----------
+    text : str
+        Текст документа
+    fast_scan : bool
+        Розбирати власним циклом Html, а не HTMLParser?
+    repeat : int
+        Кількість розборів, береться найшвидший
+    validate_only : bool
+        Тільки перевіряти розмітку, без дерева тегів?
+
+    Returns
+    -------
+    mb_per_s : float
+        Мегабайт тексту за секунду
+    """
+
+    size = len(text.encode('utf-8'))
+    best = None
+    for _ in range(repeat):
+        html = linter.Html('')
+        html.fast_scan = fast_scan
+        html.validate_only = validate_only
+        start = perf_counter()
+        html.feed(text)
+        seconds = perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return size / max(best, 1e-9) / 1e6
+
+
+def measure_errors(text: str, repeat: int = 3) -> float:
+    """Функція міряє час розбору документа без кінцевих тегів
+
+    Всі теги такого документа незакриті, тому час залежить від
+    повідомлень про кожен з них, див. Html.error_no_closed_tags.
+
+    Returns
+    -------
+    seconds : float
+        Час найшвидшого розбору разом з повідомленнями
+    """
+
+    text = END_TAG_RE.sub('', text)
+    best = None
+    for _ in range(repeat):
+        html = linter.Html('')
+        start = perf_counter()
+        html.feed(text)
+        html.check_closed_tags()
+        seconds = perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return best
+
+
+def _measure(path: str, overrides: dict, queue):
+    """Функція процесу, яка міряє перевірку файлу шаблоном"""
+
+    from resource import RUSAGE_SELF
+    from resource import getrusage
+
+    template = create_template(overrides)
+    start = perf_counter()
+    result = linter.Html.check_file(path, template, False)
+    seconds = perf_counter() - start
+    peak_rss = getrusage(RUSAGE_SELF).ru_maxrss
+    # Трасування сповільнює розбір, тому пам'ять дерева міряєтся
+    # окремо після часу та пікової пам'яті перевірки
+    size, nodes = measure_tree(path)
+    queue.put((seconds, peak_rss, size // nodes, result.errors))
+
+
+def run_case(path: str, overrides: dict, timeout: float) -> dict:
+    """Функція перевіряє файл шаблоном в окремому процесі
+
+    Parameters
+    ----------
+    path : str
+        Шлях до документа
+    overrides : dict
+        Налаштування шаблону, див. TEMPLATES
+    timeout : float
+        Максимальний час перевірки у секундах
+
+    Returns
+    -------
+    case : dict
+        status ('ok', 'error', 'timeout' або 'crash'), seconds,
+        peak_rss_kb, bytes_per_node
+    """
+
+    context = get_context()
+    queue = context.Queue()
+    process = context.Process(target=_measure,
+                              args=(path, overrides, queue))
+    process.start()
+    process.join(timeout)
+    failed = {'seconds': None, 'peak_rss_kb': None, 'bytes_per_node': None}
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return dict(failed, status='timeout')
+    if queue.empty():
+        return dict(failed, status='crash')
+    seconds, peak_rss, bytes_per_node, errors = queue.get()
+    return {
+        'status': 'error' if errors else 'ok',
+        'seconds': seconds,
+        'peak_rss_kb': peak_rss,
+        'bytes_per_node': bytes_per_node,
+    }
+
+
+def get_scaling(cases: List[dict]) -> Dict[str, float]:
+    """Функція рахує степінь росту часу від розміру документа
+
+    Степінь - нахил прямої методом найменших квадратів у координатах
+    log(розмір), log(час) по документах групи 'size'.
+
+    Returns
+    -------
+    scaling : Dict[str, float]
+        Степінь для кожного шаблону
+    """
+
+    points: Dict[str, list] = {}
+    for case in cases:
+        if case['group'] == 'size' and case['status'] == 'ok':
+            points.setdefault(case['template'], []).append(
+                (log(case['size']), log(max(case['seconds'], 1e-9)))
+            )
+
+    scaling: Dict[str, float] = {}
+    for template, values in points.items():
+        if len(values) < 2:
+            continue
+        mean_x = sum(x for x, _ in values) / len(values)
+        mean_y = sum(y for _, y in values) / len(values)
+        variance = sum((x - mean_x) ** 2 for x, _ in values)
+        covariance = sum((x - mean_x) * (y - mean_y) for x, y in values)
+        scaling[template] = covariance / variance
+    return scaling
+
+
+def run(corpus: List[dict], templates: Dict[str, dict], scale: float,
+        timeout: float) -> dict:
+    """Функція виконує всі бенчмарки
+
+    Parameters
+    ----------
+    corpus : List[dict]
+        Параметри документів, див. CORPUS
+    templates : Dict[str, dict]
+        Шаблони, див. TEMPLATES
+    scale : float
+        Множник розміру документів
+    timeout : float
+        Максимальний час однієї перевірки у секундах
+
+    Returns
+    -------
+    results : dict
+        Результати для запису у JSON файл
+    """
+
+    cases: List[dict] = []
+    parsing: List[dict] = []
+    for params in corpus:
+        params = dict(params)
+        name = params.pop('name')
+        group = params.pop('group', None)
+        params['size'] = int(params['size'] * scale)
+        text, tags_count = generate_document(**params)
+        size = len(text.encode('utf-8'))
+
+        parse = {
+            'corpus': name,
+            'size': size,
+            'fast_mb_per_s': measure_parse(text, True),
+            'html_parser_mb_per_s': measure_parse(text, False),
+            'validate_mb_per_s': measure_parse(text, True,
+                                               validate_only=True),
+            'errors_seconds': measure_errors(text),
+        }
+        parsing.append(parse)
+        print_parse(parse)
+
+        with NamedTemporaryFile('w', suffix='.html', delete=False) as file:
+            file.write(text)
+        try:
+            for template_name, overrides in templates.items():
+                case = run_case(file.name, overrides, timeout)
+                seconds = case['seconds']
+                case.update({
+                    'corpus': name,
+                    'group': group,
+                    'template': template_name,
+                    'size': size,
+                    'tags': tags_count,
+                    'mb_per_s': size / seconds / 1e6 if seconds else None,
+                    'tags_per_s': tags_count / seconds if seconds else None,
+                })
+                cases.append(case)
+                print_case(case)
+        finally:
+            remove(file.name)
+
+    return {
+        'version': linter.__version__,
+        'python': python_version(),
+        'scale': scale,
+        'cases': cases,
+        'parsing': parsing,
+        'scaling': get_scaling(cases),
+    }
+
+
+def print_case(case: dict):
+    """Функція друкує результат одного бенчмарку"""
+
+    if case['seconds'] is None:
+        print('{:<12}{:<22}{:>10}'.format(case['corpus'], case['template'],
+                                          case['status']))
+        return
+    print('{:<12}{:<22}{:>9.3f}s{:>9.3f} MB/s{:>10.0f} tags/s{:>8} KB'
+          '{:>7} B/tag'
+          .format(case['corpus'], case['template'], case['seconds'],
+                  case['mb_per_s'], case['tags_per_s'],
+                  case['peak_rss_kb'], case['bytes_per_node']))
+
+
+def print_parse(parse: dict):
+    """Функція друкує швидкість розбору документа"""
+
+    print('{:<12}{:<22}{:>9.3f} MB/s  HTMLParser{:>9.3f} MB/s'
+          '  validate{:>9.3f} MB/s  errors{:>8.3f}s'.format(
+              parse['corpus'], 'parse', parse['fast_mb_per_s'],
+              parse['html_parser_mb_per_s'], parse['validate_mb_per_s'],
+              parse['errors_seconds'],
+          ))
+
+
+def compare(results: dict, baseline: dict, threshold: float,
+            scaling_threshold: float, min_delta: float) -> List[str]:
+    """Функція порівнює результати з попередніми
+
+    Parameters
+    ----------
+    results : dict
+        Поточні результати
+    baseline : dict
+        Попередні результати
+    threshold : float
+        Допустиме відносне збільшення часу
+    scaling_threshold : float
+        Допустиме збільшення степені росту часу
+    min_delta : float
+        Збільшення часу у секундах, менше якого не вважаєтся регресією
+
+    Returns
+    -------
+    regressions : List[str]
+        Опис кожної регресії
+    """
+
+    regressions: List[str] = []
+    old_cases = {(case['corpus'], case['template']): case
+                 for case in baseline['cases']}
+    for case in results['cases']:
+        old = old_cases.get((case['corpus'], case['template']))
+        if old is None or old['seconds'] is None:
+            continue
+        if case['seconds'] is None:
+            regressions.append('{} {}: {} (було {:.3f}s)'.format(
+                case['corpus'], case['template'], case['status'],
+                old['seconds'],
+            ))
+        elif (case['seconds'] > old['seconds'] * (1 + threshold)
+                and case['seconds'] - old['seconds'] > min_delta):
+            regressions.append('{} {}: {:.3f}s (було {:.3f}s)'.format(
+                case['corpus'], case['template'], case['seconds'],
+                old['seconds'],
+            ))
+
+    for template, exponent in results['scaling'].items():
+        old_exponent = baseline['scaling'].get(template)
+        if (old_exponent is not None
+                and exponent > old_exponent + scaling_threshold):
+            regressions.append('{}: степінь росту {:.2f} (було {:.2f})'
+                               .format(template, exponent, old_exponent))
+    return regressions
+
+
+def main() -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='benchmark-results.json',
+                        help='файл для результатів')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='попередні результати для порівняння')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='допустиме відносне збільшення часу')
+    parser.add_argument('--scaling-threshold', type=float, default=0.25,
+                        help='допустиме збільшення степені росту часу')
+    parser.add_argument('--min-delta', type=float, default=0.05,
+                        help='збільшення часу у секундах, менше якого '
+                             'не вважаєтся регресією')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='множник розміру документів')
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help='максимальний час однієї перевірки')
+    parser.add_argument('--corpus', nargs='+', metavar='NAME',
+                        help='документи з CORPUS, за замовчуванням всі')
+    parser.add_argument('--templates', nargs='+', metavar='NAME',
+                        help='шаблони з TEMPLATES, за замовчуванням всі')
+    args = parser.parse_args()
+
+    corpus = [params for params in CORPUS
+              if not args.corpus or params['name'] in args.corpus]
+    templates = {name: overrides for name, overrides in TEMPLATES.items()
+                 if not args.templates or name in args.templates}
+
+    baseline: Optional[dict] = None
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = load(file)
+
+    results = run(corpus, templates, args.scale, args.timeout)
+    for template, exponent in sorted(results['scaling'].items()):
+        print('{:<22} степінь росту часу {:.2f}'.format(template, exponent))
+    with open(args.output, 'w') as file:
+        dump(results, file, indent=2)
+
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.threshold,
+                          args.scaling_threshold, args.min_delta)
+    for regression in regressions:
+        print('Регресія: ' + regression)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    exit(main())
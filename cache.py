@@ -0,0 +1,167 @@
+"""Кеш відформатованих Html файлів між запусками утиліти
+
+"""
+
+from os import makedirs
+from os import stat
+from os.path import abspath
+from os.path import join
+from sqlite3 import connect
+from time import time
+
+from linter import CheckResult
+from linter import read_file
+from linter import text_digest
+
+
+class Cache:
+    """Кеш файлів, які вже відформатовані за шаблоном
+
+    Записи зберігаются у SQLite базі у каталозі кешу. Запис знаходиться
+    за шляхом до файлу та відбитком шаблону (Template.fingerprint), який
+    включає версію утиліти та правил форматування. Файл пропускається
+    без читання, якщо його розмір та час зміни збігаются з записом, або
+    після читання, якщо збігається хеш тексту.
+
+    Attributes
+    ----------
+    FILENAME : str
+        Ім'я файлу бази у каталозі кешу
+    directory : str
+        Каталог кешу
+    fingerprint : str
+        Відбиток шаблону перевірки
+    max_entries : int
+        Максимальна кількість записів, старі записи видаляются
+
+    Methods
+    -------
+    is_clean(path: str) : bool
+        Перевіряє чи файл відомий як відформатований
+    add(result: CheckResult)
+        Додає файл який не змінився після перевірки
+    close()
+        Видаляє зайві записи та закриває базу
+    """
+
+    FILENAME: str = 'cache.sqlite3'
+
+    def __init__(self, directory: str, fingerprint: str,
+                 max_entries: int = 100000):
+        """Конструктор класу
+
+        Parameters
+        ----------
+        directory : str
+            Каталог кешу, створюється якщо не існує
+        fingerprint : str
+            Відбиток шаблону перевірки
+        max_entries : int
+            Максимальна кількість записів
+        """
+
+        makedirs(directory, exist_ok=True)
+
+        self.directory: str = directory
+        self.fingerprint: str = fingerprint
+        self.max_entries: int = max_entries
+        self._connection = connect(join(directory, self.FILENAME))
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            'path TEXT NOT NULL, '
+            'fingerprint TEXT NOT NULL, '
+            'size INTEGER NOT NULL, '
+            'mtime INTEGER NOT NULL, '
+            'digest TEXT NOT NULL, '
+            'used REAL NOT NULL, '
+            'PRIMARY KEY (path, fingerprint))'
+        )
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS files_used ON files (used)'
+        )
+
+    def __enter__(self) -> 'Cache':
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def is_clean(self, path: str) -> bool:
+        """Перевіряє чи файл відомий як відформатований
+
+        Parameters
+        ----------
+        path : str
+            Шлях до файлу
+
+        Returns
+        -------
+        is_clean : bool
+            True якщо файл можна не перевіряти
+        """
+
+        path = abspath(path)
+        row = self._connection.execute(
+            'SELECT size, mtime, digest FROM files '
+            'WHERE path = ? AND fingerprint = ?',
+            (path, self.fingerprint),
+        ).fetchone()
+        if row is None:
+            return False
+
+        try:
+            file_stat = stat(path)
+        except OSError:
+            return False
+
+        size, mtime, digest = row
+        if file_stat.st_size == size and file_stat.st_mtime_ns == mtime:
+            self._touch(path, size, mtime, digest)
+            return True
+
+        # Файл змінено без зміни тексту, наприклад скопійовано
+        if file_stat.st_size == size:
+            try:
+                text = read_file(path)
+            except (OSError, ValueError):
+                return False
+            if text_digest(text) == digest:
+                self._touch(path, file_stat.st_size, file_stat.st_mtime_ns,
+                            digest)
+                return True
+
+        return False
+
+    def add(self, result: CheckResult):
+        """Додає файл який не змінився після перевірки
+
+        Parameters
+        ----------
+        result : CheckResult
+            Результат перевірки з розміром, часом зміни та хешем файлу
+        """
+
+        self._touch(abspath(result.path), result.size, result.mtime,
+                    result.digest)
+
+    def _touch(self, path: str, size: int, mtime: int, digest: str):
+        """Записує файл у кеш з поточним часом використання"""
+
+        self._connection.execute(
+            'INSERT OR REPLACE INTO files '
+            '(path, fingerprint, size, mtime, digest, used) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (path, self.fingerprint, size, mtime, digest, time()),
+        )
+
+    def close(self):
+        """Видаляє найстаріші записи понад max_entries та закриває базу"""
+
+        self._connection.execute(
+            'DELETE FROM files WHERE rowid IN ('
+            'SELECT rowid FROM files ORDER BY used DESC '
+            'LIMIT -1 OFFSET ?)',
+            (self.max_entries,),
+        )
+        self._connection.commit()
+        self._connection.close()
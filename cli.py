@@ -0,0 +1,377 @@
+"""Консольний інтерфейс утиліти для пакетної перевірки
+
+Без аргументів відкриває консольне меню, наприклад:
+
+    python cli.py check site/ --template strict --check --jobs 8
+
+"""
+
+from argparse import ArgumentParser
+from argparse import ArgumentTypeError
+from argparse import Namespace
+from json import dumps
+from os.path import isdir
+from sys import stderr
+
+from typing import List
+from typing import Optional
+
+from linter import __version__
+from linter import CheckResult
+from linter import LineRange
+from linter import LintProfile
+from linter import Template
+from linter import check_files
+from linter import find_html_files
+from linter import trace_span
+
+
+# Коди завершення утиліти
+EXIT_OK: int = 0
+EXIT_CHANGED: int = 1
+EXIT_ERROR: int = 2
+
+
+def parse_line_range(value: str) -> LineRange:
+    """Розбирає діапазон строчок 'FIRST:LAST' або одну строчку 'LINE'"""
+
+    first, _, last = value.partition(':')
+    try:
+        line_range = (int(first), int(last or first))
+    except ValueError:
+        raise ArgumentTypeError('невірний діапазон строчок "{}"'.format(
+            value
+        ))
+    if line_range[0] < 1 or line_range[1] < line_range[0]:
+        raise ArgumentTypeError('невірний діапазон строчок "{}"'.format(
+            value
+        ))
+    return line_range
+
+
+def create_parser() -> ArgumentParser:
+    """Створює парсер аргументів командної строки"""
+
+    parser = ArgumentParser(
+        prog='html-linter',
+        description='Утиліта що форматує HTML файли за вказаними шаблонами',
+    )
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s {}'.format(__version__))
+    commands = parser.add_subparsers(dest='command')
+
+    check = commands.add_parser(
+        'check',
+        help='перевірити Html файли або каталоги',
+    )
+    check.add_argument('paths', nargs='+', metavar='PATH',
+                       help='Html файл або каталог з Html файлами')
+    check.add_argument('--template', default='default',
+                       help='назва шаблону (за замовчуванням default)')
+    mode = check.add_mutually_exclusive_group()
+    mode.add_argument('--check', dest='write', action='store_false',
+                      help='не змінювати файли, тільки повідомити')
+    mode.add_argument('--fix', dest='write', action='store_true',
+                      help='записати відформатовані файли (за замовчуванням)')
+    mode.add_argument('--dry-run', dest='dry_run', action='store_true',
+                      help='показати які файли будуть змінені, '
+                           'не змінюючи їх та не впливаючи на код завершення')
+    mode.add_argument('--validate', action='store_true',
+                      help='тільки знайти недійсну розмітку, не форматуючи '
+                           'файли та не будуючи дерева тегів')
+    check.add_argument('--jobs', '-j', type=int, default=1,
+                       help='кількість процесів')
+    check.add_argument('--format', choices=('text', 'json'), default='text',
+                       help='формат звіту')
+    check.add_argument('--cache-dir', metavar='DIR',
+                       help='каталог кешу відформатованих файлів, '
+                            'без нього кеш не використовується')
+    check.add_argument('--cache-size', type=int, default=100000,
+                       metavar='N', help='максимальна кількість записів кешу')
+    check.add_argument('--stream', action='store_true',
+                       help='форматувати файли потоком, не читаючи '
+                            'їх у пам\'ять повністю')
+    check.add_argument('--profile', action='store_true',
+                       help='рахувати кількість викликів, час та зміни '
+                            'кожного правила для кожного файлу та всього')
+    check.add_argument('--lines', type=parse_line_range, action='append',
+                       metavar='FIRST:LAST',
+                       help='форматувати тільки теги на цих строчках, '
+                            'можна вказати кілька разів; такі файли '
+                            'форматуются без --stream')
+    check.add_argument('--trace', metavar='FILE',
+                       help='записати трасу перевірки у форматі Chrome '
+                            'trace-event (chrome://tracing, Perfetto)')
+    check.add_argument('--trace-threshold', type=float, default=1.0,
+                       metavar='MS', help='записувати у трасу виклики '
+                                          'правил, довші за MS мілісекунд')
+    check.set_defaults(write=True, dry_run=False, validate=False)
+
+    watch = commands.add_parser(
+        'watch',
+        help='форматувати Html файли після кожної їх зміни',
+    )
+    watch.add_argument('paths', nargs='+', metavar='PATH',
+                       help='Html файл або каталог з Html файлами')
+    watch.add_argument('--template', default='default',
+                       help='назва шаблону (за замовчуванням default)')
+    watch.add_argument('--check', dest='write', action='store_false',
+                       help='не змінювати файли, тільки повідомити')
+    watch.add_argument('--debounce', type=float, default=100.0,
+                       metavar='MS', help='форматувати файли, коли їх не '
+                                          'змінювали MS мілісекунд')
+    watch.add_argument('--poll', action='store_true',
+                       help='переглядати каталоги замість inotify')
+    watch.add_argument('--interval', type=float, default=1.0,
+                       metavar='SECONDS',
+                       help='час між переглядами каталогів з --poll')
+    watch.add_argument('--stream', action='store_true',
+                       help='форматувати файли потоком, не читаючи '
+                            'їх у пам\'ять повністю')
+
+    daemon = commands.add_parser(
+        'daemon',
+        help='сервер форматування з протоколом JSON-RPC',
+    )
+    daemon.add_argument('--socket', metavar='PATH',
+                        help='Unix сокет, без нього запити читаются '
+                             'зі стандартного вводу')
+    daemon.add_argument('--workers', type=int, default=4,
+                        help='кількість потоків, які виконують запити')
+    daemon.add_argument('--queue-size', type=int, default=64,
+                        help='максимальна кількість запитів у черзі')
+
+    return parser
+
+
+def load_template(name: str) -> Template:
+    """Завантажує шаблон за назвою, 'default' - шаблон за замовчуванням"""
+
+    if name == 'default':
+        return Template()
+    return Template.load(name)
+
+
+def collect_paths(paths: List[str], tracer=None) -> List[str]:
+    """Розкриває каталоги у списку шляхів у шляхи до Html файлів"""
+
+    files: List[str] = []
+    for path in paths:
+        if isdir(path):
+            with trace_span(tracer, 'walk', path):
+                files.extend(find_html_files(path))
+        else:
+            files.append(path)
+    return files
+
+
+def get_exit_code(results: List[CheckResult], args: Namespace) -> int:
+    """Вертає код завершення для результатів перевірки"""
+
+    if any(not result.ok for result in results):
+        return EXIT_ERROR
+    if args.dry_run or args.write:
+        return EXIT_OK
+    if any(result.changed for result in results):
+        return EXIT_CHANGED
+    return EXIT_OK
+
+
+def get_total_profile(results: List[CheckResult]) -> LintProfile:
+    """Складає статистику правил усіх перевірених файлів"""
+
+    total = LintProfile()
+    for result in results:
+        if result.profile is not None:
+            total.add(result.profile)
+    return total
+
+
+def print_profile(results: List[CheckResult]):
+    """Друкує таблиці статистики правил кожного файлу та всього"""
+
+    for result in results:
+        if result.profile is not None and result.profile.rules:
+            print()
+            print(result.path)
+            print(result.profile.format_table())
+    print()
+    print('Всього')
+    print(get_total_profile(results).format_table())
+
+
+def print_results(results: List[CheckResult], args: Namespace):
+    """Друкує звіт про перевірку у вибраному форматі"""
+
+    changed_count = sum(1 for result in results if result.changed)
+    errors_count = sum(1 for result in results if not result.ok)
+
+    if args.format == 'json':
+        report = {
+            'version': __version__,
+            'template': args.template,
+            'write': args.write,
+            'files': [
+                {
+                    'path': result.path,
+                    'changed': result.changed,
+                    'cached': result.cached,
+                    'errors': result.errors,
+                }
+                for result in results
+            ],
+            'checked': len(results),
+            'changed': changed_count,
+            'failed': errors_count,
+        }
+        if args.profile:
+            for file, result in zip(report['files'], results):
+                file['profile'] = (result.profile.to_dict()
+                                   if result.profile is not None else None)
+            report['profile'] = get_total_profile(results).to_dict()
+        print(dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    for result in results:
+        for error in result.errors:
+            print(error, file=stderr)
+        if result.changed:
+            if args.write:
+                print('Змінено {}'.format(result.path))
+            else:
+                print('Буде змінено {}'.format(result.path))
+
+    print('Перевірено {} файлів, {} {}, з помилками {}'.format(
+        len(results),
+        'змінено' if args.write else 'буде змінено',
+        changed_count,
+        errors_count,
+    ))
+    if args.profile:
+        print_profile(results)
+
+
+def run_check(args: Namespace) -> int:
+    """Виконує команду check"""
+
+    try:
+        template = load_template(args.template).compile()
+    except (OSError, ValueError) as error:
+        print('Error: Шаблон "{}" не завантажено: {}'.format(
+            args.template, error
+        ), file=stderr)
+        return EXIT_ERROR
+
+    if args.dry_run or args.validate:
+        args.write = False
+
+    tracer = None
+    if args.trace:
+        from tracing import Tracer
+
+        tracer = Tracer(args.trace_threshold / 1000)
+
+    paths = collect_paths(args.paths, tracer)
+    if args.cache_dir:
+        # sqlite3 імпортується тільки коли кеш потрібен
+        from cache import Cache
+
+        with Cache(args.cache_dir, template.fingerprint,
+                   args.cache_size) as cache:
+            results = check_files(paths, template, args.jobs, args.write,
+                                  cache, args.stream, args.profile, tracer,
+                                  args.lines, args.validate)
+    else:
+        results = check_files(paths, template, args.jobs, args.write,
+                              stream=args.stream, profile=args.profile,
+                              tracer=tracer, lines=args.lines,
+                              validate=args.validate)
+    if tracer is not None:
+        tracer.write(args.trace)
+    print_results(results, args)
+    return get_exit_code(results, args)
+
+
+def run_watch(args: Namespace) -> int:
+    """Виконує команду watch"""
+
+    try:
+        template = load_template(args.template).compile()
+    except (OSError, ValueError) as error:
+        print('Error: Шаблон "{}" не завантажено: {}'.format(
+            args.template, error
+        ), file=stderr)
+        return EXIT_ERROR
+
+    # Спостереження імпортується тільки для команди watch
+    from watch import Watch
+    from watch import create_watcher
+
+    watcher = create_watcher(args.paths, args.poll, args.interval)
+    print('Спостереження за {} ({})'.format(
+        ', '.join(args.paths), type(watcher).__name__
+    ), flush=True)
+    try:
+        Watch(template, watcher, args.write, args.debounce / 1000,
+              args.stream).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return EXIT_OK
+
+
+def run_daemon(args: Namespace) -> int:
+    """Виконує команду daemon"""
+
+    # Сервер імпортується тільки для команди daemon
+    from daemon import Daemon
+
+    daemon = Daemon(args.workers, args.queue_size)
+    try:
+        if args.socket:
+            daemon.serve_unix(args.socket)
+        else:
+            daemon.serve_stdio()
+    except KeyboardInterrupt:
+        pass
+    return EXIT_OK
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Точка входу утиліти
+
+    Parameters
+    ----------
+    argv : Optional[List[str]]
+        Аргументи командної строки, за замовчуванням sys.argv
+
+    Returns
+    -------
+    code : int
+        Код завершення
+    """
+
+    args = create_parser().parse_args(argv)
+
+    if args.command is None:
+        # Меню імпортується тільки для інтерактивного режиму
+        from menu import Linter
+
+        Linter().start_menu()
+        return EXIT_OK
+
+    if args.command == 'check':
+        return run_check(args)
+
+    if args.command == 'watch':
+        return run_watch(args)
+
+    if args.command == 'daemon':
+        return run_daemon(args)
+
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,508 @@
+"""Сервер форматування з протоколом JSON-RPC 2.0
+
+Сервер тримає скомпільовані шаблони та парсери між запитами, тому
+редактори та інструменти збірки не платять за запуск утиліти для
+кожного файлу:
+
+    python cli.py daemon                      # stdin/stdout
+    python cli.py daemon --socket linter.sock # Unix сокет
+
+Кожне повідомлення - один JSON об'єкт на окремій строчці. Методи:
+
+    format {text, template?, range?} -> {text, changed, errors}
+    check {path, template?, write?}  -> {path, changed, errors}
+    cancel {id}                      -> true якщо запит ще не завершено
+    shutdown                         -> null, сервер завершує роботу
+
+range - номери першої та останньої строчки [first, last], тоді
+форматуются тільки теги на цих строчках.
+
+Запити виконуются кількома потоками. Черга запитів обмежена, тому
+коли вона заповнена, сервер перестає читати нові запити, поки
+потоки не звільнятся.
+
+"""
+
+from json import dumps
+from json import loads
+from os import remove
+from os.path import exists
+from queue import Queue
+from socket import AF_UNIX
+from socket import SHUT_RDWR
+from socket import SOCK_STREAM
+from socket import socket
+from sys import stdin
+from sys import stdout
+from threading import Lock
+from threading import Thread
+
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import TextIO
+
+from cli import load_template
+from linter import CompiledTemplate
+from linter import Html
+from linter import check_file_safe
+
+
+# Коди помилок JSON-RPC 2.0 та LSP для скасованих запитів
+PARSE_ERROR: int = -32700
+INVALID_REQUEST: int = -32600
+METHOD_NOT_FOUND: int = -32601
+INVALID_PARAMS: int = -32602
+SERVER_ERROR: int = -32000
+REQUEST_CANCELLED: int = -32800
+
+
+def is_request_id(value) -> bool:
+    """Перевіряє що значення - дійсний id запиту JSON-RPC
+
+    id може бути строкою, цілим числом або null. bool теж є int,
+    але не є дійсним id, а список чи словник не можна зробити
+    ключем Connection.pending.
+    """
+
+    if value is None or isinstance(value, str):
+        return True
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class RequestError(Exception):
+    """Помилка запиту, яка повертаєтся клієнту
+
+    Attributes
+    ----------
+    code : int
+        Код помилки JSON-RPC
+    """
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code: int = code
+
+
+class ParserPool:
+    """Парсери Html, які використовуются повторно
+
+    Methods
+    -------
+    acquire() : Html
+        Бере парсер з пулу або створює новий
+    release(html: Html)
+        Повертає парсер у пул
+    """
+
+    def __init__(self):
+        self._parsers: List[Html] = []
+        self._lock: Lock = Lock()
+
+    def acquire(self) -> Html:
+        """Бере парсер з пулу або створює новий"""
+
+        with self._lock:
+            if self._parsers:
+                return self._parsers.pop()
+        return Html('')
+
+    def release(self, html: Html):
+        """Повертає парсер у пул, дерево тегів парсера видаляєтся"""
+
+        html.reset()
+        with self._lock:
+            self._parsers.append(html)
+
+
+class Connection:
+    """З'єднання з клієнтом
+
+    Attributes
+    ----------
+    input : TextIO
+        Звідки читаются запити
+    output : TextIO
+        Куди пишуться відповіді
+    pending : Dict[object, Request]
+        Запити з'єднання, які ще не завершені
+
+    Methods
+    -------
+    send(message: dict)
+        Відправляє повідомлення клієнту
+    """
+
+    def __init__(self, input: TextIO, output: TextIO):
+        self.input: TextIO = input
+        self.output: TextIO = output
+        self.pending: Dict[object, Request] = {}
+        self._lock: Lock = Lock()
+
+    def send(self, message: dict):
+        """Відправляє повідомлення клієнту, з будь-якого потоку"""
+
+        message['jsonrpc'] = '2.0'
+        line = dumps(message) + '\n'
+        with self._lock:
+            try:
+                self.output.write(line)
+                self.output.flush()
+            except (OSError, ValueError):
+                # Клієнт вже закрив з'єднання
+                pass
+
+
+class Request:
+    """Запит клієнта
+
+    Attributes
+    ----------
+    id : object
+        Ідентифікатор запиту, None для сповіщень
+    method : str
+        Назва методу
+    params : dict
+        Параметри методу
+    connection : Connection
+        З'єднання, у яке відправляєтся відповідь
+    cancelled : bool
+        Клієнт скасував запит?
+    """
+
+    def __init__(self, id: object, method: str, params: dict,
+                 connection: Connection):
+        self.id: object = id
+        self.method: str = method
+        self.params: dict = params
+        self.connection: Connection = connection
+        self.cancelled: bool = False
+
+    def check_cancelled(self):
+        """Перериває виконання скасованого запиту
+
+        Raises
+        ------
+        RequestError
+            Запит скасовано
+        """
+
+        if self.cancelled:
+            raise RequestError(REQUEST_CANCELLED, 'Запит скасовано')
+
+
+class Daemon:
+    """Сервер форматування
+
+    Attributes
+    ----------
+    workers : int
+        Кількість потоків, які виконують запити
+    queue_size : int
+        Максимальна кількість запитів у черзі
+
+    Methods
+    -------
+    serve(connection: Connection)
+        Читає та виконує запити з'єднання до його закриття
+    serve_stdio()
+        Обслуговує запити зі стандартного вводу
+    serve_unix(path: str)
+        Обслуговує запити з Unix сокету
+    get_template(name: str) : CompiledTemplate
+        Вертає скомпільований шаблон за назвою
+    """
+
+    def __init__(self, workers: int = 4, queue_size: int = 64):
+        """Конструктор класу
+
+        Parameters
+        ----------
+        workers : int
+            Кількість потоків, які виконують запити
+        queue_size : int
+            Максимальна кількість запитів у черзі
+        """
+
+        self.workers: int = workers
+        self.queue_size: int = queue_size
+        self._queue: Queue = Queue(queue_size)
+        self._threads: List[Thread] = []
+        self._templates: Dict[str, CompiledTemplate] = {}
+        self._templates_lock: Lock = Lock()
+        self._parsers: ParserPool = ParserPool()
+        self._running: bool = True
+        self._server: Optional[socket] = None
+
+    def _start(self):
+        """Запускає потоки, які виконують запити"""
+
+        for _ in range(self.workers):
+            thread = Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _stop(self):
+        """Чекає виконання запитів з черги та зупиняє потоки"""
+
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def serve_stdio(self):
+        """Обслуговує запити зі стандартного вводу до його закриття"""
+
+        self._start()
+        try:
+            self.serve(Connection(stdin, stdout))
+        finally:
+            self._stop()
+
+    def serve_unix(self, path: str):
+        """Обслуговує запити з Unix сокету до запиту shutdown
+
+        Parameters
+        ----------
+        path : str
+            Шлях до сокету, старий сокет видаляєтся
+        """
+
+        if exists(path):
+            remove(path)
+        self._server = socket(AF_UNIX, SOCK_STREAM)
+        self._server.bind(path)
+        self._server.listen()
+        self._start()
+        try:
+            while self._running:
+                try:
+                    client, _ = self._server.accept()
+                except OSError:
+                    # Сокет закритий запитом shutdown
+                    break
+                Thread(target=self._serve_client, args=(client,),
+                       daemon=True).start()
+        finally:
+            self._server.close()
+            remove(path)
+            self._stop()
+
+    def _serve_client(self, client: socket):
+        """Обслуговує одне з'єднання Unix сокету"""
+
+        with client:
+            input = client.makefile('r', encoding='utf-8')
+            output = client.makefile('w', encoding='utf-8')
+            try:
+                self.serve(Connection(input, output))
+            finally:
+                input.close()
+                output.close()
+
+    def serve(self, connection: Connection):
+        """Читає та виконує запити з'єднання до його закриття
+
+        Parameters
+        ----------
+        connection : Connection
+            З'єднання з клієнтом
+        """
+
+        for line in connection.input:
+            if not line.strip():
+                continue
+            request = self._parse(line, connection)
+            if request is None:
+                continue
+            if request.method == 'cancel':
+                self._cancel(request)
+            elif request.method == 'shutdown':
+                self._shutdown(request)
+                return
+            else:
+                if request.id is not None:
+                    connection.pending[request.id] = request
+                # Заповнена черга блокує читання, тому клієнт
+                # не може надіслати більше запитів ніж обробляєтся
+                self._queue.put(request)
+            if not self._running:
+                return
+
+    def _parse(self, line: str,
+               connection: Connection) -> Optional[Request]:
+        """Розбирає строчку запиту, або відправляє помилку розбору"""
+
+        try:
+            message = loads(line)
+        except ValueError as error:
+            connection.send({'id': None, 'error': {
+                'code': PARSE_ERROR, 'message': str(error),
+            }})
+            return None
+        if (not isinstance(message, dict)
+                or not isinstance(message.get('method'), str)
+                or not is_request_id(message.get('id'))):
+            connection.send({'id': None, 'error': {
+                'code': INVALID_REQUEST, 'message': 'Невірний запит',
+            }})
+            return None
+        params = message.get('params', {})
+        if not isinstance(params, dict):
+            params = {}
+        return Request(message.get('id'), message['method'], params,
+                       connection)
+
+    def _cancel(self, request: Request):
+        """Скасовує запит того ж з'єднання
+
+        Запит у черзі не виконуєтся, а на запит, який вже виконуєтся,
+        замість результату відправляєтся помилка скасування.
+        """
+
+        target_id = request.params.get('id')
+        pending = None
+        if is_request_id(target_id):
+            pending = request.connection.pending.get(target_id)
+        if pending is not None:
+            pending.cancelled = True
+        if request.id is not None:
+            request.connection.send({'id': request.id,
+                                     'result': pending is not None})
+
+    def _shutdown(self, request: Request):
+        """Зупиняє сервер після виконання запитів з черги"""
+
+        # Відповідь відправляєтся першою, бо після зупинки сокету
+        # процес може завершитись раніше за цей потік
+        if request.id is not None:
+            request.connection.send({'id': request.id, 'result': None})
+        self._running = False
+        if self._server is not None:
+            # close не перериває accept у іншому потоці, а shutdown
+            # перериває
+            self._server.shutdown(SHUT_RDWR)
+
+    def _work(self):
+        """Потік, який виконує запити з черги"""
+
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            self._execute(request)
+
+    def _execute(self, request: Request):
+        """Виконує запит та відправляє відповідь"""
+
+        connection = request.connection
+        try:
+            request.check_cancelled()
+            handler = getattr(self, '_method_' + request.method, None)
+            if handler is None:
+                raise RequestError(METHOD_NOT_FOUND,
+                                   'Метод "{}" не знайдено'.format(
+                                       request.method
+                                   ))
+            result = handler(request)
+            response = {'id': request.id, 'result': result}
+        except RequestError as error:
+            response = {'id': request.id, 'error': {
+                'code': error.code, 'message': str(error),
+            }}
+        except Exception as error:
+            response = {'id': request.id, 'error': {
+                'code': SERVER_ERROR,
+                'message': '{}: {}'.format(type(error).__name__, error),
+            }}
+        finally:
+            connection.pending.pop(request.id, None)
+        if request.id is not None:
+            connection.send(response)
+
+    def get_template(self, name: str) -> CompiledTemplate:
+        """Вертає скомпільований шаблон за назвою
+
+        Шаблон завантажуєтся та компілюєтся при першому запиті.
+
+        Raises
+        ------
+        RequestError
+            Шаблон не завантажено
+        """
+
+        with self._templates_lock:
+            template = self._templates.get(name)
+            if template is None:
+                try:
+                    template = load_template(name).compile()
+                except (OSError, ValueError) as error:
+                    raise RequestError(
+                        INVALID_PARAMS,
+                        'Шаблон "{}" не завантажено: {}'.format(name, error),
+                    )
+                self._templates[name] = template
+            return template
+
+    @staticmethod
+    def _get_param(request: Request, name: str, kind: type,
+                   default: object = None) -> object:
+        """Вертає параметр запиту вказаного типу
+
+        Raises
+        ------
+        RequestError
+            Параметра немає, або він іншого типу
+        """
+
+        value = request.params.get(name, default)
+        if not isinstance(value, kind):
+            raise RequestError(INVALID_PARAMS,
+                               'Параметр "{}" має бути {}'.format(
+                                   name, kind.__name__
+                               ))
+        return value
+
+    def _method_format(self, request: Request) -> dict:
+        """Метод format: форматує текст"""
+
+        text = self._get_param(request, 'text', str)
+        template = self.get_template(
+            self._get_param(request, 'template', str, 'default')
+        )
+        lines = None
+        if 'range' in request.params:
+            line_range = self._get_param(request, 'range', list)
+            if (len(line_range) != 2
+                    or not all(isinstance(line, int) for line in line_range)
+                    or not 1 <= line_range[0] <= line_range[1]):
+                raise RequestError(INVALID_PARAMS,
+                                   'Параметр "range" має бути '
+                                   '[first, last]')
+            lines = [(line_range[0], line_range[1])]
+
+        html = self._parsers.acquire()
+        try:
+            html.path = '<text>'
+            formatted = html.format_text(text, template, lines)
+            errors = html.errors
+        finally:
+            self._parsers.release(html)
+        request.check_cancelled()
+        if formatted is None:
+            return {'text': text, 'changed': False, 'errors': errors}
+        return {'text': formatted, 'changed': formatted != text,
+                'errors': []}
+
+    def _method_check(self, request: Request) -> dict:
+        """Метод check: перевіряє файл, як команда check"""
+
+        path = self._get_param(request, 'path', str)
+        template = self.get_template(
+            self._get_param(request, 'template', str, 'default')
+        )
+        write = self._get_param(request, 'write', bool, False)
+        result = check_file_safe(path, template, write)
+        return {'path': result.path, 'changed': result.changed,
+                'errors': result.errors}
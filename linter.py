@@ -4,23 +4,277 @@
 
 __version__ = "0.2"
 
-from os import system
+# Версія правил форматування, входить у Template.fingerprint. Збільшуєтся
+# з кожною зміною результату форматування, щоб кеш перевірених файлів
+# попередніх правил не пропускав файли, які тепер форматуются інакше.
+FORMAT_VERSION = 5
+
+from contextlib import nullcontext
 from os import walk
 from os import makedirs
 from os import listdir
 from os import remove
-from os.path import exists
+from os import replace
+from os import stat
+from os.path import dirname
 from os.path import join
+from shutil import copymode
+from tempfile import NamedTemporaryFile
 from json import dump
+from json import dumps
 from json import load
-from re import search
+from hashlib import blake2b
 from re import compile as re_compile
+from re import escape as re_escape
+from re import Match
 from re import Pattern
-from re import sub
 from html.parser import HTMLParser
+from sys import intern
+from time import perf_counter
 
+from typing import Callable
+from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+
+# Метрики тексту: (кількість '\n', дліна першої строчки, дліна останньої
+# строчки, ширина останньої строчки з табуляцією як 4 пробіли,
+# максимальна дліна внутрішніх строчок або -1 якщо їх немає)
+Metrics = Tuple[int, int, int, int, int]
+
+EMPTY_METRICS: Metrics = (0, 0, 0, 0, -1)
+
+# Номери першої та останньої строчки, від 1 включно
+LineRange = Tuple[int, int]
+
+# Позначка місця дочірнього тегу у Tag.text. Одинокий сурогат не може
+# з'явитися у тексті прочитаному з файлу, тому не збігається з текстом
+# користувача, на відміну від '{}'.
+SLOT: str = '\ud800'
+
+# Перевіряти кешовані значення тегів перерахунком при кожному запиті.
+# Повільно, тільки для налагодження скидання кешів, див. Tag.get_col.
+VERIFY_CACHE: bool = False
+
+# Скомпільовані регулярні вирази правил форматування. Виклики re.sub
+# та re.search з рядком шукають вираз у кеші модуля re при кожному
+# виклику, а правила виконуются для кожного тегу.
+TAG_RE: Pattern = re_compile(r'<[\s\S]*?>')
+# '<' та ім'я початкового тегу, див. StartTag
+START_TAG_NAME_RE: Pattern = re_compile(r'<[^\s/>]*')
+# Атрібут початкового тегу з відступами перед ним: ім'я (2), '=' з
+# відступами (3) та значення у подвійних (4), одинарних (5) лапках або
+# без лапок (6). Текст, який не є атрібутом (7), наприклад вираз
+# шаблонізатора, береться до пробілу, а рядок у лапках - повністю.
+ATTRIBUTE_RE: Pattern = re_compile(
+    r'(\s*)(?:([^\s"\'<>/={}]+)'
+    r'(?:(\s*=\s*)(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'=<>`]+)))?'
+    r'|(\{\{[\s\S]*?\}\}|\{%[\s\S]*?%\}|\{#[\s\S]*?#\}'
+    r'|"[^"]*"|\'[^\']*\'|\S[^\s"\']*))'
+)
+TAG_END_SPACE_RE: Pattern = re_compile(r' *(?=(\/\>|(?<!\/)\>))')
+EMPTY_TAG_END_SPACE_RE: Pattern = re_compile(r' *(?=\/\>)')
+END_TAG_RE: Pattern = re_compile(r'\s+\<\/')
+# Відступи перед '</' цілком, без порожнього збігу після них
+END_TAG_SPACE_RE: Pattern = re_compile(r'(?<!\s)\s*(?=<\/)')
+END_TAG_INDENT_RE: Pattern = re_compile(r'(?<=\n)[^\S\n]*(?=<\/)')
+INDENT_RE: Pattern = re_compile(r'(?<=\n)\s*')
+# Перенос строки з відступами навколо: пробіли в кінці строчки,
+# переноси з порожніми строчками та відступи наступної строчки
+LINE_BREAK_RE: Pattern = re_compile(r'[^\S\n]*\n\s*')
+# Символи, на яких TextWrapper змінює стан, крім звичайного стовбчика
+WRAP_STOP_RE: Pattern = re_compile('[ \n' + SLOT + ']')
+
+# Вирази швидкого розбору, див. Html.fast_scan. Початковий тег
+# розбираєтся одним виразом, тільки якщо HTMLParser розбере його так
+# само: пробіли лише ASCII, атрибути розділені пробілами, одне '='.
+# Значення без лапок закінчуєтся перед пробілом або '>', як у
+# HTMLParser, тому '/' у кінці значення не закриває тег. Інші теги
+# розбирає HTMLParser.
+START_TAG_FAST_RE: Pattern = re_compile(
+    r'<([a-zA-Z][-.:\w]*)'
+    r'(?:[ \t\n\r\f]+[a-zA-Z_:@][-.:\w@]*'
+    r'(?:[ \t\n\r\f]*=[ \t\n\r\f]*'
+    r'(?:"[^"]*"|\'[^\']*\'|[^\s"\'=<>`]+(?=[\s>])))?)*'
+    r'[ \t\n\r\f]*(/?)>'
+)
+# Те саме, що html.parser.endtagfind
+END_TAG_FAST_RE: Pattern = re_compile(r'</\s*([a-zA-Z][-.a-zA-Z0-9:_]*)\s*>')
+# Кінець тексту з '&' без цих символів може бути обрізаним посиланням
+CHARREF_END_RE: Pattern = re_compile(r'[\s;]')
+
+
+def measure_text(text: str) -> Metrics:
+    """Функція рахує метрики тексту
+
+    Parameters
+    ----------
+    text : str
+        Текст без дочірніх тегів
+
+    Returns
+    -------
+    metrics : Metrics
+        Метрики тексту
+    """
+
+    lines_count = text.count('\n')
+    if not lines_count:
+        length = len(text)
+        return (0, length, length, length + 3 * text.count('\t'), -1)
+
+    first_end = text.find('\n')
+    last_start = text.rfind('\n') + 1
+    last_line = text[last_start:]
+    inner_max = -1
+    if lines_count > 1:
+        inner_lines = text[first_end + 1:last_start - 1].split('\n')
+        inner_max = max(map(len, inner_lines))
+
+    return (
+        lines_count,
+        first_end,
+        len(last_line),
+        len(last_line) + 3 * last_line.count('\t'),
+        inner_max,
+    )
+
+
+def join_metrics(left: Metrics, right: Metrics) -> Metrics:
+    """Функція вертає метрики тексту left + right без склеювання тексту"""
+
+    if not right[0]:
+        if not left[0]:
+            length = left[1] + right[1]
+            return (0, length, length, left[3] + right[3], -1)
+        return (left[0], left[1], left[2] + right[2], left[3] + right[3],
+                left[4])
+    if not left[0]:
+        return (right[0], left[2] + right[1], right[2], right[3], right[4])
+    return (
+        left[0] + right[0],
+        left[1],
+        right[2],
+        right[3],
+        max(left[4], right[4], left[2] + right[1]),
+    )
+
+
+def get_max_col(metrics: Metrics, col: int) -> int:
+    """Функція вертає максимальну дліну строчок тексту
+
+    Parameters
+    ----------
+    metrics : Metrics
+        Метрики тексту
+    col : int
+        Позиція першого символу тексту на лінії
+    """
+
+    lines_count, first, last, _, inner_max = metrics
+    if not lines_count:
+        return max(0, col + first - 1) if first else 0
+    return max(0, col + first, inner_max, last - 1)
+
+
+def normalize_line_break(space: str, convert: Optional[Callable[[str], str]],
+                         blank_lines: Optional[int],
+                         keep_indents: bool) -> str:
+    """Функція нормалізує перенос строки з відступами навколо нього
+
+    Пробіли в кінці строчки лишаются, порожніх строчок лишаєтся не
+    більше blank_lines, а відступи наступної строчки та, якщо
+    keep_indents, порожніх строчок змінює convert.
+
+    Parameters
+    ----------
+    space : str
+        Відступи з хоча б одним переносом строки, див. LINE_BREAK_RE
+    convert : Optional[Callable[[str], str]]
+        Заміна відступів строчки, None - не змінювати
+    blank_lines : Optional[int]
+        Кількість порожніх строчок, які лишаются, None - всі
+    keep_indents : bool
+        Зберігати відступи у порожніх строчках?
+    """
+
+    first = space.find('\n')
+    last = space.rfind('\n')
+    indent = space[last + 1:]
+    if convert is not None:
+        indent = convert(indent)
+    if first == last:
+        return space[:last + 1] + indent
+
+    lines = space[first + 1:last].split('\n')
+    if blank_lines is not None:
+        del lines[blank_lines:]
+    parts = [space[:first + 1]]
+    for line in lines:
+        if not keep_indents:
+            line = ''
+        elif convert is not None:
+            line = convert(line)
+        parts.append(line)
+        parts.append('\n')
+    parts.append(indent)
+    return ''.join(parts)
+
+
+def is_text_line_break(text: str, start: int, end: int) -> bool:
+    """Функція перевіряє чи перенос строки стоїть між словами тексту
+
+    Перенос на початку чи в кінці тексту, перед тегом або після тегу
+    чи дочірнього тегу (SLOT) не стоїть між словами.
+
+    Parameters
+    ----------
+    text : str
+        Текст з переносом
+    start, end : int
+        Межі переносу з відступами у text
+    """
+
+    return (0 < start and end < len(text)
+            and text[start - 1] != '>' and text[start - 1] != SLOT
+            and text[end] != '<' and text[end] != SLOT)
+
+
+def trace_span(tracer, name: str, path: str):
+    """Функція вертає інтервал траси, або пустий контекст без траси
+
+    Parameters
+    ----------
+    tracer : Optional[tracing.Tracer]
+        Траса перевірки
+    name : str
+        Назва інтервалу
+    path : str
+        Файл або каталог, якого стосуєтся інтервал
+    """
+
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, path)
+
+
+def read_file(path: str) -> str:
+    """Функція читає текст Html файлу"""
+
+    with open(path, 'r') as file:
+        return file.read()
+
+
+def text_digest(text: str) -> str:
+    """Функція вертає хеш тексту"""
+
+    return blake2b(text.encode('utf-8', 'surrogatepass'), 
+                   digest_size=16).hexdigest()
 
 
 class Template:
@@ -43,11 +297,11 @@ class Template:
     hard_wrap_column : int
         Стовбчик після якого потрібно переносити код
     keep_line_breaks : bool
-        Переносити <br /> на нову строку?
+        Зберігати перенос строки перед тегами з inline_elements?
     keep_line_breaks_in_text : bool
         Зберігати перенос строки у тексті тега?
     keep_blank_lines : int
-        Кількість порожніх ліній які зберегаются
+        Кількість порожніх ліній підряд які зберегаются
     wrap_attributes : int
         Варіанти переносу атрібутів:
             DO_NOT_WRAP - не переносити строки атрібутів.
@@ -60,12 +314,16 @@ class Template:
                           строчки, один за одним.
     wrap_text : bool
         Переносити текст в тэгі? 
+    balance_text : bool
+        Переносити текст так, щоб строчки були якомога рівнішими,
+        а не тільки коли слово не вміщуєтся?
     align_attributes : bool
         Вирівнювати атрибути на послідуючих строках?
     align_text : bool
         Вирівнювати текст на послідуючих строках?
     keep_white_spaces : bool
-        Заборонити операції з відступами?
+        Заборонити операції з відступами у тексті всіх тегів, як
+        у keep_white_space_inside?
     space_around_eq_in_attribute : bool
         Добавити відступи навколо знака "=" у атрібутах тега?
     space_after_tag_name : bool
@@ -109,6 +367,12 @@ class Template:
         Метод для створення нових шаблонів
     save()
         Метод для зберігання шаблонів
+    to_dict() : dict
+        Метод вертає налаштування шаблону у вигляді словника
+    fingerprint() : str
+        Метод вертає відбиток налаштувань шаблону та версії утиліти
+    compile() : CompiledTemplate
+        Метод вертає незмінну копію шаблону для форматування
     get_templates() : List[str]:
         Метод для отримання доступних шаблонів
     load(name: str) : Template:
@@ -142,6 +406,7 @@ class Template:
         self.keep_blank_lines: int = 2
         self.wrap_attributes: int = self.WRAP_IF_LONG
         self.wrap_text: bool = True
+        self.balance_text: bool = False
         self.align_attributes: bool = True
         self.align_text: bool = False
         self.keep_white_spaces: bool = False
@@ -187,7 +452,13 @@ class Template:
 
         makedirs(self.TEMPLATES_DIR, exist_ok=True)
 
-        data = {
+        with open(join(self.TEMPLATES_DIR, self.name + '.json'), 'w') as file:
+            dump(self.to_dict(), file)
+
+    def to_dict(self) -> dict:
+        """Метод вертає налаштування шаблону у вигляді словника"""
+
+        return {
             'name': self.name,
             'use_tab_character': self.use_tab_character,
             'smart_tab': self.smart_tab,
@@ -200,6 +471,7 @@ class Template:
             'keep_blank_lines': self.keep_blank_lines,
             'wrap_attributes': self.wrap_attributes,
             'wrap_text': self.wrap_text,
+            'balance_text': self.balance_text,
             'align_attributes': self.align_attributes,
             'align_text': self.align_text,
             'keep_white_spaces': self.keep_white_spaces,
@@ -218,8 +490,24 @@ class Template:
             'generate_quote_marks': self.generate_quote_marks,
         }
 
-        with open(join(self.TEMPLATES_DIR, self.name + '.json'), 'w') as file:
-            dump(data, file)
+    def fingerprint(self) -> str:
+        """Метод вертає відбиток налаштувань шаблону та версій утиліти
+
+        Відбиток включає __version__ та FORMAT_VERSION. Ім'я шаблону
+        не входить у відбиток, тому однакові налаштування під різними
+        іменами мають однаковий відбиток.
+        """
+
+        data = self.to_dict()
+        del data['name']
+        data['__version__'] = __version__
+        data['__format_version__'] = FORMAT_VERSION
+        return text_digest(dumps(data, sort_keys=True))
+
+    def compile(self) -> 'CompiledTemplate':
+        """Метод вертає незмінну копію шаблону для форматування"""
+
+        return CompiledTemplate(self.to_dict(), self.fingerprint())
 
     @staticmethod
     def get_templates() -> List[str]:
@@ -304,6 +592,10 @@ class Template:
             'wrap_text', 
             template.wrap_text,
         )
+        template.balance_text = data.get(
+            'balance_text', 
+            template.balance_text,
+        )
         template.align_attributes = data.get(
             'align_attributes', 
             template.align_attributes,
@@ -372,478 +664,1694 @@ class Template:
         return template
 
 
-class Tag:
-    """Класс який описує тег
-    
+class CompiledTemplate:
+    """Незмінний шаблон форматування, див. Template.compile
+
+    Налаштування мають ті самі імена, що і у Template, але списки тегів
+    замінені на frozenset, а відступи пораховані заздалегідь. Шаблон
+    не можна змінити, тому відбиток рахується один раз, а процесам
+    передаются тільки налаштування.
+
     Attributes
     ----------
-    name : str
-        Ім'я тегу
-    text : str
-        Текст тегу
-    childs : List[Tag]
-        Список дочірніх тегів
-    parent : Optional[Tag]
-        Батько тегу
+    TAG_LISTS : Tuple[str, ...]
+        Налаштування зі списками тегів
+    fingerprint : str
+        Відбиток налаштувань шаблону та версії утиліти
+    indent_string : str
+        Відступ одного рівня вкладення
+    dont_indent_parents : frozenset
+        dont_indent_child та '' - ім'я кореневого тегу
+    tab_replacement : (str, str)
+        Відступ перед тегами, який замінює lint_white_space, та заміна
+    white_space_re : Pattern
+        Переноси строк, які може змінити lint_white_space: з порожніми
+        строчками або з відступом, який замінює tab_replacement
 
     Methods
     -------
-    get_pos() : (int, int)
-        Метод який визначає лінію та стовбчик де починається тег
-    _get_text_before_target(target: 'Tag') : (str, bool)
-        Метод вертає текст до пошукового тега
-    get_root_tag() : Tag
-        Метод вертає корневий тег дерева тегів
-    lint(template: Template)
-        Метод який послідовно запускає методи форматування текста
-    get_text() : str
-        Вертає текст тегу з дочірніми элементами
-    lint_use_tab_character(template: Template)
-        Метод для Template.use_tab_character
-    lint_indents(template: Template)
-        Method який робить відступи від батька
-    replace_space_before_tag(space: str)
-        Метод який заставляє батька замінити пространство перед тегом
-    _replace_space_before_tag(target: Tag, new_space: str)
-        Метод який замінює відступи перед тегом
-    get_space_before_tag() : str
-        Метод який вертає відступи перед тегом
-    _get_space_before_tag(target: Tag) : str
-        Метод який вертає відступи перед пошуковим тегом
-    get_lines_count() : int
-        Метод який віддає кількість строчок цього тега
-    lint_continuation_indend(template: Template)
-        Робить відступи перед атрибутами тегу на нових строчках
-    lint_insert_new_line_before(template: Template)
-        Метод який переносить на нову строку тег якщо він є 
-        у списку тегів які треба переносити на нову строку
-    lint_remove_new_line_before(template: Template)
-        Метод видаляє перенос на нову строку якщо тег є 
-        у списку тегів які не треба переносити на нову строку
-    get_indent_col() : int
-        Метод визначає відступи на лінії
-    get_max_col_in_text_tag() : int
-        Метод визначає максимальну дліну текста тега
-    lint_hard_wrap(template: Template)
-        Метод переносить тег на строку, якщо длліна тексту тега завелика
-    lint_wrap_attributies(template: Template)
-        Метод форматування для Template.wrap_attributes
-    lint_wrap_attributies_if_long(template: Template)
-        Переносить атрібут тега якщо він залазить за ліміт
-    lint_chop_down_attributies_if_long(template: Template)
-        Якщо дліна тегу завелика то переносить теги послідовно на 
-        наступні строчки
-    lint_chop_down_attributies_always(template: Template)
-        Переносить всі атрибути послідовно на наступні строчки
-    lint_align_attributes(template: Template)
-        Метод для вирівнювання атрібутів на наступних строчках
-    get_text_string() : str
-        Віддає текст тегу, без дочірніх тегів
-    get_length_first_line() : (int, bool)
-        Метод вертає дліну першої строчки тега
-    lint_wrap_text(template: Template)
-        Метод який форматує текст в тегах
-    lint_space_around_eq_in_attribute(template: Template)
-        Метод добавляє відступи біля знака '=' у атрібутах тегу
-    lint_space_after_tag_name(template: Template)
-        Метод добавляє відступ після імені тегу
-    lint_space_in_empty_tag(template: Template)
-        Метод добавляє відступ після імені тегу у пустих тегах
-    lint_new_line_before_first_attr(template: Template)
-        Метод добавляє перенос строки перед першим атрібутом якщо 
-        тег не на одній строчці
+    to_dict() : dict
+        Метод вертає налаштування шаблону у вигляді словника
     """
 
-    def __init__(self, name: str, text: str, parent: Optional['Tag']):
+    DO_NOT_WRAP: int = Template.DO_NOT_WRAP
+    WRAP_IF_LONG: int = Template.WRAP_IF_LONG
+    CHOP_DOWN_IF_LONG: int = Template.CHOP_DOWN_IF_LONG
+    WRAP_ALWAYS: int = Template.WRAP_ALWAYS
+
+    SINGLE: int = Template.SINGLE
+    DOUBLE: int = Template.DOUBLE
+    NONE: int = Template.NONE
+
+    TAG_LISTS: Tuple[str, ...] = (
+        'insert_new_line_before',
+        'remove_new_line_before',
+        'dont_indent_child',
+        'inline_elements',
+        'keep_white_space_inside',
+        'dont_break_if_inline_content',
+    )
+
+    __slots__ = tuple(Template().to_dict()) + (
+        'fingerprint',
+        'indent_string',
+        'dont_indent_parents',
+        'tab_replacement',
+        'white_space_re',
+    )
+
+    def __init__(self, options: dict, fingerprint: str):
         """Конструктор класу
-        
+
         Parameters
         ----------
-        name : str
-            Ім'я тегу
-        text : str
-            Текст тегу
-        parent : Optional[Tag]
-            Батько тегу
+        options : dict
+            Налаштування шаблону, див. Template.to_dict
+        fingerprint : str
+            Відбиток налаштувань, див. Template.fingerprint
         """
 
-        self.name: str = name
-        self.text: str = text
-        self.childs: List[Tag] = []
-        self.parent: Optional[Tag] = parent
+        set_value = super().__setattr__
+        for name, value in options.items():
+            if name in self.TAG_LISTS:
+                value = frozenset(value)
+            set_value(name, value)
+        set_value('fingerprint', fingerprint)
+        set_value('indent_string', ' ' * self.indent)
+        set_value('dont_indent_parents', self.dont_indent_child | {''})
+        if self.use_tab_character:
+            set_value('tab_replacement', ('    ', '\t'))
+        else:
+            set_value('tab_replacement', ('\t', '    '))
+        # Звичайний перенос з відступом без заміни лишаєтся як є, тому
+        # lint_white_space не викликає заміну для кожної строчки
+        set_value('white_space_re', re_compile(
+            r'[^\S\n]*\n(?:[^\S\n]*\n)+[^\S\n]*'
+            r'|\n[^\S\n]*' + re_escape(self.tab_replacement[0])
+            + r'[^\S\n]*'
+        ))
 
-    def lint(self, template: Template):
-        """Метод який послідовно запускає методи форматування текста"""
-
-        self.lint_space_around_eq_in_attribute(template)
-        self.lint_hard_wrap(template)
-        self.lint_remove_new_line_before(template)
-        self.lint_insert_new_line_before(template)
-        self.lint_indents(template)
-        self.lint_wrap_attributies(template)
-        self.lint_new_line_before_first_attr(template)
-        self.lint_new_line_after_last_attr(template)
-        self.lint_space_in_empty_tag(template)
-        self.lint_space_after_tag_name(template)
-        self.lint_continuation_indend(template)
-        self.lint_align_attributes(template)
-        self.lint_wrap_text(template)
-        self.lint_keep_indents_on_empty_lines(template)
-        self.lint_smart_tab(template)
-        self.lint_use_tab_character(template)
+    def __setattr__(self, name: str, value):
+        raise AttributeError('Шаблон {} не можна змінити'.format(self.name))
 
-        for child in self.childs:
-            child.lint(template)
+    def __delattr__(self, name: str):
+        raise AttributeError('Шаблон {} не можна змінити'.format(self.name))
 
-    def lint_new_line_after_last_attr(self, template: Template):
-        """Метод добавляє перенос строки після останнього атрібута якщо 
-        тег не на одній строчці"""
+    def __reduce__(self):
+        return self.__class__, (self.to_dict(), self.fingerprint)
 
-        tag_string = self.get_tag_string()
-        if tag_string.__contains__('\n'):
-            if template.new_line_before_first_attr:
-                new_tag_string = sub(r'\s*(?=(\/\>|(?<!\/)\>))',
-                    r'\n', tag_string)
-            else:
-                new_tag_string = sub(r'\n *(?=(\/\>|(?<!\/)\>))', 
-                    r'', tag_string)
-            self.text = self.text.replace(tag_string, new_tag_string)
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompiledTemplate):
+            return NotImplemented
+        return self.fingerprint == other.fingerprint
 
-    def lint_new_line_before_first_attr(self, template: Template):
-        """Метод добавляє перенос строки перед першим атрібутом якщо 
-        тег не на одній строчці"""
+    def __hash__(self) -> int:
+        return hash(self.fingerprint)
 
-        tag_string = self.get_tag_string()
-        if tag_string.__contains__('\n'):
-            if template.new_line_before_first_attr:
-                new_tag_string = sub(r'(<\w+)(\s+)(\w+)',
-                    r'\g<1>\n\g<3>', tag_string)
-            else:
-                new_tag_string = sub(r'(<\w+)(\s+)(\w+)', 
-                    r'\g<1> \g<3>', tag_string)
-            self.text = self.text.replace(tag_string, new_tag_string)
+    def to_dict(self) -> dict:
+        """Метод вертає налаштування шаблону у вигляді словника
 
-    def lint_space_in_empty_tag(self, template: Template):
-        """Метод добавляє відступ після імені тегу у пустих тегах"""
-        if template.space_in_empty_tag:
-            self.text = sub(r' *(?=\/\>)', ' ', self.text)
-        else:
-            self.text = sub(r' *(?=\/\>)', '', self.text)
+        Списки тегів відсортовані, бо frozenset не зберігає порядок.
+        """
 
-    def lint_space_after_tag_name(self, template: Template):
-        """Метод добавляє відступ після імені тегу"""
-        if template.space_after_tag_name:
-            self.text = sub(r' *(?=(\/\>|(?<!\/)\>))', ' ', self.text)
-        else:
-            self.text = sub(r' *(?=(\/\>|(?<!\/)\>))', '', self.text)
+        data = {}
+        for name in Template().to_dict():
+            value = getattr(self, name)
+            if name in self.TAG_LISTS:
+                value = sorted(value)
+            data[name] = value
+        return data
 
-    def lint_space_around_eq_in_attribute(self, template: Template):
-        """Метод добавляє відступи біля знака '=' у атрібутах тегу"""
-        tag_string = self.get_tag_string()
-        if template.space_around_eq_in_attribute:
-            new_tag_string = sub(r'\s*\=\s*(\"|\')', r' = \g<1>', tag_string)
-        else:
-            new_tag_string = sub(r'\s*\=\s*(\"|\')', r'=\g<1>', tag_string)
-        self.text = self.text.replace(tag_string, new_tag_string)
 
-    def lint_wrap_text(self, template: Template):
-        """Метод який форматує текст в тегах"""
+class TextWrapper:
+    """Клас переносить текст тегу, який виходить за hard_wrap_column
 
-        if not template.wrap_text:
-            return
+    Текст переглядається зліва направо. Коли позиція виходить за ліміт,
+    останній пробіл замінюється переносом строки з відступами, якщо перед
+    пробілом не стоїть перенос строки. Якщо пробілу немає, перенос
+    вставляється на початок тексту. Після заміни перегляд продовжується
+    з місця заміни, що дає той самий текст, що і перегляд з початку.
 
-        tag_col = self.get_col()
-        tag_string = self.get_tag_string()
-        if tag_string.endswith('/>'):
-            return
-        source_text = self.get_text_string()
-        begin_col = tag_col + len(tag_string)
-        if template.align_text:
-            indents = begin_col - 1
-            for char in source_text:
-                if char == '\n':
-                    indents = 0
-                elif char == ' ':
-                    indents += 1
-                else:
-                    break
-        else:
-            indents = self.get_indent_col() + template.indent - 1
-        
-        text = source_text
-        text = sub(r'\n\s+', '\n' + ' ' * indents, text)
-        while True:
-            child = 0
-            col = begin_col
-            last_space = 0
-            for i, char in enumerate(text[:]):
-                if char == '\n':
-                    col = 0
-                elif char == ' ':
-                    last_space = i
-                    col += 1
-                elif char == '{':
-                    if text[i + 1] != '}':
-                        col += 1
-                        continue
-                    
-                    length, _ = self.childs[child].get_length_first_line()
-                    col = length + col - 1                
-                    child += 1
-                else:
-                    col += 1
+    Текст не змінюєтся під час перегляду: замінені пробіли запам'ятовуются
+    у _breaks, а перенесений текст збираєтся один раз, тому час переносу
+    лінійний від дліни тексту. Слова між пробілами переглядаются цілими.
 
-                if col > template.hard_wrap_column:
-
-                    check_new_line = False
-                    for c in reversed(text[:last_space]):
-                        if c == '\n':
-                            check_new_line = True
-                            break
-                        elif c != ' ':
-                            break
-
-                    if check_new_line:
-                        continue
-                    
-                    if last_space != 0:
-                        text = (
-                            text[:last_space] + '\n' +
-                            ' ' * indents + text[last_space + 1:]
-                        )
-                    else:
-                        text = '\n' + ' ' * indents + text
-                    break
-            
-            else:
-                break
-        
-        self.text = self.text.replace(source_text, text)
+    Переноси строк з відступами у тексті замінюются на перенос строки
+    з відступами indents, з не більше ніж blank_lines порожніми
+    строчками перед ним, а з join_lines перенос між словами тексту
+    замінюєтся пробілом, див. is_text_line_break.
 
-    def get_length_first_line(self) -> (int, bool):
-        """Метод вертає дліну першої строчки тега"""
+    Текст можна подавати частинами, а готовий початок забирати методом
+    release. Перед забраним текстом переноси вже не вставляются, тому
+    забирати текст варто коли is_final підтверджує, що перегляд
+    наступного тексту його не змінить.
 
-        length = 0
-        current_child = 0
-        for i, char in enumerate(self.text):
-            if char == '{' and self.text[i + 1] == '}':
-                (
-                    length_child, 
-                    is_end,
-                ) = self.childs[current_child].get_length_first_line()
-                length += length_child
-                if is_end:
-                    return length, True
-                else:
-                    current_child += 1
-                    length -= 1
-            elif char == '\n':
-                return length, True
-            else:
-                length += 1
-        else:
-            return length, False
+    Attributes
+    ----------
+    hard_wrap_column : int
+        Стовбчик після якого потрібно переносити текст
+    begin_col : int
+        Позиція першого символу тексту на лінії
+    indents : int
+        Відступи після вставленого переносу строки
+    blank_lines : int
+        Кількість порожніх строчок підряд, які лишаются у тексті
+    join_lines : bool
+        Замінювати переноси строк між словами тексту пробілом?
+    text : str
+        Перенесений текст, який ще не забрано
 
-    def get_text_string(self) -> str:
-        """Віддає текст тегу, без дочірніх тегів"""
+    Methods
+    -------
+    get_align_indents(text: str, begin_col: int) : int
+        Вертає відступи для Template.align_text
+    feed(text: str, lengths: List[int])
+        Додає текст та переносить його
+    is_final(end: int) : bool
+        Перевіряє чи перенос вже не змінить текст до позиції end
+    release(end: int) : str
+        Вертає і забирає перенесений текст до позиції end
+    finish() : str
+        Вертає і забирає весь перенесений текст
+    """
 
-        tag_string = self.get_tag_string()
-        end_tag = search(r'\s+\<\/' ,self.text)
-        if end_tag:
-            text_string = self.text[len(tag_string):end_tag.start()]
-        else:
-            text_string = self.text[len(tag_string):]
-        return text_string
-    
-    def lint_align_attributes(self, template: Template):
-        """Метод для вирівнювання атрібутів на наступних строчках"""
+    def __init__(self, hard_wrap_column: int, begin_col: int, indents: int,
+                 blank_lines: int = 0, join_lines: bool = False):
+        """Конструктор класу
 
-        if not template.align_attributes:
-            return
+        Parameters
+        ----------
+        hard_wrap_column : int
+            Стовбчик після якого потрібно переносити текст
+        begin_col : int
+            Позиція першого символу тексту на лінії
+        indents : int
+            Відступи після вставленого переносу строки
+        blank_lines : int
+            Кількість порожніх строчок підряд, які лишаются у тексті
+        join_lines : bool
+            Замінювати переноси строк між словами тексту пробілом?
+        """
 
-        tag_string = self.get_tag_string()
-        first_tag_space_match = search(
-            r'(\s+)(?=[\w-]+\=(\"|\')[^\"\']*(\"|\'))', 
-            tag_string,
-        )
+        self.hard_wrap_column: int = hard_wrap_column
+        self.begin_col: int = begin_col
+        self.indents: int = indents
+        self.blank_lines: int = blank_lines
+        self.join_lines: bool = join_lines
+        self._new_line: str = '\n' + ' ' * indents
+        # Текст який ще не забрано, без вставлених переносів, та дліни
+        # перших строчок дочірніх тегів для кожного SLOT у ньому
+        self._text: str = ''
+        self._lengths: List[int] = []
+        # Позиції пробілів у _text, замінених переносом строки, та чи
+        # вставлений перенос на початок тексту
+        self._breaks: Set[int] = set()
+        self._front: bool = False
+        # Перенесений текст, поки текст та переноси не змінились
+        self._wrapped: Optional[str] = None
+        # Чи був забраний текст, тоді на початок вже нічого не вставляєтся
+        self._released: bool = False
+        # Чи був у тексті перенос строки, тоді перенос на початок вже
+        # не скоротить строчку, яка виходить за ліміт
+        self._line_broken: bool = False
+        # Стан перегляду: позиція у _text, стовбчик, номер SLOT
+        # та останній символ який не є пробілом
+        self._position: int = 0
+        self._col: int = begin_col
+        self._child: int = 0
+        self._last_char: str = ''
+        # Пробіли: (позиція, стан перед пробілом, чи стоїть перед ним
+        # перенос строки). Відступи після вставленого переносу
+        # позначаются одним пробілом з позицією переносу.
+        self._spaces: List[Tuple[int, int, int, str, bool]] = []
+
+    @property
+    def text(self) -> str:
+        """Перенесений текст, який ще не забрано"""
+
+        if self._wrapped is None:
+            text = self._text
+            parts = [self._new_line] if self._front else []
+            start = 0
+            for position in sorted(self._breaks):
+                parts.append(text[start:position])
+                parts.append(self._new_line)
+                start = position + 1
+            parts.append(text[start:])
+            self._wrapped = ''.join(parts)
+        return self._wrapped
 
-        if not first_tag_space_match:
-            return
+    @staticmethod
+    def get_align_indents(text: str, begin_col: int) -> int:
+        """Вертає відступи для Template.align_text
 
-        if first_tag_space_match.group(1).__contains__('\n'):
-            indents = len(first_tag_space_match.group(1)) - 1
-        else:
-            indents = self.get_col() + first_tag_space_match.end(1) - 1
-        
-        new_tag_string = sub(
-            r'(?<=\n)(\s+)([\w-]+\=(\"|\')[^\"\']*(\"|\'))',
-            r'{}\g<2>'.format(' ' * indents),
-            tag_string,
-        )
+        Відступи дорівнюють позиції першого символу тексту, який
+        не є пробілом або переносом строки.
 
-        self.text = self.text.replace(tag_string, new_tag_string)
-        
-    def lint_wrap_attributies(self, template: Template):
-        """Метод форматування для Template.wrap_attributes"""
-        if template.wrap_attributes == template.NONE:
-            return
+        Parameters
+        ----------
+        text : str
+            Текст тегу
+        begin_col : int
+            Позиція першого символу тексту на лінії
+        """
+
+        indents = begin_col - 1
+        for char in text:
+            if char == '\n':
+                indents = 0
+            elif char == ' ':
+                indents += 1
+            else:
+                break
+        return indents
 
-        elif template.wrap_attributes == template.WRAP_IF_LONG:
-            self.lint_wrap_attributies_if_long(template)
+    def feed(self, text: str, lengths: List[int] = ()):
+        """Додає текст та переносить його
 
-        elif template.wrap_attributes == template.CHOP_DOWN_IF_LONG:
-            self.lint_chop_down_attributies_if_long(template)
+        Parameters
+        ----------
+        text : str
+            Текст, місця дочірніх тегів позначені SLOT. Частини тексту
+            не можуть розривати перенос строки з відступами
+        lengths : List[int]
+            Дліни перших строчок дочірніх тегів для кожного SLOT у text
+        """
 
-        elif template.wrap_attributes == template.WRAP_ALWAYS:
-            self.lint_chop_down_attributies_always(template)
+        self._text += LINE_BREAK_RE.sub(self._replace_line_break, text)
+        self._lengths.extend(lengths)
+        self._wrapped = None
+        self._wrap()
+
+    def _replace_line_break(self, match: Match) -> str:
+        """Метод замінює перенос строки з відступами у тексті"""
+
+        if self.join_lines and is_text_line_break(match.string,
+                                                  match.start(),
+                                                  match.end()):
+            return ' '
+        space = match.group()
+        first = space.find('\n')
+        if first == len(space) - 1:
+            # Перенос без відступів після нього лишаєтся
+            return space
+        count = min(space.count('\n'), self.blank_lines + 1)
+        return space[:first] + '\n' * (count - 1) + self._new_line
+
+    def is_final(self, end: int) -> bool:
+        """Перевіряє чи перенос вже не змінить текст до позиції end
+
+        Перенос вставляється тільки на місці останнього пробілу, а пробіл
+        після переносу строки ніколи не замінюєтся і закриває пробіли
+        перед ним. Без пробілів перенос вставляєтся на початок тексту.
 
-    def lint_wrap_attributies_if_long(self, template: Template):
-        """Переносить атрібут тега якщо він залазить за ліміт"""
+        Parameters
+        ----------
+        end : int
+            Позиція у перенесеному тексті який ще не забрано
 
-        tag_col = self.get_col()
-        tag_string = self.get_tag_string()
-        new_tag_string = tag_string
-        last_space_index = -1
-        lock_quote = False
-        lock_double_qoute = False
-        while True:
-            col = tag_col
-            for index, char in enumerate(new_tag_string[:]):
-                if char == '\n':
-                    col = 0
-                    continue
+        Returns
+        -------
+        is_final : bool
+            True якщо текст до позиції end вже не зміниться
+        """
 
-                if char == ' ':
-                    if not lock_quote and not lock_double_qoute:
-                        last_space_index = index
-                elif char == '"':
-                    lock_double_qoute = not lock_double_qoute
-                elif char == "'":
-                    lock_quote = not lock_quote
-                
-                col += 1
-
-                if col > template.hard_wrap_column:
-                    if last_space_index != -1:
-                        new_tag_string = (new_tag_string[:last_space_index] +
-                                '\n' + new_tag_string[last_space_index + 1:])
-                        break
-            else:
-                break
+        end = self._get_text_position(end)
+        if end > self._position:
+            return False
+        for position, _, _, _, is_new_line in reversed(self._spaces):
+            if is_new_line:
+                return True
+            if position < end:
+                return False
+        return self._released
 
-        self.text = self.text.replace(tag_string, new_tag_string)
+    def release(self, end: int) -> str:
+        """Вертає і забирає перенесений текст до позиції end
 
-    def lint_chop_down_attributies_if_long(self, template: Template):
-        """Якщо дліна тегу завелика то переносить теги послідовно на 
-        наступні строчки"""
+        Parameters
+        ----------
+        end : int
+            Позиція у перенесеному тексті який ще не забрано
 
-        col = self.get_col()
-        tag_string = self.get_tag_string()
-        if col + len(tag_string) > template.hard_wrap_column:
-            self.lint_chop_down_attributies_always(template)
+        Returns
+        -------
+        text : str
+            Перенесений текст до позиції end
+        """
 
-    def lint_chop_down_attributies_always(self, template: Template):
-        """Переносить всі атрибути послідовно на наступні строчки"""
+        wrapped = self.text
+        text = wrapped[:end]
+        if not end:
+            return text
+
+        position = self._get_text_position(end)
+        slots = self._text.count(SLOT, 0, position)
+        self._text = self._text[position:]
+        del self._lengths[:slots]
+        self._breaks = {
+            break_position - position for break_position in self._breaks
+            if break_position >= position
+        }
+        self._front = False
+        self._wrapped = wrapped[end:]
+        self._position -= position
+        self._child -= slots
+        self._spaces = [
+            (space - position, col, child - slots, last_char, is_new_line)
+            for space, col, child, last_char, is_new_line in self._spaces
+            if space >= position
+        ]
+        self._released = True
+        return text
 
-        tag_string = self.get_tag_string()
-        saved_match = search(r'<\w+\s+', tag_string)
-        if not saved_match:
-            return
+    def finish(self) -> str:
+        """Вертає і забирає весь перенесений текст"""
+
+        return self.release(len(self.text))
+
+    def _get_text_position(self, end: int) -> int:
+        """Метод переводить позицію у перенесеному тексті у позицію _text
+
+        Позиція не може бути всередині вставленого переносу строки.
+        """
 
-        saved_tag_string = tag_string[:saved_match.end()]
-        attributies_string = tag_string[saved_match.end():]
+        if self._front:
+            end -= len(self._new_line)
+        extra = len(self._new_line) - 1
+        for position in sorted(self._breaks):
+            if end <= position:
+                break
+            end -= extra
+        return end
+
+    def _wrap(self):
+        """Переглядає текст з позиції _position до кінця"""
+
+        text = self._text
+        length = len(text)
+        limit = self.hard_wrap_column
+        indents = self.indents
+        lengths = self._lengths
+        breaks = self._breaks
+        search = WRAP_STOP_RE.search
+        position = self._position
+        col = self._col
+        child = self._child
+        last_char = self._last_char
+        spaces = self._spaces
+        while position < length:
+            match = search(text, position)
+            stop = match.start() if match else length
+            if stop > position:
+                # Слово без пробілів: стан пробілів у ньому не змінюєтся,
+                # тому досить однієї перевірки в кінці слова
+                col += stop - position
+                last_char = text[stop - 1]
+                position = stop
+            else:
+                char = text[position]
+                if char == '\n':
+                    col = 0
+                    last_char = char
+                    self._line_broken = True
+                elif position in breaks:
+                    # Пробіл вже замінений переносом, перегляд повторюєтся
+                    # після переносу на початок або на раніший пробіл
+                    col = indents
+                    last_char = '\n'
+                    if indents:
+                        spaces.append((position, 0, child, '\n', True))
+                elif char == ' ':
+                    spaces.append((position, col, child, last_char,
+                                   last_char == '\n'))
+                    col += 1
+                else:
+                    col += lengths[child]
+                    child += 1
+                    last_char = char
+                position += 1
+
+            if col <= limit:
+                continue
+
+            if spaces:
+                space = spaces[-1]
+                # Пробіл на самому початку тексту вважається відсутнім
+                if space[0] == 0 and not self._released and not self._front:
+                    space = None
+            else:
+                space = None
 
-        attributies_string = sub(r'(\s+)([\w-]+\=(\"|\')[^\"\']*(\"|\'))',
-                                 r'\n\g<2>', attributies_string)
+            if space is not None:
+                if space[4]:
+                    continue
+                position, col, child, last_char, _ = spaces.pop()
+                breaks.add(position)
+                col = indents
+                last_char = '\n'
+                if indents:
+                    spaces.append((position, 0, child, '\n', True))
+                position += 1
+            elif (not self._released and not self._front
+                    and not self._line_broken):
+                # Повторний перенос на початок нічого б не змінив
+                self._front = True
+                position = 0
+                col = indents
+                child = 0
+                last_char = '\n'
+                spaces.clear()
+                if indents:
+                    spaces.append((-1, 0, 0, '\n', True))
+
+        self._position = position
+        self._col = col
+        self._child = child
+        self._last_char = last_char
+
+
+class BalancedTextWrapper(TextWrapper):
+    """Клас переносить текст тегу з найменшою нерівністю строчок
+
+    На відміну від TextWrapper, який переносить слово тільки коли воно
+    не вміщуєтся, переноси обираются для всього тексту одразу так, щоб
+    сума квадратів вільного місця в кінці строчок, крім останньої у
+    кожному абзаці, була найменшою (як у Knuth-Plass). Абзацами є
+    частини тексту між переносами строк у тексті.
+
+    Переноси вставляются тільки на місці пробілів після слова, а слово
+    довше за ліміт лишаєтся на окремій строчці. Шукаются тільки
+    переноси, після яких строчка вміщуєтся, тому час лінійний від
+    дліни тексту при обмеженій кількості слів у строчці.
+
+    Текст можна забрати тільки методом finish, тому потоком такий
+    перенос не використовуєтся.
+    """
 
-        new_tag_string = saved_tag_string + attributies_string
+    # Штраф за кожен символ строчки, яка не вміщуєтся
+    OVERFLOW_COST: int = 1 << 40
 
-        self.text = self.text.replace(tag_string, new_tag_string)
+    def _wrap(self):
+        """Переноси обираются тільки у finish"""
 
+    def is_final(self, end: int) -> bool:
+        return False
 
-    def get_max_col_in_text_tag(self) -> int:
-        """Метод визначає максимальну дліну текста тега"""
+    def finish(self) -> str:
+        """Обирає переноси, вертає і забирає весь перенесений текст"""
 
-        text = self.get_text()
-        max_col = 0
-        col = self.get_col()
-        for char in text:
-            if col > max_col:
-                max_col = col
+        text = self._text
+        lengths = self._lengths
+        child = 0
+        col = self.begin_col
+        # Ширина абзацу до поточної позиції та пробіли після слова:
+        # (позиція, ширина до пробілу)
+        width = 0
+        spaces: List[Tuple[int, int]] = []
+        has_word = False
+        is_first = True
+        start = 0
+        for match in WRAP_STOP_RE.finditer(text):
+            position = match.start()
+            if position > start:
+                width += position - start
+                has_word = True
+            char = text[position]
             if char == '\n':
+                self._break_paragraph(col, spaces, width,
+                                      is_first and has_word)
                 col = 0
+                width = 0
+                spaces = []
+                has_word = False
+                is_first = False
+            elif char == ' ':
+                if has_word:
+                    spaces.append((position, width))
+                width += 1
             else:
-                col += 1
-        return max_col
+                width += lengths[child]
+                child += 1
+                has_word = True
+            start = position + 1
+        if len(text) > start:
+            width += len(text) - start
+            has_word = True
+        self._break_paragraph(col, spaces, width, is_first and has_word)
+
+        self._position = len(text)
+        self._wrapped = None
+        return super().finish()
+
+    def _break_paragraph(self, col: int, spaces: List[Tuple[int, int]],
+                         width: int, is_first: bool):
+        """Метод обирає переноси абзацу
 
-    def lint_hard_wrap(self, template: Template):
-        """Метод переносить тег на строку, якщо дліна тексту тега завелика"""
+        Parameters
+        ----------
+        col : int
+            Стовбчик перед першим символом абзацу
+        spaces : List[Tuple[int, int]]
+            Пробіли після слова: позиція та ширина абзацу до пробілу
+        width : int
+            Ширина абзацу
+        is_first : bool
+            Абзац зі словами на початку тексту, перед ним можна вставити
+            перенос? Порожній перший абзац означає, що текст вже
+            починаєтся з переносу строки
+        """
 
-        if self.name in template.inline_elements:
-            return
+        limit = self.hard_wrap_column
+        indents = self.indents
+        first_width = spaces[0][1] if spaces else width
+        if is_first and col + first_width > limit and indents < col:
+            # Перше слово не вміщуєтся, як і у TextWrapper
+            self._front = True
+            col = indents
+
+        # Вузли: початок абзацу, пробіли та кінець абзацу
+        ends = [0] + [space_width for _, space_width in spaces] + [width]
+        starts = [0] + [space_width + 1 for _, space_width in spaces]
+        last = len(ends) - 1
+        costs = [0] + [0] * last
+        previous = [0] * (last + 1)
+        for node in range(1, last + 1):
+            best = None
+            index = node - 1
+            while index >= 0:
+                line_col = ((col if index == 0 else indents)
+                            + ends[node] - starts[index])
+                if line_col > limit and index < node - 1:
+                    if index == 0:
+                        break
+                    # Раніші пробіли дають ще довшу строчку, крім
+                    # початку абзацу з іншим стовбчиком
+                    index = 0
+                    continue
+                if line_col > limit:
+                    cost = self.OVERFLOW_COST * (line_col - limit)
+                elif node == last:
+                    cost = 0
+                else:
+                    cost = (limit - line_col) ** 2
+                cost += costs[index]
+                if best is None or cost < best:
+                    best = cost
+                    previous[node] = index
+                index -= 1
+            costs[node] = best
 
-        if self.get_max_col_in_text_tag() <= template.hard_wrap_column:
-            return
+        node = previous[last]
+        while node:
+            self._breaks.add(spaces[node - 1][0])
+            node = previous[node]
 
-        if not self.get_space_before_tag().__contains__('\n'):
-            if self.name in template.dont_break_if_inline_content:
-                return
 
-        self.replace_space_before_tag('\n')
-        self.text = sub(r'\s*(?=<\/)', '\n', self.text)
+# Лапки значень атрібутів для Template.generate_quote_marks
+QUOTE_MARKS: Dict[int, str] = {Template.SINGLE: "'", Template.DOUBLE: '"'}
 
-    def lint_remove_new_line_before(self, template: Template):
-        """Метод видаляє перенос на нову строку якщо тег є 
-        у списку тегів які не треба переносити на нову строку"""
 
-        if self.name in template.remove_new_line_before:
-            self.replace_space_before_tag('')
+class Attribute:
+    """Клас атрібута початкового тегу
 
-    def lint_insert_new_line_before(self, template: Template):
-        """Метод який переносить на нову строку тег якщо він є 
-        у списку тегів які треба переносити на нову строку"""
+    Текст між атрібутами, який не є атрібутом, наприклад вираз
+    шаблонізатора, зберігаєтся як атрібут без імені з усім текстом
+    у value.
+
+    Attributes
+    ----------
+    space : str
+        Відступи перед атрібутом
+    name : str
+        Ім'я атрібута, пусте якщо текст не є атрібутом
+    eq : str
+        Знак '=' з відступами навколо, пустий у атрібута без значення
+    value : str
+        Значення атрібута без лапок
+    quote : str
+        Лапки навколо значення, пусті якщо значення без лапок
+    start, end : int
+        Межі атрібута без відступів перед ним у тексті тегу
+
+    Methods
+    -------
+    get_text() : str
+        Метод вертає текст атрібута
+    """
+
+    __slots__ = ('space', 'name', 'eq', 'value', 'quote', 'start', 'end')
+
+    def __init__(self, space: str, name: str, eq: str = '',
+                 value: str = '', quote: str = ''):
+        self.space: str = space
+        self.name: str = name
+        self.eq: str = eq
+        self.value: str = value
+        self.quote: str = quote
+        self.start: int = 0
+        self.end: int = 0
+
+    def get_text(self) -> str:
+        """Метод вертає текст атрібута"""
+
+        return self.name + self.eq + self.quote + self.value + self.quote
+
+
+class StartTag:
+    """Клас початкового тегу, розібраного на ім'я, атрібути та кінець
+
+    Тег розбираєтся один раз, а атрібути розкладаются по строчках
+    одним проходом для всіх Template.wrap_attributes разом з
+    вирівнюванням, відступами продовження, відступами біля '=',
+    лапками та відступами перед кінцем тегу. Після layout модель
+    відповідає новому тексту тегу, тому тег не розбираєтся знову.
+
+    Attributes
+    ----------
+    head : str
+        '<' та ім'я тегу
+    attributes : List[Attribute]
+        Атрібути тегу по порядку
+    tail : str
+        Відступи перед кінцем тегу
+    end : str
+        Кінець тегу: '>' або '/>'
+    text : str
+        Текст тегу, якому відповідає модель
+
+    Methods
+    -------
+    parse(tag_string: str) : StartTag
+        Метод розбирає текст початкового тегу
+    layout(template: CompiledTemplate, col: int, indent_col: int) : str
+        Метод вертає текст тегу з атрібутами, розкладеними по строчках
+    """
+
+    __slots__ = ('head', 'attributes', 'tail', 'end', 'text')
+
+    def __init__(self, head: str, attributes: List[Attribute], tail: str,
+                 end: str, text: str):
+        self.head: str = head
+        self.attributes: List[Attribute] = attributes
+        self.tail: str = tail
+        self.end: str = end
+        self.text: str = text
+
+    @staticmethod
+    def parse(tag_string: str) -> 'StartTag':
+        """Метод розбирає текст початкового тегу
+
+        Текст розбираєтся без втрат: layout з шаблоном, який нічого
+        не змінює, вертає той самий текст.
+        """
+
+        head = START_TAG_NAME_RE.match(tag_string).group()
+        if tag_string.endswith('/>') and len(tag_string) > len(head) + 1:
+            end = '/>'
+        elif tag_string.endswith('>') and len(tag_string) > len(head):
+            end = '>'
+        else:
+            end = ''
+        body = tag_string[len(head):len(tag_string) - len(end)]
+        stripped = body.rstrip()
+
+        attributes: List[Attribute] = []
+        match = ATTRIBUTE_RE.match
+        position = 0
+        length = len(stripped)
+        # Позиція body у тексті тегу
+        offset = len(head)
+        while position < length:
+            found = match(stripped, position)
+            space, name, eq = found.group(1, 2, 3)
+            position = found.end()
+            if name is None:
+                attribute = Attribute(space, '', '', found.group(7))
+            elif eq is None:
+                attribute = Attribute(space, name)
+            else:
+                double, single, bare = found.group(4, 5, 6)
+                if double is not None:
+                    attribute = Attribute(space, name, eq, double, '"')
+                elif single is not None:
+                    attribute = Attribute(space, name, eq, single, "'")
+                else:
+                    attribute = Attribute(space, name, eq, bare)
+            attribute.start = offset + found.end(1)
+            attribute.end = offset + position
+            attributes.append(attribute)
+        return StartTag(head, attributes, body[len(stripped):], end,
+                        tag_string)
+
+    def layout(self, template: CompiledTemplate, col: int,
+               indent_col: int) -> str:
+        """Метод вертає текст тегу з атрібутами, розкладеними по строчках
+
+        Атрібут переноситься на нову строчку тільки на місці відступів
+        перед ним. Строчка вміщуєтся, якщо позиція її початку разом з
+        дліною не більша за hard_wrap_column, як і у lint_hard_wrap.
+        Строчки після першої рахуются з відступами, які вони отримають:
+        вирівнюванням під перший атрібут або відступом продовження.
+        Переноси, які вже є у тексті тегу, зберігаются.
+
+        Тим самим проходом значення отримують лапки
+        Template.generate_quote_marks, якщо у значенні немає таких лапок,
+        а відступи перед кінцем тегу - space_in_empty_tag для '/>' та
+        space_after_tag_name для '>'. Модель змінюєтся разом з текстом.
+
+        Parameters
+        ----------
+        template : CompiledTemplate
+            Шаблон форматування
+        col : int
+            Позиція тега на лінії
+        indent_col : int
+            Відступи на лінії тега
+
+        Returns
+        -------
+        tag_string : str
+            Новий текст початкового тегу
+        """
+
+        attributes = self.attributes
+        end = self.end
+        eq = ' = ' if template.space_around_eq_in_attribute else '='
+        quote = QUOTE_MARKS.get(template.generate_quote_marks)
+        # Значення без лапок перед '/>' закінчуєтся на '/', як у
+        # HTMLParser, тому лапки чи відступ змінили б значення
+        bare_last = None
+        if attributes and end == '/>' and not self.tail:
+            last = attributes[-1]
+            if last.eq and not last.quote:
+                bare_last = last
+        for attribute in attributes:
+            if not attribute.eq:
+                continue
+            attribute.eq = eq
+            if (quote is not None and attribute.quote != quote
+                    and not attribute.value.__contains__(quote)
+                    and attribute is not bare_last):
+                attribute.quote = quote
+        texts = [attribute.get_text() for attribute in attributes]
+        # Атрібути, перед якими перенос строчки
+        breaks = [attribute.space.__contains__('\n')
+                  for attribute in attributes]
+        tail = self.tail
+        if end == '/>' and bare_last is None:
+            tail = ' ' if template.space_in_empty_tag else ''
+        elif end == '>':
+            tail = ' ' if template.space_after_tag_name else ''
+        is_multiline = (any(breaks) or self.tail.__contains__('\n')
+                        or any(text.__contains__('\n') for text in texts))
+
+        wrap_attributes = template.wrap_attributes
+        limit = template.hard_wrap_column
+        first_on_new_line = (template.new_line_before_first_attr
+                             and bool(attributes)
+                             and bool(attributes[0].space))
+        continuation = ' ' * (indent_col - 1 + template.continuation_indend)
+        if template.align_attributes and not first_on_new_line:
+            aligned = ' ' * (col + len(self.head))
+        else:
+            aligned = continuation
+
+        if wrap_attributes != template.DO_NOT_WRAP and attributes:
+            # Дліна тегу на одній строчці
+            length = len(self.head) + len(tail) + len(end)
+            for attribute, text in zip(attributes, texts):
+                space = attribute.space
+                length += (1 if space.__contains__('\n') else len(space))
+                length += len(text)
+            is_long = col + length > limit
+
+            if wrap_attributes == template.WRAP_IF_LONG:
+                if is_long or is_multiline:
+                    if template.new_line_after_last_attr:
+                        end_length = 0
+                    else:
+                        end_length = len(tail) + len(end)
+                    self._wrap(breaks, texts, col, limit, aligned,
+                               continuation, first_on_new_line, end_length)
+            elif wrap_attributes == template.WRAP_ALWAYS or is_long:
+                for index in range(1, len(attributes)):
+                    attribute = attributes[index]
+                    if attribute.name and attribute.space:
+                        breaks[index] = True
+            is_multiline = is_multiline or any(breaks)
+
+        if not is_multiline:
+            spaces = [attribute.space for attribute in attributes]
+            return self._serialize(spaces, texts, tail)
+
+        if attributes:
+            breaks[0] = first_on_new_line
+        spaces = []
+        for index, attribute in enumerate(attributes):
+            if breaks[index]:
+                if attribute.name:
+                    spaces.append('\n' + aligned)
+                else:
+                    spaces.append('\n' + continuation)
+            elif index == 0 and attribute.space:
+                spaces.append(' ')
+            else:
+                spaces.append(attribute.space)
+            if texts[index].__contains__('\n'):
+                # Переноси можуть бути тільки у значенні
+                attribute.value = INDENT_RE.sub(continuation, attribute.value)
+                texts[index] = attribute.get_text()
+        if template.new_line_after_last_attr:
+            tail = '\n' + continuation
+        return self._serialize(spaces, texts, tail)
+
+    def _serialize(self, spaces: List[str], texts: List[str],
+                   tail: str) -> str:
+        """Метод збирає текст тегу та оновлює модель
+
+        Parameters
+        ----------
+        spaces : List[str]
+            Нові відступи перед атрібутами
+        texts : List[str]
+            Тексти атрібутів
+        tail : str
+            Нові відступи перед кінцем тегу
+
+        Returns
+        -------
+        tag_string : str
+            Новий текст початкового тегу
+        """
+
+        parts = [self.head]
+        position = len(self.head)
+        for attribute, space, text in zip(self.attributes, spaces, texts):
+            attribute.space = space
+            position += len(space)
+            attribute.start = position
+            position += len(text)
+            attribute.end = position
+            parts.append(space)
+            parts.append(text)
+        self.tail = tail
+        parts.append(tail)
+        parts.append(self.end)
+        self.text = ''.join(parts)
+        return self.text
+
+    def _wrap(self, breaks: List[bool], texts: List[str], col: int,
+              limit: int, aligned: str, continuation: str,
+              first_on_new_line: bool, end_length: int):
+        """Метод додає у breaks переноси перед атрібутами, які не
+        вміщуются у строчку, для WRAP_IF_LONG
+
+        Parameters
+        ----------
+        breaks : List[bool]
+            Атрібути, перед якими перенос строчки
+        texts : List[str]
+            Тексти атрібутів
+        col : int
+            Позиція тега на лінії
+        limit : int
+            Стовбчик, після якого потрібно переносити
+        aligned : str
+            Відступи перенесеного атрібута
+        continuation : str
+            Відступи перенесеного тексту, який не є атрібутом
+        first_on_new_line : bool
+            Перший атрібут на новій строчці?
+        end_length : int
+            Дліна кінця тегу з відступами перед ним
+        """
+
+        attributes = self.attributes
+        last = len(attributes) - 1
+        # Позиція після останнього символу строчки
+        line_end = col + len(self.head)
+        for index, attribute in enumerate(attributes):
+            text = texts[index]
+            width = len(text)
+            if index == last:
+                width += end_length
+            if attribute.name:
+                indent = len(aligned)
+            else:
+                indent = len(continuation)
+
+            if index == 0:
+                if first_on_new_line:
+                    breaks[0] = True
+                    line_end = indent + 1 + width
+                elif attribute.space:
+                    line_end += 1 + width
+                else:
+                    line_end += width
+            elif breaks[index]:
+                line_end = indent + 1 + width
+            else:
+                space = len(attribute.space)
+                if space and line_end + space + width > limit:
+                    breaks[index] = True
+                    line_end = indent + 1 + width
+                else:
+                    line_end += space + width
+
+            if text.__contains__('\n'):
+                # Строчки значення отримують відступ продовження
+                last_line = text[text.rfind('\n') + 1:].lstrip()
+                line_end = len(continuation) + 1 + len(last_line)
+                if index == last:
+                    line_end += end_length
+
+
+class SourceText:
+    """Прочитаний текст, який додаєтся шматками під час розбору
+
+    Шматки склеюются тільки коли потрібен текст, тому кожен новий
+    шматок не копіює вже прочитаний текст, а теги, які посилаются
+    на SourceText, завжди бачать весь прочитаний текст.
+
+    Methods
+    -------
+    append(data: str)
+        Додає шматок тексту
+    get_text() : str
+        Вертає весь прочитаний текст
+    """
+
+    __slots__ = ('_parts',)
+
+    def __init__(self):
+        self._parts: List[str] = []
+
+    def append(self, data: str):
+        """Додає шматок тексту"""
+
+        self._parts.append(data)
+
+    def get_text(self) -> str:
+        """Вертає весь прочитаний текст, склеюючи шматки один раз"""
+
+        parts = self._parts
+        if len(parts) > 1:
+            parts[:] = [''.join(parts)]
+        return parts[0] if parts else ''
+
+
+class Tag:
+    """Класс який описує тег
+    
+    Attributes
+    ----------
+    name : str
+        Ім'я тегу
+    text : str
+        Текст тегу, місця дочірніх тегів позначені SLOT
+    childs : List[Tag]
+        Список дочірніх тегів
+    parent : Optional[Tag]
+        Батько тегу
+    _index : int
+        Позиція тегу у списку дочірніх тегів батька
+    _pieces : List[str]
+        Шматки тексту тегу між дочірніми тегами. У тегах прочитаних
+        Html створюются з _source при першому зверненні
+    _source : Optional[SourceText]
+        Текст, з якого прочитаний тег, поки шматки тексту тегу не
+        створені, інакше None
+    _start : int
+        Початок тегу у _source
+    _end : int
+        Кінець тегу у _source, після кінцевого тегу
+    _metrics : Optional[Metrics]
+        Кеш метрик тексту тегу з дочірніми элементами
+    _prefix : List[Metrics]
+        Кеш метрик тексту до кожного з дочірніх тегів
+    _tag_string : Optional[str]
+        Кеш get_tag_string, скидається при зміні тексту тегу
+    _start_tag : Optional[StartTag]
+        Кеш get_start_tag, дійсний поки його текст збігаєтся з
+        get_tag_string
+    _text_string : Optional[str]
+        Кеш get_text_string, скидається разом з _metrics
+    _space_before_tag : Optional[str]
+        Кеш get_space_before_tag, скидається при зміні шматка батька
+        перед тегом
+    _col : Optional[int]
+        Кеш get_col, скидається _invalidate_layout
+    _indent_col : Optional[int]
+        Кеш get_indent_col, скидається _invalidate_layout
+    _max_col : Optional[int]
+        Кеш get_max_col_in_text_tag, скидається разом з _metrics
+        та _col
+
+    Methods
+    -------
+    get_pos() : (int, int)
+        Метод який визначає лінію та стовбчик де починається тег
+    append_child(child: Tag)
+        Метод додає дочірній тег та місце для нього у текст
+    append_text(text: str)
+        Метод додає текст у кінець тегу
+    _build_child(child: Tag)
+        Метод додає дочірній тег під час розбору, без скидання кешів
+    _build_text(text: str)
+        Метод додає текст у кінець тегу під час розбору, без скидання
+        кешів
+    get_metrics() : Metrics
+        Метод вертає метрики тексту тегу з дочірніми элементами
+    _invalidate_layout(index: int)
+        Метод скидає кеш позицій тегів після шматка index
+    _check_cache(name: str, cached, fresh)
+        Метод перевіряє кешоване значення, коли VERIFY_CACHE
+    _get_metrics_before(target: Tag) : Metrics
+        Метод вертає метрики тексту тегу до дочірнього тега
+    get_root_tag() : Tag
+        Метод вертає корневий тег дерева тегів
+    find_tags_in_lines(ranges: List[LineRange]) : List[Tag]
+        Метод шукає теги, текст тега яких перетинає строчки ranges
+    lint(template: CompiledTemplate)
+        Метод який форматує тег та дочірні теги правилами LINT_RULES
+    get_text() : str
+        Вертає текст тегу з дочірніми элементами
+    iter_text() : Iterator[str]
+        Вертає шматки тексту тегу з дочірніми элементами по порядку
+    is_text_equal(text: str) : bool
+        Порівнює текст тегу з дочірніми элементами з текстом
+    lint_white_space(template: CompiledTemplate, facts: TagFacts)
+        Метод нормалізує переноси строк, відступи та порожні строчки
+    lint_indents(template: CompiledTemplate, facts: TagFacts)
+        Method який робить відступи від батька
+    replace_space_before_tag(space: str)
+        Метод який заставляє батька замінити пространство перед тегом
+    _replace_space_before_tag(target: Tag, new_space: str)
+        Метод який замінює відступи перед тегом
+    get_space_before_tag() : str
+        Метод який вертає відступи перед тегом
+    _get_space_before_tag(target: Tag) : str
+        Метод який вертає відступи перед пошуковим тегом
+    get_lines_count() : int
+        Метод який віддає кількість строчок цього тега
+    lint_insert_new_line_before(template: CompiledTemplate, facts: TagFacts)
+        Метод який переносить на нову строку тег якщо він є 
+        у списку тегів які треба переносити на нову строку
+    lint_remove_new_line_before(template: CompiledTemplate, facts: TagFacts)
+        Метод видаляє перенос на нову строку якщо тег є 
+        у списку тегів які не треба переносити на нову строку
+    get_indent_col() : int
+        Метод визначає відступи на лінії
+    get_max_col_in_text_tag() : int
+        Метод визначає максимальну дліну текста тега
+    lint_hard_wrap(template: CompiledTemplate, facts: TagFacts)
+        Метод переносить тег на строку, якщо длліна тексту тега завелика
+    lint_layout_attributes(template: CompiledTemplate, facts: TagFacts)
+        Метод розкладає атрібути тегу по строчках, див. StartTag.layout
+    get_start_tag() : StartTag
+        Метод вертає початковий тег, розібраний на атрібути
+    get_text_string() : str
+        Віддає текст тегу, без дочірніх тегів
+    get_length_first_line() : (int, bool)
+        Метод вертає дліну першої строчки тега
+    lint_wrap_text(template: CompiledTemplate, facts: TagFacts)
+        Метод який форматує текст в тегах
+    create_text_wrapper(template: CompiledTemplate, facts: TagFacts,
+                        source_text: str) : TextWrapper
+        Метод створює TextWrapper для тексту тегу
+    keeps_white_space(template: CompiledTemplate) : bool
+        Метод перевіряє чи тег або його батьки є у keep_white_space_inside
+    lint_space_after_tag_name(template: CompiledTemplate, facts: TagFacts)
+        Метод добавляє відступ після імені тегу
+    lint_space_in_empty_tag(template: CompiledTemplate, facts: TagFacts)
+        Метод добавляє відступ після імені тегу у пустих тегах
+    """
 
-        if self.name in template.insert_new_line_before:
+    # Великі документи мають сотні тисяч тегів, тому теги без __dict__.
+    # Підкласи, які додають атрібути, теж мають оголошувати __slots__.
+    __slots__ = ('name', '_pieces', 'childs', 'parent', '_index',
+                 '_metrics', '_prefix', '_tag_string', '_text_string',
+                 '_space_before_tag', '_col', '_indent_col', '_max_col',
+                 '_source', '_start', '_end', '_start_tag')
+
+    def __init__(self, name: str, text: Optional[str],
+                 parent: Optional['Tag']):
+        """Конструктор класу
+        
+        Parameters
+        ----------
+        name : str
+            Ім'я тегу
+        text : Optional[str]
+            Текст тегу, або None якщо текст береться з _source
+        parent : Optional[Tag]
+            Батько тегу
+        """
+
+        # Імена тегів повторюются, тому всі теги з одним ім'ям
+        # посилаются на один рядок
+        self.name: str = intern(name)
+        self._source: Optional[SourceText] = None
+        self._start: int = 0
+        self._end: int = 0
+        if text is not None:
+            self._pieces: List[str] = [text]
+        self.childs: List[Tag] = []
+        self.parent: Optional[Tag] = parent
+        self._index: int = 0
+        self._metrics: Optional[Metrics] = None
+        self._prefix: List[Metrics] = []
+        self._tag_string: Optional[str] = None
+        self._start_tag: Optional[StartTag] = None
+        self._text_string: Optional[str] = None
+        self._space_before_tag: Optional[str] = None
+        self._col: Optional[int] = None
+        self._indent_col: Optional[int] = None
+        self._max_col: Optional[int] = None
+
+    def __getattr__(self, name: str):
+        """Створює шматки тексту тегу з _source при першому зверненні
+
+        Викликається тільки для незаданих атрібутів, тому наступні
+        звернення до _pieces не сповільнюются. Шматок між дочірніми
+        тегами - текст від кінця одного до початку наступного.
+        """
+
+        if name != '_pieces' or self._source is None:
+            raise AttributeError(name)
+
+        bounds = [self._start]
+        for child in self.childs:
+            bounds.append(child._start)
+            bounds.append(child._end)
+        bounds.append(self._end)
+        source = self._source.get_text()
+        self._pieces = [source[bounds[index]:bounds[index + 1]]
+                        for index in range(0, len(bounds), 2)]
+        self._source = None
+        return self._pieces
+
+    @property
+    def text(self) -> str:
+        """Текст тегу, місця дочірніх тегів позначені SLOT"""
+        return SLOT.join(self._pieces)
+
+    @text.setter
+    def text(self, text: str):
+        pieces = text.split(SLOT)
+        if pieces == self._pieces:
+            return
+        self._pieces = pieces
+        for child in self.childs:
+            child._space_before_tag = None
+        self._text_changed(0)
+
+    def _set_piece(self, index: int, piece: str):
+        """Метод замінює шматок тексту тегу між дочірніми тегами
+
+        Parameters
+        ----------
+        index : int
+            Номер шматка, шматок index стоїть перед дочірнім тегом index
+        piece : str
+            Новий текст шматка
+        """
+
+        if self._pieces[index] == piece:
+            return
+        self._pieces[index] = piece
+        if index < len(self.childs):
+            self.childs[index]._space_before_tag = None
+        self._text_changed(index)
+
+    def _text_changed(self, index: int):
+        """Метод скидає кеші після зміни тексту тегу з шматка index"""
+
+        del self._prefix[index:]
+        self._tag_string = None
+        self._invalidate_metrics()
+        self._invalidate_layout(index)
+
+    def _sub_text(self, pattern: Pattern, repl: Union[str, Callable],
+                  last_pattern: Optional[Pattern] = None, start: int = 0):
+        """Метод виконує Pattern.sub у кожному шматку тексту тегу
+
+        Parameters
+        ----------
+        pattern : Pattern
+            Регулярний вираз
+        repl : Union[str, Callable]
+            Заміна, як у re.sub
+        last_pattern : Optional[Pattern]
+            Регулярний вираз для останнього шматка, якщо він інший
+        start : int
+            Позиція у першому шматку, з якої виконуєтся заміна
+        """
+
+        last_index = len(self.childs)
+        for index, piece in enumerate(self._pieces):
+            piece_pattern = pattern
+            if index == last_index and last_pattern is not None:
+                piece_pattern = last_pattern
+            if index == 0 and start:
+                # Без збігу після start шматок не копіюєтся
+                if piece_pattern.search(piece, start) is None:
+                    continue
+                piece = piece[:start] + piece_pattern.sub(repl, piece[start:])
+            else:
+                piece = piece_pattern.sub(repl, piece)
+            self._set_piece(index, piece)
+
+    def _replace_text(self, old: str, new: str):
+        """Метод виконує str.replace у кожному шматку тексту тегу"""
+
+        for index, piece in enumerate(self._pieces):
+            self._set_piece(index, piece.replace(old, new))
+
+    def _invalidate_metrics(self):
+        """Метод скидає кеш метрик тегу та його батьків
+
+        Кеш батька скидається тільки після позиції цього тегу, тому
+        метрики тексту перед тегом не перераховуются. Разом з метриками
+        скидаются кеші, які рахуются тільки після метрик.
+        """
+
+        tag = self
+        while tag._metrics is not None:
+            tag._metrics = None
+            tag._text_string = None
+            tag._max_col = None
+            parent = tag.parent
+            if not parent:
+                break
+            del parent._prefix[tag._index + 1:]
+            tag = parent
+
+    def append_child(self, child: 'Tag'):
+        """Метод додає дочірній тег та місце для нього у текст"""
+
+        child._index = len(self.childs)
+        self.childs.append(child)
+        self._pieces.append('')
+        self._text_changed(len(self.childs))
+
+    def _invalidate_layout(self, index: int):
+        """Метод скидає кеш позицій тегів після зміни шматка index
+
+        Позиція тегу залежить тільки від тексту після останнього
+        переносу строки перед ним. Тому скидаются позиції дочірніх тегів
+        до шматка з переносом строки, а якщо його немає - і позиції
+        тегів після цього тегу у батька. Разом з позицією тегу
+        скидаются позиції його дочірніх тегів.
+        """
+
+        tag = self
+        while True:
+            childs = tag.childs
+            for position in range(index, len(childs)):
+                childs[position]._reset_position()
+                if tag._pieces[position + 1].__contains__('\n'):
+                    return
+            if not tag.parent:
+                return
+            index = tag._index + 1
+            tag = tag.parent
+
+    def _reset_position(self):
+        """Метод скидає кеш позиції тегу та його дочірніх тегів
+
+        Позиція тегу кешуєтся тільки після позиції батька, тому
+        дочірні теги тегу без кешу позиції теж без кешу.
+        """
+
+        stack = [self]
+        while stack:
+            tag = stack.pop()
+            if tag._col is None:
+                continue
+            tag._col = None
+            tag._indent_col = None
+            tag._max_col = None
+            stack.extend(tag.childs)
+
+    def _check_cache(self, name: str, cached, fresh):
+        """Метод перевіряє кешоване значення, коли VERIFY_CACHE
+
+        Raises
+        ------
+        AssertionError
+            Кешоване значення не збігається з перерахованим
+        """
+
+        if cached != fresh:
+            raise AssertionError(
+                'Застарілий кеш {} тегу "{}": {!r} замість {!r}'.format(
+                    name, self.name, cached, fresh,
+                )
+            )
+
+    def append_text(self, text: str):
+        """Метод додає текст у кінець тегу"""
+
+        self._set_piece(len(self.childs), self._pieces[-1] + text)
+
+    def _build_child(self, child: 'Tag'):
+        """Метод додає дочірній тег під час розбору, без скидання кешів
+
+        Html будує дерево до першого запиту кешів, тому кожне
+        скидання обходило б всіх батьків тегу даремно.
+        """
+
+        child._index = len(self.childs)
+        self.childs.append(child)
+        self._pieces.append('')
+
+    def _build_text(self, text: str):
+        """Метод додає текст у кінець тегу під час розбору, див.
+        _build_child
+        """
+
+        self._pieces[-1] += text
+
+    def get_metrics(self) -> Metrics:
+        """Метод вертає метрики тексту тегу з дочірніми элементами"""
+
+        if self._metrics is None:
+            if self.childs:
+                self._metrics = self._get_metrics_before(None)
+            else:
+                self._metrics = measure_text(self._pieces[0])
+        return self._metrics
+
+    def _get_metrics_before(self, target: Optional['Tag']) -> Metrics:
+        """Метод вертає метрики тексту тегу до дочірнього тега
+
+        Метрики до кожного дочірнього тегу кешуются у _prefix,
+        тому послідовні запити по дочірнім тегам не перераховують
+        текст перед ними.
+
+        Parameters
+        ----------
+        target : Optional[Tag]
+            Дочірній тег, або None щоби отримати метрики всього тексту
+
+        Returns
+        -------
+        metrics : Metrics
+            Метрики тексту до дочірнього тега
+        """
+
+        stop = len(self.childs) if target is None else target._index
+        prefix = self._prefix
+        if not prefix:
+            prefix.append(measure_text(self._pieces[0]))
+        while len(prefix) <= stop:
+            index = len(prefix)
+            metrics = join_metrics(
+                prefix[-1],
+                self.childs[index - 1].get_metrics(),
+            )
+            prefix.append(join_metrics(
+                metrics,
+                measure_text(self._pieces[index]),
+            ))
+        return prefix[stop]
+
+    def lint(self, template: CompiledTemplate):
+        """Метод який форматує тег та дочірні теги правилами LINT_RULES"""
+
+        LintPipeline(template).lint(self)
+
+    def lint_space_in_empty_tag(self, template: CompiledTemplate,
+                                facts: 'TagFacts'):
+        """Метод добавляє відступ після імені тегу у пустих тегах
+
+        Початковий тег змінює lint_layout_attributes, тому заміна
+        починаєтся після нього.
+        """
+        start = len(facts.tag_string) if self.parent else 0
+        if template.space_in_empty_tag:
+            self._sub_text(EMPTY_TAG_END_SPACE_RE, ' ', start=start)
+        else:
+            self._sub_text(EMPTY_TAG_END_SPACE_RE, '', start=start)
+
+    def lint_space_after_tag_name(self, template: CompiledTemplate,
+                                  facts: 'TagFacts'):
+        """Метод добавляє відступ після імені тегу
+
+        Заміна починаєтся після початкового тегу, як у
+        lint_space_in_empty_tag.
+        """
+        start = len(facts.tag_string) if self.parent else 0
+        if template.space_after_tag_name:
+            self._sub_text(TAG_END_SPACE_RE, ' ', start=start)
+        else:
+            self._sub_text(TAG_END_SPACE_RE, '', start=start)
+
+    def lint_wrap_text(self, template: CompiledTemplate, facts: 'TagFacts'):
+        """Метод який форматує текст в тегах"""
+
+        if not template.wrap_text:
+            return
+
+        tag_string = facts.tag_string
+        if tag_string.endswith('/>') or self.keeps_white_space(template):
+            return
+        source_text = self.get_text_string()
+        wrapper = self.create_text_wrapper(template, facts, source_text)
+        lengths = [
+            child.get_length_first_line()[0]
+            for child in self.childs[:source_text.count(SLOT)]
+        ]
+        wrapper.feed(source_text, lengths)
+        text = wrapper.finish()
+
+        self.text = self.text.replace(source_text, text)
+
+    def create_text_wrapper(self, template: CompiledTemplate,
+                            facts: 'TagFacts',
+                            source_text: str) -> TextWrapper:
+        """Метод створює TextWrapper для тексту тегу
+
+        Parameters
+        ----------
+        template : CompiledTemplate
+            Шаблон форматування
+        facts : TagFacts
+            Факти про тег
+        source_text : str
+            Текст тегу без тега та атрібутів, див. get_text_string
+
+        Returns
+        -------
+        wrapper : TextWrapper
+            Об'єкт що переносить текст тегу
+        """
+
+        tag_string = facts.tag_string
+        last_start = tag_string.rfind('\n') + 1
+        if last_start:
+            # Перенесений тег: текст починаєтся після останньої строчки
+            begin_col = len(tag_string) - last_start
+        else:
+            begin_col = facts.col + len(tag_string)
+        if template.align_text:
+            indents = TextWrapper.get_align_indents(source_text, begin_col)
+        else:
+            indents = facts.indent_col + template.indent - 1
+        blank_lines = template.keep_blank_lines
+        join_lines = not template.keep_line_breaks_in_text
+        if template.balance_text:
+            return BalancedTextWrapper(template.hard_wrap_column, begin_col,
+                                       indents, blank_lines, join_lines)
+        return TextWrapper(template.hard_wrap_column, begin_col, indents,
+                           blank_lines, join_lines)
+
+    def keeps_white_space(self, template: CompiledTemplate) -> bool:
+        """Метод перевіряє чи тег або батьки є у keep_white_space_inside
+
+        З Template.keep_white_spaces відступи зберігают всі теги.
+        """
+
+        if template.keep_white_spaces:
+            return True
+        tag = self
+        while tag is not None:
+            if tag.name in template.keep_white_space_inside:
+                return True
+            tag = tag.parent
+        return False
+
+    def get_length_first_line(self) -> (int, bool):
+        """Метод вертає дліну першої строчки тега"""
+
+        length = 0
+        for index, piece in enumerate(self._pieces):
+            end = piece.find('\n')
+            if end != -1:
+                return length + end, True
+            length += len(piece)
+
+            if index < len(self.childs):
+                (
+                    length_child, 
+                    is_end,
+                ) = self.childs[index].get_length_first_line()
+                length += length_child
+                if is_end:
+                    return length, True
+        return length, False
+
+    def get_text_string(self) -> str:
+        """Віддає текст тегу, без дочірніх тегів"""
+
+        if self._text_string is None:
+            # Кеш скидається разом з метриками, тому метрики мають
+            # бути пораховані
+            self.get_metrics()
+            self._text_string = self._find_text_string()
+        elif VERIFY_CACHE:
+            self._check_cache('text_string', self._text_string,
+                              self._find_text_string())
+        return self._text_string
+
+    def _find_text_string(self) -> str:
+        """Метод шукає текст тегу після тега та атрібутів"""
+
+        tag_string = self.get_tag_string()
+        text = self.text
+        end_tag = END_TAG_RE.search(text)
+        if end_tag:
+            text_string = text[len(tag_string):end_tag.start()]
+        else:
+            text_string = text[len(tag_string):]
+        return text_string
+    
+    def lint_layout_attributes(self, template: CompiledTemplate,
+                               facts: 'TagFacts'):
+        """Метод розкладає атрібути тегу по строчках, див. StartTag.layout
+
+        Правило виконує Template.wrap_attributes,
+        new_line_before_first_attr, new_line_after_last_attr,
+        continuation_indend, align_attributes,
+        space_around_eq_in_attribute, generate_quote_marks, а для
+        початкового тегу space_in_empty_tag та space_after_tag_name
+        одним проходом.
+        """
+
+        if not self.parent:
+            return
+
+        start_tag = facts.start_tag
+        tag_string = start_tag.text
+        new_tag_string = start_tag.layout(template, facts.col,
+                                          facts.indent_col)
+        if new_tag_string != tag_string:
+            self._replace_text(tag_string, new_tag_string)
+
+    def get_max_col_in_text_tag(self) -> int:
+        """Метод визначає максимальну дліну текста тега"""
+
+        if self._max_col is None:
+            self._max_col = get_max_col(self.get_metrics(), self.get_col())
+        elif VERIFY_CACHE:
+            self._check_cache('max_col', self._max_col, get_max_col(
+                self.get_metrics(), self._find_col(),
+            ))
+        return self._max_col
+
+    def lint_hard_wrap(self, template: CompiledTemplate, facts: 'TagFacts'):
+        """Метод переносить тег на строку, якщо дліна тексту тега завелика"""
+
+        if self.name in template.inline_elements:
+            return
+
+        max_col = self.get_max_col_in_text_tag()
+        if max_col <= template.hard_wrap_column:
+            return
+
+        # Перенос з порожніми строчками вже є, відступи робить lint_indents
+        if not facts.space_before_tag.__contains__('\n'):
+            if self.name in template.dont_break_if_inline_content:
+                return
             self.replace_space_before_tag('\n')
 
-    def lint_continuation_indend(self, template: Template):
-        """Робить відступи перед атрибутами тегу на нових строчках"""
+        self._sub_text(END_TAG_SPACE_RE, '\n')
+
+    def lint_remove_new_line_before(self, template: CompiledTemplate,
+                                    facts: 'TagFacts'):
+        """Метод видаляє перенос на нову строку якщо тег є 
+        у списку тегів які не треба переносити на нову строку
+
+        Без Template.keep_line_breaks перенос перед тегом з
+        inline_elements замінюєтся пробілом.
+        """
+
+        if self.name in template.remove_new_line_before:
+            self.replace_space_before_tag('')
+        elif (not template.keep_line_breaks
+                and self.name in template.inline_elements
+                and facts.space_before_tag.__contains__('\n')
+                and not self.parent.keeps_white_space(template)):
+            self.replace_space_before_tag(' ')
+
+    def lint_insert_new_line_before(self, template: CompiledTemplate,
+                                    facts: 'TagFacts'):
+        """Метод який переносить на нову строку тег якщо він є 
+        у списку тегів які треба переносити на нову строку"""
 
-        old_tag_string = self.get_tag_string()
-        indents = ' ' * (self.get_indent_col() - 1 + 
-                         template.continuation_indend)
-        new_tag_string = sub(r'(?<=\n)\s*', indents, old_tag_string)
-        self.text = self.text.replace(old_tag_string, new_tag_string)
+        if (self.name in template.insert_new_line_before
+                and not facts.space_before_tag.__contains__('\n')):
+            self.replace_space_before_tag('\n')
 
     def get_lines_count(self) -> int:
         """Метод який віддає кількість строчок цього тега"""
 
-        return 1 + self.get_text().count('\n')
+        return 1 + self.get_metrics()[0]
 
     def get_indent_col(self) -> int:
         """Метод визначає відступи на лінії"""
 
         if not self.parent:
             return 1
-        if self.get_space_before_tag().__contains__('\n'):
-            return self.get_col()
-        else:
-            return self.parent.get_indent_col()
-
-    def lint_indents(self, template: Template):
+        if self._indent_col is None:
+            # Кеш позиції тегу має бути заповнений, див. _reset_position
+            col = self.get_col()
+            if self.get_space_before_tag().__contains__('\n'):
+                self._indent_col = col
+            else:
+                self._indent_col = self.parent.get_indent_col()
+        elif VERIFY_CACHE:
+            self._check_cache('indent_col', self._indent_col,
+                              self._find_indent_col())
+        return self._indent_col
+
+    def _find_indent_col(self) -> int:
+        """Метод визначає відступи на лінії без кешів"""
+
+        tag = self
+        while tag.parent:
+            space = tag.parent._get_space_before_tag(tag)
+            if space.__contains__('\n'):
+                return tag._find_col()
+            tag = tag.parent
+        return 1
+
+    def lint_indents(self, template: CompiledTemplate, facts: 'TagFacts'):
         """Method який робить відступи від батька"""
 
         if not self.parent:
             return
 
-        space_before_tag = self.get_space_before_tag()
+        space_before_tag = facts.space_before_tag
         if not space_before_tag.__contains__('\n'):
             return
 
         indents = int((self.parent.get_indent_col() - 1) / template.indent)
 
         # Не відступати якщо родич є у списку тегів від яких не відступати
-        dont_indent = (self.parent.name in template.dont_indent_child + [''])
+        dont_indent = self.parent.name in template.dont_indent_parents
         # Якщо задано розмір тегу у строчках і тег більше за цей розмір
         if template.dont_indent_child_tag_size:
             if (self.parent.get_lines_count() 
@@ -853,11 +2361,15 @@ class Tag:
         if not dont_indent:
             indents += 1
 
-        new_space = '\n' + ((' ' * template.indent) * indents)
+        # Переноси з порожніми строчками лишаются для lint_white_space
+        indent = template.indent_string * indents
+        first = space_before_tag.find('\n')
+        last = space_before_tag.rfind('\n')
+        new_space = space_before_tag[first:last + 1] + indent
 
         self.replace_space_before_tag(new_space)
 
-        self.text = sub(r'(?<=\n)\s*(?=<\/)', new_space, self.text)
+        self._sub_text(END_TAG_INDENT_RE, indent)
 
     def replace_space_before_tag(self, space: str):
         """Метод який заставляє батька замінити пространство перед тегом"""
@@ -877,157 +2389,227 @@ class Tag:
             Відступи на які треба замінити
         """
 
-        start = 0
-        for child in self.childs:
-            index = self.text.find('{}', start)
-            start = index + 2
+        piece = self._pieces[target._index]
+        start = self._get_space_start(piece)
+        self._set_piece(target._index, piece[:start] + new_space)
 
-            if child == target:
-                space = search(r'\s*', self.text[index - 1::-1]).group(0)
-                space_len = len(space)
-
-                self.text = (self.text[:index - space_len] + new_space + 
-                             self.text[index:])
+    @staticmethod
+    def _get_space_start(piece: str) -> int:
+        """Метод вертає позицію початку відступів у кінці шматка тексту"""
 
-                break
+        start = len(piece)
+        while start > 0 and piece[start - 1].isspace():
+            start -= 1
+        return start
 
     def get_space_before_tag(self) -> str:
         """Метод який вертає відступи перед тегом"""
 
-        if self.parent:
-            return self.parent._get_space_before_tag(self)
-        return ''
+        if not self.parent:
+            return ''
+        if self._space_before_tag is None:
+            self._space_before_tag = self.parent._get_space_before_tag(self)
+        elif VERIFY_CACHE:
+            self._check_cache('space_before_tag', self._space_before_tag,
+                              self.parent._get_space_before_tag(self))
+        return self._space_before_tag
 
     def _get_space_before_tag(self, target: 'Tag') -> str:
         """Метод який вертає відступи перед пошуковим тегом"""
 
-        start = 0
-        for child in self.childs:
-            index = self.text.find('{}', start)
-            start = index + 2
-
-            if child == target:
-                return search(r'\s*', self.text[index - 1::-1]).group(0)
-
-    def lint_keep_indents_on_empty_lines(self, template: Template):
-        """Метод для Template.keep_indents_on_empty_lines
-        
-        Якщо Template.keep_indents_on_empty_lines == False
-        Видаляє відступи на пустих строках
+        piece = self._pieces[target._index]
+        return piece[self._get_space_start(piece):]
+
+    def lint_white_space(self, template: CompiledTemplate,
+                         facts: 'TagFacts'):
+        """Метод нормалізує переноси строк, відступи та порожні строчки
+
+        Один прохід по тексту тегу замість окремих правил для
+        Template.use_tab_character, smart_tab та
+        keep_indents_on_empty_lines. Кожен перенос з відступами
+        навколо нього обробляєтся normalize_line_break: відступи
+        перед тегами змінюються на табуляцію або пробіли, порожніх
+        строчок лишаєтся не більше Template.keep_blank_lines. Без
+        Template.keep_line_breaks_in_text переноси між словами тексту
+        замінюются пробілом, якщо текст не переносить lint_wrap_text.
+        Строчки атрібутів початкового тегу відступают як у smart_tab.
+
+        Теги, які зберігают відступи, див. keeps_white_space, лишают
+        порожні строчки та відступи тексту як є.
         """
 
-        if not template.keep_indents_on_empty_lines:
-            self.text = sub(r'(?<=\n)\s*(?=\n)', '', self.text)
-
-    def lint_smart_tab(self, template: Template):
-        """Метод для Template.smart_tabs
-        
-        Якщо Template.smart_tabs == True
-        розумно замінює пробіли на табуляцію перед атрибутами в тегах
-
-        Якщо Template.smart_tabs == False
-        розумно замінює табуляцію на пробіли перед атрибутами в тегах
-        
-        """
+        keeps = self.keeps_white_space(template)
+        if keeps:
+            blank_lines = None
+        else:
+            blank_lines = template.keep_blank_lines
+        keep_indents = keeps or template.keep_indents_on_empty_lines
+        old_space, new_space = template.tab_replacement
 
-        if not self.parent:
-            return
+        def convert(indent: str) -> str:
+            return indent.replace(old_space, new_space)
 
-        tag_string = self.get_tag_string()
-        new_tag_string = tag_string
-        tag_col = self.get_col()
         start = 0
-        while True:
-            end_char_index = new_tag_string.find('\n', start)
-
-            if end_char_index == -1:
-                break
-            start = end_char_index + 1
-
-            space = search(r'\s*', new_tag_string[end_char_index + 1:])
-            space_len = len(space.group(0))
-            space_str = space.group(0).replace('\t', '    ')
-            if len(space_str) >= tag_col:
-                if template.use_tab_character:
-                    if template.smart_tab:
-                        count_tabs = int(tag_col / 4)
-                        space_str = ('\t' * count_tabs + 
-                                     space_str[4 * count_tabs:])
+        if self.parent:
+            tag_string = facts.tag_string
+            start = len(tag_string)
+            if tag_string.__contains__('\n'):
+                tag_col = facts.col
+
+                def smart_indent(indent: str) -> str:
+                    indent = indent.replace('\t', '    ')
+                    if not template.use_tab_character:
+                        return indent
+                    if template.smart_tab and len(indent) >= tag_col:
+                        count_tabs = tag_col // 4
                     else:
-                        count_tabs = int(len(space_str) / 4)
-                        space_str = ('\t' * count_tabs + 
-                                     space_str[4 * count_tabs:])
+                        count_tabs = len(indent) // 4
+                    return '\t' * count_tabs + indent[4 * count_tabs:]
+
+                def replace_attribute_line(match: Match) -> str:
+                    return normalize_line_break(
+                        match.group(), smart_indent, blank_lines, keep_indents,
+                    )
+
+                new_tag_string = LINE_BREAK_RE.sub(replace_attribute_line,
+                                                   tag_string)
+                self._replace_text(tag_string, new_tag_string)
+                start = len(new_tag_string)
+
+        join_text = (not keeps and not template.wrap_text
+                     and not template.keep_line_breaks_in_text
+                     and self.name not in HTMLParser.CDATA_CONTENT_ELEMENTS)
+        tag_name = self.name
+
+        def replace_line_break(match: Match) -> str:
+            text = match.string
+            end = match.end()
+            if join_text and is_text_line_break(text, match.start(), end):
+                return ' '
+            # Відступи тексту не змінюются, тільки відступи перед тегами
+            # та в кінці шматка, перед дочірнім тегом
+            if not keeps:
+                is_tag_line = end == len(text) or text[end] == '<'
             else:
-                if template.use_tab_character:
-                    count_tabs = int(len(space_str) / 4)
-                    space_str = ('\t' * count_tabs + 
-                                 space_str[4 * count_tabs:])
+                is_tag_line = text.startswith('</' + tag_name, end)
+            return normalize_line_break(
+                match.group(), convert if is_tag_line else None,
+                blank_lines, keep_indents,
+            )
 
-            
-            new_tag_string = (new_tag_string[:start] + space_str + 
-                              new_tag_string[start + space_len:])
+        if join_text:
+            pattern = LINE_BREAK_RE
+        else:
+            pattern = template.white_space_re
+        self._sub_text(pattern, replace_line_break, start=start)
 
-        self.text = self.text.replace(tag_string, new_tag_string)
-            
-        
-    def lint_use_tab_character(self, template: Template):
-        """Метод для Template.use_tab_character
-        
-        Якщо Template.use_tab_character == True
-        замінює пробіли на табуляцію перед тегами
+    def get_tag_string(self) -> str:
+        """Вертає текст тега та атрібутів"""
 
-        Якщо Template.use_tab_character == False
-        замінює табуляцію на пробіли перед тегами
-        
-        """
-        start = 0
-        while True:
-            space_before_tag = search(
-                r'(?<=\n)\s+(?={}|<[\s\S]*?>)', 
-                self.text[start:],
-            )
+        if self._tag_string is None:
+            self._tag_string = self._find_tag_string()
+        elif VERIFY_CACHE:
+            self._check_cache('tag_string', self._tag_string,
+                              self._find_tag_string())
+        return self._tag_string
+
+    def _find_tag_string(self) -> str:
+        """Метод шукає текст тега та атрібутів у тексті тегу"""
 
-            if not space_before_tag:
+        for piece in self._pieces:
+            start = piece.find('<')
+            if start != -1:
+                end = piece.find('>', start)
+                if end != -1:
+                    return piece[start:end + 1]
                 break
-            
-            space_before_tag_text = space_before_tag.group(0)
-
-            if template.use_tab_character:
-                space_before_tag_text = sub(
-                    r'    ', 
-                    r'\t', 
-                    space_before_tag_text,
-                )   
-            else:
-                space_before_tag_text = sub(
-                    r'\t', 
-                    r'    ', 
-                    space_before_tag_text,
-                )
+        return TAG_RE.search(self.text).group(0)
 
-            self.text = (
-                self.text[:start + space_before_tag.start()] +
-                space_before_tag_text + 
-                self.text[start + space_before_tag.end():]
-            )
+    def get_start_tag(self) -> StartTag:
+        """Метод вертає початковий тег, розібраний на атрібути
 
-            start += space_before_tag.start() + len(space_before_tag_text)
+        Тег розбираєтся при першому зверненні і далі змінюєтся разом
+        з текстом у StartTag.layout. Знову тег розбираєтся тільки якщо
+        його текст змінило інше правило.
+        """
 
-    def get_tag_string(self):
-        """Вертає текст тега та атрібутів"""
-        return search(r'<[\s\S]*?>', self.text).group(0)
+        tag_string = self.get_tag_string()
+        start_tag = self._start_tag
+        if start_tag is None or start_tag.text != tag_string:
+            start_tag = self._start_tag = StartTag.parse(tag_string)
+        return start_tag
 
     def get_text(self) -> str:
         """Вертає текст тегу з дочірніми элементами"""
-        text = self.text.format(
-            *[c.get_text() for c in self.childs]
-        )
-        return text
+        return ''.join(self.iter_text())
+
+    def iter_text(self) -> Iterator[str]:
+        """Вертає шматки тексту тегу з дочірніми элементами по порядку
+
+        Дерево обходиться без рекурсії, тому текст можна одразу
+        записувати у файл без склеювання в одну строку. Шматки тегів,
+        які ще не створені з _source, не створюются: сусідні такі
+        шматки вертаются одним зрізом _source.
+        """
+
+        # Текст та межі зрізу _source, який ще не повернутий
+        source = None
+        source_text = ''
+        start = end = 0
+        stack = [(self, 0)]
+        while stack:
+            tag, index = stack.pop()
+            childs = tag.childs
+            if tag._source is None:
+                if source is not None:
+                    yield source_text[start:end]
+                    source = None
+                yield tag._pieces[index]
+            else:
+                piece_start = childs[index - 1]._end if index else tag._start
+                piece_end = (childs[index]._start if index < len(childs)
+                             else tag._end)
+                if tag._source is source and piece_start == end:
+                    end = piece_end
+                else:
+                    if source is not None:
+                        yield source_text[start:end]
+                    source = tag._source
+                    source_text = source.get_text()
+                    start, end = piece_start, piece_end
+            if index < len(childs):
+                stack.append((tag, index + 1))
+                stack.append((childs[index], 0))
+        if source is not None:
+            yield source_text[start:end]
+
+    def is_text_equal(self, text: str) -> bool:
+        """Порівнює текст тегу з дочірніми элементами з текстом
+
+        Шматки порівнюются по черзі без склеювання тексту тегу.
+
+        Parameters
+        ----------
+        text : str
+            Текст для порівняння
+
+        Returns
+        -------
+        is_equal : bool
+            True якщо тексти однакові
+        """
+
+        position = 0
+        for piece in self.iter_text():
+            if not text.startswith(piece, position):
+                return False
+            position += len(piece)
+        return position == len(text)
 
     def get_pos(self) -> (int, int):
         """Метод який визначає лінію та стовбчик де починається тег
         
-        Метод робить запрос текста до себе у корневого тега, 
+        Метод збирає метрики тексту до тега у батьків, 
         потім рахує лінії та стовбчики.
 
         Returns
@@ -1036,24 +2618,48 @@ class Tag:
             Лінія та стовбчик де починається тег
         """
 
-        root_tag = self.get_root_tag()
-        text_before, _ = root_tag._get_text_before_target(self)
-
-        line = 1
-        col = 1
-        for char in text_before:
-            if char == '\n':
-                line += 1
-                col = 1
-            elif char == '\t':
-                col += 4
-            else:
-                col += 1
+        if self._source is not None:
+            # Тег ще не змінювався, тому позиція береться з _source
+            source = self._source.get_text()
+            line_start = source.rfind('\n', 0, self._start) + 1
+            text = source[line_start:self._start]
+            return (source.count('\n', 0, line_start) + 1,
+                    len(text) + 3 * text.count('\t') + 1)
+
+        metrics = EMPTY_METRICS
+        tag = self
+        while tag.parent:
+            metrics = join_metrics(
+                tag.parent._get_metrics_before(tag), 
+                metrics,
+            )
+            tag = tag.parent
 
-        return line, col
+        return metrics[0] + 1, metrics[3] + 1
 
     def get_col(self) -> int:
         """Вертає позицію тега на лінії"""
+
+        parent = self.parent
+        if not parent:
+            return 1
+        if self._col is None:
+            # Позиція батька кешуєтся першою, див. _reset_position
+            parent_col = parent.get_col()
+            lines_count, _, _, width, _ = parent._get_metrics_before(self)
+            if lines_count:
+                self._col = width + 1
+            elif parent.parent:
+                self._col = parent_col + width
+            else:
+                self._col = width
+        elif VERIFY_CACHE:
+            self._check_cache('col', self._col, self._find_col())
+        return self._col
+
+    def _find_col(self) -> int:
+        """Вертає позицію тега на лінії без кешу позицій"""
+
         if not self.parent:
             return 1
         return self.parent._get_col(self)
@@ -1070,112 +2676,466 @@ class Tag:
             Позиція пошукового тега на лінії
         """
 
-        col: int = 1
-        text: str = ''
-        current_child_index = 0
-        i = 0
-        while True:
-            if self.text[i] == '{' and self.text[i + 1] == '}':
-                current_child = self.childs[current_child_index]
-                if current_child == target:
+        lines_count, _, _, width, _ = self._get_metrics_before(target)
+        if lines_count:
+            return width + 1
+        if not self.parent:
+            return width
+        return self.parent._get_col(self) + width
+
+    def get_root_tag(self) -> 'Tag':
+        """Метод вертає корневий тег дерева тегів"""
+
+        if self.parent:
+            return self.parent.get_root_tag()
+        return self
+
+    def find_tags_in_lines(self, ranges: List[LineRange]) -> List['Tag']:
+        """Метод шукає теги, текст тега яких перетинає строчки ranges
+
+        Дочірні теги перевіряются тільки у тегів, весь текст яких
+        перетинає ranges, тому решта дерева не обходиться.
+
+        Parameters
+        ----------
+        ranges : List[LineRange]
+            Номери першої та останньої строчки, від 1 на початку тегу
+
+        Returns
+        -------
+        tags : List[Tag]
+            Дочірні теги у порядку LintPipeline.lint
+        """
+
+        def overlaps(first: int, last: int) -> bool:
+            return any(first <= end and last >= start
+                       for start, end in ranges)
+
+        last_line = max(end for _, end in ranges)
+        tags: List[Tag] = []
+        stack = [(self, 1)]
+        while stack:
+            tag, line = stack.pop()
+            if tag is not self:
+                lines_count = tag.get_tag_string().count('\n')
+                if overlaps(line, line + lines_count):
+                    tags.append(tag)
+
+            childs: List[Tuple[Tag, int]] = []
+            for child in tag.childs:
+                child_line = line + tag._get_metrics_before(child)[0]
+                if child_line > last_line:
                     break
+                if overlaps(child_line,
+                            child_line + child.get_metrics()[0]):
+                    childs.append((child, child_line))
+            stack.extend(reversed(childs))
+        return tags
 
-                text += current_child.get_text()
 
-                i += 2
-                current_child_index += 1
-            else:
-                text += self.text[i]
-                i += 1
-
-        text = text.replace('\t', '    ')
-        end_line_char_pos = text.rfind('\n')
-        if end_line_char_pos == -1:
-            if not self.parent:
-                return len(text)
-
-            col = self.parent._get_col(self)
-            for _ in text:
-                col += 1
-        else:
-            col = len(text[end_line_char_pos:])
+class TagFacts:
+    """Факти про тег, які правила форматування використовують спільно
 
-        return col
+    Факти беруться з кешів тегу, які скидаются при зміні тексту, від
+    якого вони залежать: tag_string та start_tag - тексту тегу, а col,
+    indent_col та space_before_tag - тексту батьків перед тегом.
+    Кожен факт рахуєтся тільки коли правило його читає.
 
-    def _get_text_before_target(self, target: 'Tag') -> (str, bool):
-        """Метод вертає текст до пошукового тега
-        
-        Метод рекурсивно шукає тег в дереві тегів, 
-        та паралельно собирає текст до нього.
-        Коли знаходить, вертає текст.
+    Attributes
+    ----------
+    tag : Tag
+        Тег якого стосуются факти
+    tag_string : str
+        Текст тега та атрібутів
+    start_tag : StartTag
+        Початковий тег, розібраний на атрібути
+    col : int
+        Позиція тега на лінії
+    indent_col : int
+        Відступи на лінії тега
+    space_before_tag : str
+        Відступи перед тегом
+    """
+
+    def __init__(self, tag: Tag):
+        self.tag: Tag = tag
+
+    @property
+    def tag_string(self) -> str:
+        return self.tag.get_tag_string()
+
+    @property
+    def start_tag(self) -> StartTag:
+        return self.tag.get_start_tag()
+
+    @property
+    def col(self) -> int:
+        return self.tag.get_col()
+
+    @property
+    def indent_col(self) -> int:
+        return self.tag.get_indent_col()
+
+    @property
+    def space_before_tag(self) -> str:
+        return self.tag.get_space_before_tag()
+
+
+class LintRule:
+    """Правило форматування тегу
+
+    Attributes
+    ----------
+    method : Callable[[Tag, CompiledTemplate, TagFacts], None]
+        Метод Tag який виконує правило
+    is_enabled : Callable[[CompiledTemplate], bool]
+        Вертає False якщо правило нічого не змінює для шаблону
+    """
+
+    def __init__(self,
+                 method: Callable[[Tag, CompiledTemplate, TagFacts], None],
+                 is_enabled: Callable[[CompiledTemplate], bool] = (
+                     lambda _: True
+                 )):
+        self.method = method
+        self.is_enabled: Callable[[CompiledTemplate], bool] = is_enabled
+
+    @property
+    def name(self) -> str:
+        """Ім'я правила"""
+        return self.method.__name__
+
+
+# Правила форматування у порядку виконання
+LINT_RULES: List[LintRule] = [
+    LintRule(Tag.lint_hard_wrap),
+    LintRule(
+        Tag.lint_remove_new_line_before,
+        is_enabled=lambda template: (bool(template.remove_new_line_before)
+                                     or not template.keep_line_breaks),
+    ),
+    LintRule(
+        Tag.lint_insert_new_line_before,
+        is_enabled=lambda template: bool(template.insert_new_line_before),
+    ),
+    LintRule(Tag.lint_indents),
+    LintRule(Tag.lint_space_in_empty_tag),
+    LintRule(Tag.lint_space_after_tag_name),
+    LintRule(Tag.lint_layout_attributes),
+    LintRule(
+        Tag.lint_wrap_text,
+        is_enabled=lambda template: template.wrap_text,
+    ),
+    LintRule(Tag.lint_white_space),
+]
+
+
+class RuleStats:
+    """Статистика виконання одного правила форматування
+
+    Attributes
+    ----------
+    name : str
+        Ім'я правила
+    count : int
+        Кількість викликів
+    seconds : float
+        Загальний час виконання у секундах
+    max_seconds : float
+        Найдовший виклик у секундах
+    changed : int
+        Кількість викликів, які змінили текст тегу
+    """
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.count: int = 0
+        self.seconds: float = 0.0
+        self.max_seconds: float = 0.0
+        self.changed: int = 0
+
+    def add(self, other: 'RuleStats'):
+        """Метод додає статистику іншого запуску правила"""
+
+        self.count += other.count
+        self.seconds += other.seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.changed += other.changed
+
+    def to_dict(self) -> dict:
+        """Метод вертає статистику для запису у JSON"""
+
+        return {
+            'name': self.name,
+            'count': self.count,
+            'seconds': self.seconds,
+            'max_seconds': self.max_seconds,
+            'changed': self.changed,
+        }
+
+
+class LintProfile:
+    """Статистика виконання правил форматування
+
+    LintPipeline з профілем замінює методи правил обгортками, які
+    рахують статистику, тому без профілю правила виконуются без
+    додаткових витрат. Потокове форматування виконує перенесення
+    тексту вже після правил, тому вони не рахуются як зміни.
+
+    Attributes
+    ----------
+    rules : Dict[str, RuleStats]
+        Статистика правил у порядку виконання
+
+    Methods
+    -------
+    wrap(name: str, method: Callable) : Callable
+        Обгортає метод правила підрахунком статистики
+    add(other: LintProfile)
+        Додає статистику іншого профілю
+    to_dict() : dict
+        Вертає статистику для запису у JSON
+    format_table() : str
+        Вертає статистику у вигляді таблиці
+    """
+
+    def __init__(self):
+        self.rules: Dict[str, RuleStats] = {}
+
+    def wrap(self, name: str,
+             method: Callable[[Tag, CompiledTemplate, TagFacts], None]
+             ) -> Callable[[Tag, CompiledTemplate, TagFacts], None]:
+        """Обгортає метод правила підрахунком статистики
 
         Parameters
         ----------
-        target : Tag
-            Тег перед яким треба вернути текст
+        name : str
+            Ім'я правила
+        method : Callable[[Tag, CompiledTemplate, TagFacts], None]
+            Метод правила
 
         Returns
         -------
-        text, target_is_found : (str, bool)
-            Вертає текст та True якщо тег було знайдено
+        wrapper : Callable[[Tag, CompiledTemplate, TagFacts], None]
+            Метод, який виконує правило та рахує статистику
         """
 
-        text: str = ''
-        if self.childs:
-            current_child_index = 0
-            i = 0
-            while True:
-                if i >= len(self.text):
-                    return text, False
-
-                if self.text[i] == '{' and self.text[i + 1] == '}':
-                    current_child = self.childs[current_child_index]
-                    if current_child == target:
-                        return text, True
-
-                    (
-                        child_text, target_is_found
-                    ) = current_child._get_text_before_target(target)
-                    text += child_text
-                    if target_is_found:
-                        return text, True
-
-                    i += 2
-                    current_child_index += 1
-                else:
-                    text += self.text[i]
-                    i += 1
-        else:
-            return text + self.text, False
+        stats = self.rules.get(name)
+        if stats is None:
+            stats = self.rules[name] = RuleStats(name)
+
+        def wrapper(tag: Tag, template: CompiledTemplate, facts: TagFacts):
+            pieces = list(tag._pieces)
+            start = perf_counter()
+            method(tag, template, facts)
+            seconds = perf_counter() - start
+            stats.count += 1
+            stats.seconds += seconds
+            if seconds > stats.max_seconds:
+                stats.max_seconds = seconds
+            if tag._pieces != pieces:
+                stats.changed += 1
+
+        return wrapper
+
+    def add(self, other: 'LintProfile'):
+        """Метод додає статистику іншого профілю"""
+
+        for name, stats in other.rules.items():
+            if name not in self.rules:
+                self.rules[name] = RuleStats(name)
+            self.rules[name].add(stats)
+
+    def to_dict(self) -> dict:
+        """Метод вертає статистику для запису у JSON"""
+
+        return {
+            'seconds': sum(stats.seconds for stats in self.rules.values()),
+            'rules': [stats.to_dict() for stats in self.rules.values()],
+        }
 
-    def get_root_tag(self) -> 'Tag':
-        """Метод вертає корневий тег дерева тегів"""
+    def format_table(self) -> str:
+        """Метод вертає статистику правил у вигляді таблиці
 
-        if self.parent:
-            return self.parent.get_root_tag()
-        return self
+        Правила відсортовані за загальним часом, найповільніші першими.
+        """
+
+        lines = ['{:<36}{:>10}{:>12}{:>10}{:>10}'.format(
+            'Правило', 'Викликів', 'Всього, мс', 'Макс, мс', 'Змін',
+        )]
+        for stats in sorted(self.rules.values(),
+                            key=lambda stats: -stats.seconds):
+            lines.append('{:<36}{:>10}{:>12.3f}{:>10.3f}{:>10}'.format(
+                stats.name, stats.count, stats.seconds * 1000,
+                stats.max_seconds * 1000, stats.changed,
+            ))
+        return '\n'.join(lines)
+
+
+class LintPipeline:
+    """Послідовність правил форматування для шаблону
+
+    Правила, які нічого не змінюють для шаблону, відкидаются одразу.
+    Кожен тег отримує один TagFacts, спільний для всіх правил.
+
+    Attributes
+    ----------
+    template : CompiledTemplate
+        Шаблон форматування
+    tag_class : type
+        Клас тегів, методи правил беруться з нього, тому підклас Tag
+        може змінити правило
+    rules : List[LintRule]
+        Правила які потрібно виконувати
+    profile : Optional[LintProfile]
+        Статистика виконання правил, якщо її потрібно рахувати
+    tracer : Optional[tracing.Tracer]
+        Траса, у яку записуются довгі виклики правил
+
+    Methods
+    -------
+    lint(root_tag: Tag)
+        Форматує тег та всі дочірні теги
+    lint_tag(tag: Tag)
+        Форматує тільки тег
+    lint_lines(root_tag: Tag, ranges: List[LineRange])
+        Форматує тільки теги, текст тега яких перетинає строчки ranges
+    """
+
+    def __init__(self, template: CompiledTemplate, tag_class: type = Tag,
+                 profile: Optional[LintProfile] = None, tracer=None):
+        self.template: CompiledTemplate = template
+        self.tag_class: type = tag_class
+        self.profile: Optional[LintProfile] = profile
+        self.tracer = tracer
+        self.rules: List[LintRule] = [
+            rule for rule in LINT_RULES if rule.is_enabled(template)
+        ]
+        self._methods: List[Callable] = []
+        for rule in self.rules:
+            method = getattr(tag_class, rule.name)
+            if profile is not None:
+                method = profile.wrap(rule.name, method)
+            if tracer is not None:
+                method = tracer.wrap(rule.name, method)
+            self._methods.append(method)
+
+    def lint(self, root_tag: Tag):
+        """Форматує тег та всі дочірні теги
+
+        Теги обходяться у тому ж порядку, що і рекурсивний Tag.lint:
+        спочатку тег, потім його дочірні теги по черзі.
+        """
+
+        stack = [root_tag]
+        while stack:
+            tag = stack.pop()
+            self.lint_tag(tag)
+            stack.extend(reversed(tag.childs))
+
+    def lint_lines(self, root_tag: Tag, ranges: List[LineRange]):
+        """Форматує тільки теги, текст тега яких перетинає строчки ranges
+
+        Теги вибираются до форматування, бо форматування змінює номери
+        строчок. Текст поза вибраними тегами та відступами перед ними
+        не змінюєтся.
+
+        Parameters
+        ----------
+        root_tag : Tag
+            Корневий тег, строчки рахуются від його початку
+        ranges : List[LineRange]
+            Номери першої та останньої строчки, від 1
+        """
+
+        for tag in root_tag.find_tags_in_lines(ranges):
+            self.lint_tag(tag)
+
+    def lint_tag(self, tag: Tag):
+        """Форматує тільки тег"""
+
+        template = self.template
+        facts = TagFacts(tag)
+        for method in self._methods:
+            method(tag, template, facts)
 
 
 class Html(HTMLParser):
     """Клас який перевіряє та форматує Html файли
 
+    Розмітка розбираєтся власним циклом goahead: поширені початкові та
+    кінцеві теги і текст розбираются одним регулярним виразом кожен та
+    одразу додаются у дерево, а решту розбирають методи HTMLParser.
+    Будова дерева однакова з розбором HTMLParser, який лишається
+    доступним через fast_scan для порівняння.
+
+    З zero_copy теги не копіюють текст, а зберігають межі у прочитаному
+    тексті, а шматки тексту створюются при першому зверненні до них.
+    Текст дерева до форматування точно збігаєтся з прочитаним текстом:
+    коментарі, посилання на символи та регістр кінцевих тегів
+    лишаются як у файлі.
+
+    Лінія та стовбчик відкритих тегів рахуются під час розбору, один
+    раз для всього прочитаного тексту, тому повідомлення про недійсну
+    розмітку не залежать від розміру дерева. З validate_only дерево
+    тегів не будуєтся взагалі, а запам'ятовуются тільки імена
+    відкритих тегів.
+
     Attributes
     ----------
+    tag_class : type
+        Клас тегів дерева
+    fast_scan : bool
+        Розбирати власним циклом, а не HTMLParser.goahead?
+    zero_copy : bool
+        Зберігати у тегах межі у прочитаному тексті замість копій
+        тексту? Працює тільки з fast_scan
+    validate_only : bool
+        Тільки перевіряти розмітку, без дерева тегів? Працює тільки
+        з fast_scan
     path : str
         Шлях до файлу
     _root_tag : Tag
         Корневий тег дерева тегів
     _opened_tags : List[Tag]
         Список відкритих тегів (для аналізу файла)
+    _opened_names : List[str]
+        Імена відкритих тегів замість _opened_tags, коли validate_only
+    _opened_pos : List[Union[int, Tuple[int, int]]]
+        Лінія та стовбчик кожного відкритого тегу, див.
+        _resolve_positions
     break_html : bool
         Змііня якщо виявилося що Html код недійсний
+    errors : List[str]
+        Повідомлення про недійсну розмітку
 
     Methods
     -------
-    check_file(path: str, template: Template)
+    check_file(path: str, template: CompiledTemplate,
+               write: bool) : CheckResult
         Перевіряє html файл за вказаним шаблоном
+    validate_file(path: str) : CheckResult
+        Перевіряє тільки розмітку html файлу, без форматування
+    write_file(path: str, root_tag: Tag)
+        Записує текст дерева тегів у файл через тимчасовий файл
+    reset()
+        Готує парсер до розбору нового тексту
+    format_text(text: str, template: CompiledTemplate) : Optional[str]
+        Форматує текст за шаблоном
+    check_closed_tags()
+        Перевіряє що після розбору всі теги закриті
     error_no_closed_tags(tag_name: str)
-        Метод друкує інформацію про плоху розмітку Html
+        Метод записує інформацію про плоху розмітку Html
+    feed(data: str)
+        Додає текст до розбору
+    goahead(end: bool)
+        Розбирає прочитаний текст, наскільки це можливо
+    start_tag(name: str, text: str)
+        Додає у дерево відкритий тег
+    start_end_tag(name: str, text: str)
+        Додає у дерево тег без кінцевого тегу
+    end_tag(name: str, text: str)
+        Закриває останній відкритий тег
     handle_starttag(tag: str, attrs: dict)
         Метод ловить початкові теги
     handle_endtag(tag: str)
@@ -1188,8 +3148,15 @@ class Html(HTMLParser):
         Метод ловить коментарії
     handle_decl(data: str):
         Метод ловить інформацію файла
+    append_text(text: str)
+        Метод додає текст у останній відкритий тег
     """
 
+    tag_class: type = Tag
+    fast_scan: bool = True
+    zero_copy: bool = True
+    validate_only: bool = False
+
     def __init__(self, path: str):
         """Конструктор класу
         
@@ -1201,992 +3168,927 @@ class Html(HTMLParser):
         super().__init__()
 
         self.path: str = path
-        self._root_tag: Tag = Tag('', '', None)
-        self._opened_tags: List[Tag] = [self._root_tag]
-        self.break_html = False
-
-    def handle_starttag(self, tag: str, attrs: dict):
-        """Метод ловить початкові теги"""
-
-        tag = Tag(tag, self.get_starttag_text(), self._opened_tags[-1])
-        self._opened_tags[-1].childs.append(tag)
-        self._opened_tags[-1].text += '{}'
-        self._opened_tags.append(tag)
-
-    def handle_endtag(self, tag: str):
-        """Метод ловить кінцеві теги"""
-
-        tag_text = '</{}>'.format(tag)
-        if self._opened_tags[-1].name == tag:
-            self._opened_tags[-1].text += tag_text
-        else:
-            if not self.break_html:
-                self.error_no_closed_tags(tag)
-                self.break_html = True
-        del self._opened_tags[-1]
 
-    def handle_startendtag(self, tag: str, attrs: dict):
-        """Метод ловить початково-кінцеві теги"""
-
-        tag = Tag(tag, self.get_starttag_text(), self._opened_tags[-1])
-        self._opened_tags[-1].text += '{}'
-        self._opened_tags[-1].childs.append(tag)  
-
-    def handle_data(self, data: str):
-        """Метод ловить текст"""
-
-        self._opened_tags[-1].text += data
-    
-    def handle_comment(self, data: str):
-        """Метод ловить коментарії"""
-
-        self._opened_tags[-1].text += '<!-- {} -->'.format(data)
-
-    def handle_decl(self, data: str):
-        """Метод ловить інформацію файла"""
+    def reset(self):
+        """Готує парсер до розбору нового тексту
 
-        self._opened_tags[-1].text += '<!{}>'.format(data)
-
-    @classmethod
-    def check_file(cls, path: str, template: Template):
-        """Перевіряє html файл за вказаним шаблоном
-        
-        Parameters
-        ----------
-        path : str
-            Шлях до файлу
-        template : Template
-            Шаблон перевірки
+        Викликається з конструктора HTMLParser, а також дозволяє
+        використовувати один парсер для кількох текстів.
         """
 
-        html = cls(path)
-
-        with open(path, 'r') as file:
-            data = file.read()
-
-        html.feed(data)
-
-        if not html.break_html:
-            if len(html._opened_tags) != 1:
-                html.error_no_closed_tags('')
-                html.break_html = True
-                return
+        super().reset()
+
+        # Весь прочитаний текст, див. zero_copy
+        self._source: SourceText = SourceText()
+        # Позиція початку rawdata у прочитаному тексті
+        self._offset: int = 0
+        # Тег, розібраний методами HTMLParser, див. _parse_markup
+        self._markup_tag: Optional[Tuple[str, str]] = None
+        if self.zero_copy and self.fast_scan:
+            self._root_tag: Tag = self.tag_class('', None, None)
+            self._root_tag._source = self._source
         else:
-            return
-        
-        html._root_tag.lint(template)
+            self._root_tag: Tag = self.tag_class('', '', None)
+        self._opened_tags: List[Tag] = [self._root_tag]
+        # Імена відкритих тегів, коли validate_only
+        self._opened_names: List[str] = ['']
+        # Лінія та стовбчик кожного відкритого тегу, або його позиція
+        # у прочитаному тексті, поки вони не пораховані, див.
+        # _resolve_positions
+        self._opened_pos: List[Union[int, Tuple[int, int]]] = [(1, 1)]
+        # Позиція у прочитаному тексті, до якої пораховані лінії, її
+        # лінія та ширина тексту від початку лінії
+        self._line_cursor: Tuple[int, int, int] = (0, 1, 0)
+        # Текст, який ще не доданий у останній відкритий тег. Текст між
+        # тегами може прийти кількома шматками, а додавання кожного
+        # окремо копіює весь текст тегу.
+        self._text_parts: List[str] = []
+        self.break_html = False
+        self.errors: List[str] = []
 
-        with open(path, 'w') as file:
-            file.write(html._root_tag.get_text())
+    def feed(self, data: str):
+        """Додає текст до розбору
 
-    def error_no_closed_tags(self, tag_name: str):
-        """Метод друкує інформацію про плоху розмітку Html
-        
-        Parameters
-        ----------
-        tag_name : str
-            Ім'я тегу після якого існують не закриті теги.
+        З zero_copy текст зберігаєтся у _source, на який посилаются
+        теги, без копіювання вже прочитаного тексту, інакше текст
+        після розбору не зберігаєтся.
+        З validate_only текст не зберігаєтся.
         """
 
-        print('Error: Нейдійсна розмітка "{}"'.format(self.path))
-        for tag in reversed(self._opened_tags):
-            if tag.name == tag_name:
-                break
-        
-        tag_index = self._opened_tags.index(tag)
-        for bad_tag in self._opened_tags[tag_index + 1:]:
-            line, col = bad_tag.get_pos()
-            print('Незакритий тег "{}" на лінії {} та стовбчику {}'.format(
-                bad_tag.name, line, col
-            ))
-
-
-class Linter:
-    """Головний клас утиліти
-    
-    Клас який керує шаблонами, настройками та форматуванням
-    
-    Attributes
-    ----------
-    current_template : Template
-        Активний шаблон
-
-    Methods
-    -------
-    start_menu()
-        Відображає в консолі головне меню
-    _check_folder_menu()
-        Відображає в консолі меню для вибору каталогу з Html файлами
-    _check_folder(path: str)
-        Перевіряє вибраний каталог з Html файлами
-    _templates_menu()
-        Відображає в консолі меню для операції з шаблонами
-    _create_template_menu(self):
-        Відображає в консолі меню для створення шаблону
-    _select_template_menu(self):
-        Відображає в консолі меню для вибору шаблону
-    """
-
-    def __init__(self):
-        self.current_template: Template = Template()
-
-    def start_menu(self):
-        """Відображає в консолі головне меню"""
-
-        while True:
-            system('cls')
-            print('HTML Linter v{}'.format(__version__))
-            print('Вибраний шаблон: {}'.format(self.current_template.name))
-            print('\n1.Перевірити каталог з Html файлами')
-            print('2.Шаблони')
-            print('\n0.Вихід')
-
-            command = input('\nВиберіть пункт: ').strip()
-            
-            if command == '0':
-                exit()
-            elif command == '1':
-                self._check_folder_menu()
-            elif command == '2':
-                self._templates_menu()
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-                continue
+        if self.zero_copy and self.fast_scan and not self.validate_only:
+            self._source.append(data)
+        super().feed(data)
 
-    def _check_folder_menu(self):
-        """Відображає в консолі меню для вибору каталогу з Html файлами"""
-
-        while True:
-            system('cls')
-            path = input('Введіть шлях до каталогу: ')
-            
-            if not exists(path):
-                print('Шлях "{}" не знайдено.')
-                input('\nНатисніть Enter щоби продовжити.')
-                continue
+    def goahead(self, end: bool):
+        """Розбирає прочитаний текст, наскільки це можливо
 
-            self._check_folder(path)
-            break
+        Повторює HTMLParser.goahead, але поширені теги розбирає одним
+        виразом без атрибутів і позиції кожного тегу, а позицію рахує
+        один раз для всього розібраного тексту. Текст, коментарі та
+        інша розмітка лишаются як у файлі, без перетворення посилань
+        на символи.
 
-    def _check_folder(self, path: str):
-        """Перевіряє вибраний каталог з Html файлами
-        
         Parameters
         ----------
-        path : str
-            Шлях до каталогу який потрібно перевірити
-        
+        end : bool
+            Розібрати весь текст, як перед кінцем файлу?
         """
 
-        html_files_count = 0
-        for root, _, files in walk(path):
-            for file in files:
-                if file.__contains__('.') and file.split('.')[1] == 'html':
-                    Html.check_file(join(root, file), self.current_template)
-                    html_files_count += 1
-
-        print('Перевірено {} файлів'.format(html_files_count))
-        input('\nНатисніть Enter щоби продовжити.')
-
-    def _templates_menu(self):
-        """Відображає в консолі меню для операції з шаблонами"""
-
-        while True:
-            system('cls')
-            print('HTML Linter v{}'.format(__version__))
-            print('Вибраний шаблон: {}'.format(self.current_template.name))
-            print('\n1. Вибрати шаблон')
-            print('2. Редагувати шаблон')
-            print('3. Створити шаблон')
-            print('4. Видалити шаблон')
-            print('\n0. Назад')
-
-            command = input('\nВиберіть пункт: ').strip()
-
-            if command == '0':
-                break
-            elif command == '1':
-                self._select_template_menu()
-            elif command == '2':
-                self._edit_template_menu()
-            elif command == '3':
-                self._create_template_menu()
-            elif command == '4':
-                self.delete_template()
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-                continue
-
-    def _edit_template_menu(self):
-        if self.current_template.is_default:
-            print('Неможливо редагувати шаблон за замовчуванням')
-            input('\nНатисніть Enter щоби продовжити.')
+        if not self.fast_scan:
+            super().goahead(end)
+            self._flush_text()
             return
 
-        while True:
-            system('cls')
-            print('HTML Linter v{}'.format(__version__))
-            print('Вибраний шаблон: {}'.format(self.current_template.name))
-            print('1. Використовувати табуляцію замість пробілів: {}'.format(
-                ('Так' if self.current_template.use_tab_character else 'Ні')
-            ))
-            print('2. Використовувати розумну табуляцію: {}'.format(
-                ('Так' if self.current_template.smart_tab else 'Ні')
-            ))
-            print('3. Кількість відступів для дочірніх тегів: {}'.format(
-                self.current_template.indent
-            ))
-            print('4. Кількість відступів для атрибутів: {}'.format(
-                self.current_template.continuation_indend
-            ))
-            print('5. Зберігати відступи на пустих строчках: {}'.format(
-                ('Так' if self.current_template.keep_indents_on_empty_lines else 'Ні')
-            ))
-            print('6. Ділити строчки після стовбчика: {}'.format(
-                self.current_template.hard_wrap_column
-            ))
-            print('7. Зберігати перенос строки: {}'.format(
-                ('Так' if self.current_template.keep_line_breaks else 'Ні')
-            ))
-            print('8. Зберігати перенос строки у тексті: {}'.format(
-                ('Так' if self.current_template.keep_line_breaks_in_text else 'Ні')
-            ))
-            print('9. Кількість порожніх строк що треба зберігати: {}'.format(
-                self.current_template.keep_blank_lines
-            ))
-            if self.current_template.wrap_attributes == Template.DO_NOT_WRAP:
-                print('10. Перенос атрибутів: Не переносити')
-            elif self.current_template.wrap_attributes == Template.WRAP_IF_LONG:
-                print('10. Перенос атрибутів: Якщо тег довгий')
-            elif self.current_template.wrap_attributes == Template.CHOP_DOWN_IF_LONG:
-                print('10. Перенос атрибутів: Якщо тег довгий, переносити всі атрибути')
-            elif self.current_template.wrap_attributes == Template.WRAP_ALWAYS:
-                print('10. Перенос атрибутів: Переносити всі атрибути')
-            print('11. Переносити текст на наступні строчки: {}'.format(
-                ('Так' if self.current_template.wrap_text else 'Ні')
-            ))
-            print('12. Вирівнювати атрибути: {}'.format(
-                ('Так' if self.current_template.align_attributes else 'Ні')
-            ))
-            print('13. Вирівнювати текст: {}'.format(
-                ('Так' if self.current_template.align_text else 'Ні')
-            ))
-            print('14. Зберігати табуляцію: {}'.format(
-                ('Так' if self.current_template.keep_white_spaces else 'Ні')
-            ))
-            print('15. Вставити пробіл навколо "=" у атрибутах: {}'.format(
-                ('Так' if self.current_template.space_around_eq_in_attribute else 'Ні')
-            ))
-            print('16. Вставити пробіл після назви тегу: {}'.format(
-                ('Так' if self.current_template.space_after_tag_name else 'Ні')
-            ))
-            print('17. Вставити пробіл у порожньому тегу: {}'.format(
-                ('Так' if self.current_template.space_in_empty_tag else 'Ні')
-            ))
-            print('18. Вставити перенос строки перед тегами: {}'.format(
-                str(self.current_template.insert_new_line_before)
-            ))
-            print('19. Видалити перенос строки перед тегами: {}'.format(
-                str(self.current_template.remove_new_line_before)
-            ))
-            print('20. Не робити відступи для дочірніх тегів: {}'.format(
-                str(self.current_template.dont_indent_child)
-            ))
-            print('21. Не робити відступи для дочірніх тегів де кількість строчок більше: {}'.format(
-                self.current_template.dont_indent_child_tag_size
-            ))
-            print('22. Теги які не переносити на іншу строчку: {}'.format(
-                str(self.current_template.inline_elements)
-            ))
-            print('23. Зберігати відступи у тегах: {}'.format(
-                str(self.current_template.keep_white_space_inside)
-            ))
-            print('24. Не ділити тег на строчки: {}'.format(
-                str(self.current_template.dont_break_if_inline_content)
-            ))
-            print('25. Вставити перенос строки перед першим тегом: {}'.format(
-                ('Якщо тег не на одній строчці' if self.current_template.new_line_before_first_attr else 'Ні')
-            ))
-            print('26. Вставити перенос строки після останнього тега: {}'.format(
-                ('Якщо тег не на одній строчці' if self.current_template.new_line_after_last_attr else 'Ні')
-            ))
-            if self.current_template.generate_quote_marks == Template.NONE:
-                print('27. Замінити лапки у атрибутах: Не заміняти')
-            elif self.current_template.generate_quote_marks == Template.SINGLE:
-                print('27. Замінити лапки у атрибутах: На одинарні')
-            elif self.current_template.generate_quote_marks == Template.DOUBLE:
-                print('27. Замінити лапки у атрибутах: На подвійні')
-            print('\n0. Назад')
-
-            command = input('\nВиберіть пункт: ').strip()
-
-            if command == '0':
-                break
-            
-            menus = {
-                '1': self.menu_use_tab_character,
-                '2': self.menu_smart_tab,
-                '3': self.menu_indent,
-                '4': self.menu_continuation_indend,
-                '5': self.menu_keep_indents_on_empty_lines,
-                '6': self.menu_hard_wrap_column,
-                '7': self.menu_keep_line_breaks,
-                '8': self.menu_keep_line_breaks_in_text,
-                '9': self.menu_keep_blank_lines,
-                '10': self.menu_wrap_attributes,
-                '11': self.menu_wrap_text,
-                '12': self.menu_align_attributes,
-                '13': self.menu_align_text,
-                '14': self.menu_keep_white_spaces,
-                '15': self.menu_space_around_eq_in_attribute,
-                '16': self.menu_space_after_tag_name,
-                '17': self.menu_space_in_empty_tag,
-                '18': self.menu_insert_new_line_before,
-                '19': self.menu_remove_new_line_before,
-                '20': self.menu_dont_indent_child,
-                '21': self.menu_dont_indent_child_tag_size,
-                '22': self.menu_inline_elements,
-                '23': self.menu_keep_white_space_inside,
-                '24': self.menu_dont_break_if_inline_content,
-                '25': self.menu_new_line_before_first_attr,
-                '26': self.menu_new_line_after_last_attr,
-                '27': self.menu_generate_quote_marks,
-            }
-            try:
-                menus[command]()
-            except KeyError:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-
-    def menu_use_tab_character(self):
-        while True:
-            system('cls')
-            print('Використовувати табуляцію замість пробілів?')
-            print('1. Так')
-            print('2. Ні')
-
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
-
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.use_tab_character = True
-                break
-            elif command == '2':
-                self.current_template.use_tab_character = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
-
-    def menu_smart_tab(self):
-        while True:
-            system('cls')
-            print('Використовувати розумну табуляцію?')
-            print('1. Так')
-            print('2. Ні')
-
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
-
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.smart_tab = True
-                break
-            elif command == '2':
-                self.current_template.smart_tab = False
-                break
+        rawdata = self.rawdata
+        validate = self.validate_only
+        spans = self.zero_copy
+        copy_text = not spans and not validate
+        base = self._offset
+        opened_pos = self._opened_pos
+        append_text = self.append_text
+        start_match = START_TAG_FAST_RE.match
+        end_match = END_TAG_FAST_RE.match
+        i = 0
+        n = len(rawdata)
+        while i < n:
+            if self.cdata_elem is None:
+                j = rawdata.find('<', i)
+                if j < 0:
+                    j = n
             else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
-
-    def menu_indent(self):
-        while True:
-            system('cls')
-            print('Кількість відступів для дочірніх тегів?')
-            command = input('\nВведіть кількість відступів, або нічого щоби повернутися: ').strip()
-
-            if not command:
-                break
-            try:
-                self.current_template.indent = int(command)
-                self.current_template.save()
-            except ValueError:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-
-    def menu_continuation_indend(self):
-        while True:
-            system('cls')
-            print('Кількість відступів для атрибутів?')
-            command = input('\nВведіть кількість відступів, або нічого щоби повернутися: ').strip()
-
-            if not command:
-                break
-            try:
-                self.current_template.continuation_indend = int(command)
-                self.current_template.save()
-            except ValueError:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
+                match = self.interesting.search(rawdata, i)
+                if not match:
+                    break
+                j = match.start()
+            if i < j and copy_text:
+                append_text(rawdata[i:j])
+            i = j
+            if i == n:
+                break
+
+            match = start_match(rawdata, i)
+            if match:
+                name = match.group(1).lower()
+                k = match.end()
+                closed = bool(match.group(2))
+                if validate:
+                    if not closed:
+                        self._opened_names.append(name)
+                elif spans:
+                    self._start_span(name, base + i, base + k, closed)
+                elif closed:
+                    self.start_end_tag(name, match.group())
+                else:
+                    self.start_tag(name, match.group())
+                if not closed:
+                    opened_pos.append(base + i)
+                    if name in self.CDATA_CONTENT_ELEMENTS:
+                        self.set_cdata_mode(name)
+                i = k
+                continue
+            match = end_match(rawdata, i)
+            if match:
+                name = match.group(1).lower()
+                k = match.end()
+                if self.cdata_elem is not None and name != self.cdata_elem:
+                    if copy_text:
+                        append_text(match.group())
+                else:
+                    if validate:
+                        self._end_name(name)
+                    elif spans:
+                        self._end_span(name, base + i, base + k)
+                    else:
+                        self.end_tag(name, match.group())
+                    self.clear_cdata_mode()
+                i = k
+                continue
 
-    def menu_keep_indents_on_empty_lines(self):
-        while True:
-            system('cls')
-            print('Зберігати відступи на пустих строчках?')
-            print('1. Так')
-            print('2. Ні')
+            k = self._parse_markup(i, end)
+            if k < 0:
+                break
+            i = k
+
+        if end and i < n and self.cdata_elem is None:
+            if copy_text:
+                append_text(rawdata[i:n])
+            i = n
+        if spans and not validate:
+            # Відкриті теги закінчуются в кінці розібраного тексту
+            for tag in self._opened_tags:
+                if tag._source is not None:
+                    tag._end = base + i
+        # Розібраний текст далі не зберігаєтся, тому позиції відкритих
+        # тегів рахуются зараз, а лінії решти тексту пропускаются
+        self._resolve_positions()
+        self._move_line_cursor(i)
+        self._flush_text()
+        self.updatepos(0, i)
+        self.rawdata = rawdata[i:]
+        self._offset = base + i
+
+    def _parse_markup(self, i: int, end: bool) -> int:
+        """Метод розбирає розмітку з позиції i методами HTMLParser
+
+        Методи HTMLParser викликають handle_starttag, handle_endtag
+        та handle_startendtag, які тільки запам'ятовують тег. Тег
+        додаєтся у дерево з текстом розмітки як у файлі, а розмітка
+        без тегу додаєтся як текст.
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+        Returns
+        -------
+        position : int
+            Позиція після розібраної розмітки, або -1 якщо розмітка
+            обрізана кінцем прочитаного тексту
+        """
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.keep_indents_on_empty_lines = True
-                break
-            elif command == '2':
-                self.current_template.keep_indents_on_empty_lines = False
-                break
+        rawdata = self.rawdata
+        startswith = rawdata.startswith
+        next_char = rawdata[i + 1:i + 2]
+        self._markup_tag = None
+        if next_char.isascii() and next_char.isalpha():
+            k = self.parse_starttag(i)
+        elif startswith('</', i):
+            k = self.parse_endtag(i)
+        elif startswith('<!--', i):
+            k = self.parse_comment(i)
+        elif startswith('<?', i):
+            k = self.parse_pi(i)
+        elif startswith('<!', i):
+            k = self.parse_html_declaration(i)
+        elif i + 1 < len(rawdata):
+            k = i + 1
+        else:
+            return -1
+        if k < 0:
+            if not end:
+                return k
+            k = rawdata.find('>', i + 1)
+            if k < 0:
+                k = rawdata.find('<', i + 1)
+                if k < 0:
+                    k = i + 1
             else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+                k += 1
+
+        base = self._offset
+        if self._markup_tag is None:
+            if not self.zero_copy and not self.validate_only:
+                self.append_text(rawdata[i:k])
+            return k
+        kind, name = self._markup_tag
+        if kind == 'start':
+            self._opened_pos.append(base + i)
+        if self.validate_only:
+            if kind == 'end':
+                self._end_name(name)
+            elif kind == 'start':
+                self._opened_names.append(name)
+        elif kind == 'end':
+            if self.zero_copy:
+                self._end_span(name, base + i, base + k)
+            else:
+                self.end_tag(name, rawdata[i:k])
+        elif self.zero_copy:
+            self._start_span(name, base + i, base + k, kind == 'startend')
+        elif kind == 'startend':
+            self.start_end_tag(name, rawdata[i:k])
+        else:
+            self.start_tag(name, rawdata[i:k])
+        return k
 
-    def menu_hard_wrap_column(self):
-        while True:
-            system('cls')
-            print('Ділити строчки після стовбчика?')
-            command = input('\nВведіть кількість стовбчиків, або нічого щоби повернутися: ').strip()
+    def _start_span(self, name: str, start: int, end: int, closed: bool):
+        """Метод додає у дерево тег, текст якого береться з _source
 
-            if not command:
-                break
-            try:
-                self.current_template.hard_wrap_column = int(command)
-                self.current_template.save()
-            except ValueError:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
+        Parameters
+        ----------
+        name : str
+            Ім'я тегу у нижньому регістрі
+        start, end : int
+            Межі початкового тегу у _source
+        closed : bool
+            Тег без кінцевого тегу?
+        """
 
-    def menu_keep_line_breaks(self):
-        while True:
-            system('cls')
-            print('Зберігати перенос строки?')
-            print('1. Так')
-            print('2. Ні')
+        parent = self._opened_tags[-1]
+        tag = self.tag_class(name, None, parent)
+        tag._source = self._source
+        tag._start = start
+        tag._end = end
+        if parent._source is None:
+            # Шматки батька вже створені, наприклад для повідомлення
+            # про недійсну розмітку
+            parent._build_child(tag)
+        else:
+            tag._index = len(parent.childs)
+            parent.childs.append(tag)
+        if not closed:
+            self._opened_tags.append(tag)
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+    def _end_span(self, name: str, start: int, end: int):
+        """Метод закриває останній відкритий тег, див. end_tag
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.keep_line_breaks = True
-                break
-            elif command == '2':
-                self.current_template.keep_line_breaks = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+        Parameters
+        ----------
+        name : str
+            Ім'я тегу у нижньому регістрі
+        start, end : int
+            Межі кінцевого тегу у _source
+        """
 
-    def menu_keep_line_breaks_in_text(self):
-        while True:
-            system('cls')
-            print('Зберігати перенос строки у тексті?')
-            print('1. Так')
-            print('2. Ні')
+        tag = self._opened_tags[-1]
+        if tag.name == name:
+            tag._end = end
+        else:
+            tag._end = start
+            if not self.break_html:
+                self.error_no_closed_tags(name)
+                self.break_html = True
+            if tag.parent is None:
+                # Кінцевий тег без початкового не закриває корневий тег
+                return
+        del self._opened_tags[-1]
+        del self._opened_pos[-1]
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+    def _end_name(self, name: str):
+        """Метод закриває останнє відкрите ім'я тегу, див. validate_only
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.keep_line_breaks_in_text = True
-                break
-            elif command == '2':
-                self.current_template.keep_line_breaks_in_text = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+        Parameters
+        ----------
+        name : str
+            Ім'я тегу у нижньому регістрі
+        """
 
-    def menu_keep_blank_lines(self):
-        while True:
-            system('cls')
-            print('Кількість порожніх строк що треба зберігати?')
-            command = input('\nВведіть кількість строчок, або нічого щоби повернутися: ').strip()
+        if self._opened_names[-1] != name:
+            if not self.break_html:
+                self.error_no_closed_tags(name)
+                self.break_html = True
+            if len(self._opened_names) == 1:
+                return
+        del self._opened_names[-1]
+        del self._opened_pos[-1]
 
-            if not command:
-                break
-            try:
-                self.current_template.keep_blank_lines = int(command)
-                self.current_template.save()
-            except ValueError:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
+    def _resolve_positions(self):
+        """Метод рахує лінію та стовбчик відкритих тегів у rawdata
 
-    def menu_wrap_attributes(self):
-        while True:
-            system('cls')
-            print('Переносити атрибути?')
-            print('1. Не переносити')
-            print('2. Переносити атрибут якщо він довгий')
-            print('3. Переносити всі атрибути якщо тег довгий')
-            print('4. Переносити атрибути завжди')
+        Пораховані позиції замінюют позиції у прочитаному тексті.
+        Такі теги завжди в кінці списку відкритих тегів, а їх позиції
+        йдуть по порядку, тому кожна лінія рахуєтся один раз.
+        """
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+        positions = self._opened_pos
+        first = len(positions)
+        while first and type(positions[first - 1]) is int:
+            first -= 1
+        for index in range(first, len(positions)):
+            positions[index] = self._move_line_cursor(
+                positions[index] - self._offset
+            )
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.wrap_attributes = Template.DO_NOT_WRAP
-                break
-            elif command == '2':
-                self.current_template.wrap_attributes = Template.WRAP_IF_LONG
-                break
-            elif command == '3':
-                self.current_template.wrap_attributes = Template.CHOP_DOWN_IF_LONG
-                break
-            elif command == '4':
-                self.current_template.wrap_attributes = Template.WRAP_ALWAYS
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+    def _move_line_cursor(self, index: int) -> Tuple[int, int]:
+        """Метод пересуває _line_cursor до позиції index у rawdata
 
-    def menu_wrap_text(self):
-        while True:
-            system('cls')
-            print('Переносити текст тега на наступні строчки?')
-            print('1. Так')
-            print('2. Ні')
+        Таб рахуєтся як чотири стовбчики, як у Tag.get_pos.
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+        Returns
+        -------
+        line, col : (int, int)
+            Лінія та стовбчик позиції index
+        """
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.wrap_text = True
-                break
-            elif command == '2':
-                self.current_template.wrap_text = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+        rawdata = self.rawdata
+        offset, line, width = self._line_cursor
+        start = offset - self._offset
+        lines_count = rawdata.count('\n', start, index)
+        if lines_count:
+            line += lines_count
+            start = rawdata.rfind('\n', start, index) + 1
+            width = 0
+        width += index - start + 3 * rawdata.count('\t', start, index)
+        self._line_cursor = (self._offset + index, line, width)
+        return line, width + 1
+
+    def start_tag(self, name: str, text: str):
+        """Додає у дерево відкритий тег
 
-    def menu_align_attributes(self):
-        while True:
-            system('cls')
-            print('Вирівнювати атрибути?')
-            print('1. Так')
-            print('2. Ні')
+        Parameters
+        ----------
+        name : str
+            Ім'я тегу у нижньому регістрі
+        text : str
+            Текст початкового тегу
+        """
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+        self._flush_text()
+        tag = self.tag_class(name, text, self._opened_tags[-1])
+        self._opened_tags[-1]._build_child(tag)
+        self._opened_tags.append(tag)
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.align_attributes = True
-                break
-            elif command == '2':
-                self.current_template.align_attributes = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+    def start_end_tag(self, name: str, text: str):
+        """Додає у дерево тег без кінцевого тегу, див. start_tag"""
 
-    def menu_align_text(self):
-        while True:
-            system('cls')
-            print('Вирівнювати текст?')
-            print('1. Так')
-            print('2. Ні')
+        self._flush_text()
+        tag = self.tag_class(name, text, self._opened_tags[-1])
+        self._opened_tags[-1]._build_child(tag)
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+    def end_tag(self, name: str, text: str):
+        """Закриває останній відкритий тег
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.align_text = True
-                break
-            elif command == '2':
-                self.current_template.align_text = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+        Якщо ім'я не збігаєтся з ім'ям тегу, розмітка недійсна.
 
-    def menu_keep_white_spaces(self):
-        while True:
-            system('cls')
-            print('Зберігати табуляцію?')
-            print('1. Так')
-            print('2. Ні')
+        Parameters
+        ----------
+        name : str
+            Ім'я тегу у нижньому регістрі
+        text : str
+            Текст кінцевого тегу
+        """
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+        if self._opened_tags[-1].name == name:
+            self.append_text(text)
+            self._flush_text()
+        else:
+            self._flush_text()
+            if not self.break_html:
+                self.error_no_closed_tags(name)
+                self.break_html = True
+            if self._opened_tags[-1].parent is None:
+                return
+        del self._opened_tags[-1]
+        del self._opened_pos[-1]
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.keep_white_spaces = True
-                break
-            elif command == '2':
-                self.current_template.keep_white_spaces = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+    def handle_starttag(self, tag: str, attrs: dict):
+        """Метод ловить початкові теги"""
 
-    def menu_space_around_eq_in_attribute(self):
-        while True:
-            system('cls')
-            print('Встаити пробіл навколо "=" у атрибутах?')
-            print('1. Так')
-            print('2. Ні')
+        if self.fast_scan:
+            self._markup_tag = ('start', tag)
+        else:
+            self.start_tag(tag, self.get_starttag_text())
+            # Без власного розбору позиція береться у HTMLParser, який
+            # рахує таб як один стовбчик
+            line, col = self.getpos()
+            self._opened_pos.append((line, col + 1))
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+    def handle_endtag(self, tag: str):
+        """Метод ловить кінцеві теги"""
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.space_around_eq_in_attribute = True
-                break
-            elif command == '2':
-                self.current_template.space_around_eq_in_attribute = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+        if self.fast_scan:
+            self._markup_tag = ('end', tag)
+        else:
+            self.end_tag(tag, '</{}>'.format(tag))
 
-    def menu_space_after_tag_name(self):
-        while True:
-            system('cls')
-            print('Вставити пробіл після назви тегу?')
-            print('1. Так')
-            print('2. Ні')
+    def handle_startendtag(self, tag: str, attrs: dict):
+        """Метод ловить початково-кінцеві теги"""
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+        if self.fast_scan:
+            self._markup_tag = ('startend', tag)
+        else:
+            self.start_end_tag(tag, self.get_starttag_text())
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.space_after_tag_name = True
-                break
-            elif command == '2':
-                self.current_template.space_after_tag_name = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+    def handle_data(self, data: str):
+        """Метод ловить текст"""
 
-    def menu_space_in_empty_tag(self):
-        while True:
-            system('cls')
-            print('Вставити пробіл у порожніх тегах?')
-            print('1. Так')
-            print('2. Ні')
+        if not self.fast_scan:
+            self.append_text(data)
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+    def handle_comment(self, data: str):
+        """Метод ловить коментарії"""
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.space_in_empty_tag = True
-                break
-            elif command == '2':
-                self.current_template.space_in_empty_tag = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+        if not self.fast_scan:
+            self.append_text('<!-- {} -->'.format(data))
 
-    def menu_insert_new_line_before(self):
-        while True:
-            system('cls')
-            print('Вставити перенос строки перед тегами: ')
-            print(', '.join(self.current_template.insert_new_line_before))
+    def handle_decl(self, data: str):
+        """Метод ловить інформацію файла"""
 
-            command = input('\nВведіть теги через кому, або нічого щоб повернутися: ').strip()
+        if not self.fast_scan:
+            self.append_text('<!{}>'.format(data))
 
-            if not command:
-                break
-            else:
-                self.current_template.insert_new_line_before = command.replace(' ', '').split(',')
-        self.current_template.save()
+    def append_text(self, text: str):
+        """Метод додає текст у останній відкритий тег"""
 
-    def menu_remove_new_line_before(self):
-        while True:
-            system('cls')
-            print('Видалити перенос строки перед тегами: ')
-            print(', '.join(self.current_template.remove_new_line_before))
+        self._text_parts.append(text)
 
-            command = input('\nВведіть теги через кому, або нічого щоб повернутися: ').strip()
+    def _flush_text(self):
+        """Метод додає накопичений текст у останній відкритий тег"""
 
-            if not command:
-                break
-            else:
-                self.current_template.remove_new_line_before = command.replace(' ', '').split(',')
-        self.current_template.save()
+        if self._text_parts:
+            self._opened_tags[-1]._build_text(''.join(self._text_parts))
+            self._text_parts.clear()
 
-    def menu_dont_indent_child(self):
-        while True:
-            system('cls')
-            print('Не робити відступи для дочірніх тегів: ')
-            print(', '.join(self.current_template.dont_indent_child))
+    @classmethod
+    def check_file(cls, path: str, template: CompiledTemplate, 
+                   write: bool = True, profile: bool = False,
+                   tracer=None,
+                   lines: Optional[List[LineRange]] = None
+                   ) -> 'CheckResult':
+        """Перевіряє html файл за вказаним шаблоном
+        
+        Parameters
+        ----------
+        path : str
+            Шлях до файлу
+        template : CompiledTemplate
+            Шаблон перевірки
+        write : bool
+            Записати відформатований текст у файл, якщо він змінився?
+        profile : bool
+            Рахувати статистику правил у CheckResult.profile?
+        tracer : Optional[tracing.Tracer]
+            Траса, у яку записуются етапи перевірки
+        lines : Optional[List[LineRange]]
+            Форматувати тільки теги на цих строчках, див.
+            LintPipeline.lint_lines
 
-            command = input('\nВведіть теги через кому, або нічого щоб повернутися: ').strip()
+        Returns
+        -------
+        result : CheckResult
+            Результат перевірки файлу
+        """
 
-            if not command:
-                break
+        html = cls(path)
+        result = CheckResult(path)
+        if profile:
+            result.profile = LintProfile()
+
+        # Стан файлу береться до читання, тому зміна файлу під час
+        # перевірки змінить mtime і не потрапить у кеш як перевірена
+        file_stat = stat(path)
+        result.size = file_stat.st_size
+        result.mtime = file_stat.st_mtime_ns
+        with trace_span(tracer, 'read', path):
+            data = read_file(path)
+        result.digest = text_digest(data)
+
+        with trace_span(tracer, 'feed', path):
+            html.feed(data)
+
+        html.check_closed_tags()
+        if html.break_html:
+            result.errors = html.errors
+            return result
+        
+        with trace_span(tracer, 'lint', path):
+            pipeline = LintPipeline(template, cls.tag_class, result.profile,
+                                    tracer)
+            if lines is None:
+                pipeline.lint(html._root_tag)
             else:
-                self.current_template.dont_indent_child = command.replace(' ', '').split(',')
-        self.current_template.save()
+                pipeline.lint_lines(html._root_tag, lines)
 
-    def menu_dont_indent_child_tag_size(self):
-        while True:
-            system('cls')
-            print('Не робити відступи для дочірніх тегів де кількість строчок більше')
-            command = input('\nВведіть кількість строчок, або нічого щоби повернутися: ').strip()
+        # Незмінений файл не перезаписується, щоби не змінювати його mtime
+        with trace_span(tracer, 'compare', path):
+            result.changed = not html._root_tag.is_text_equal(data)
+        if write and result.changed:
+            with trace_span(tracer, 'write', path):
+                cls.write_file(path, html._root_tag)
+        return result
 
-            if not command:
-                break
-            try:
-                self.current_template.dont_indent_child_tag_size = int(command)
-                self.current_template.save()
-            except ValueError:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
+    @classmethod
+    def validate_file(cls, path: str, tracer=None) -> 'CheckResult':
+        """Перевіряє тільки розмітку html файлу, без форматування
 
-    def menu_inline_elements(self):
-        while True:
-            system('cls')
-            print('Теги які не переносити на іншу строчку: ')
-            print(', '.join(self.current_template.inline_elements))
+        Дерево тегів не будуєтся, див. validate_only, тому перевірка
+        набагато швидша за check_file, а файл ніколи не змінюєтся.
 
-            command = input('\nВведіть теги через кому, або нічого щоб повернутися: ').strip()
+        Parameters
+        ----------
+        path : str
+            Шлях до файлу
+        tracer : Optional[tracing.Tracer]
+            Траса, у яку записуются етапи перевірки
 
-            if not command:
-                break
-            else:
-                self.current_template.inline_elements = command.replace(' ', '').split(',')
-        self.current_template.save()
+        Returns
+        -------
+        result : CheckResult
+            Результат перевірки файлу, з повідомленнями у errors якщо
+            розмітка недійсна
+        """
 
-    def menu_keep_white_space_inside(self):
-        while True:
-            system('cls')
-            print('Зберігати відступи у тегах: ')
-            print(', '.join(self.current_template.keep_white_space_inside))
+        html = cls(path)
+        html.validate_only = True
+        result = CheckResult(path)
+        with trace_span(tracer, 'read', path):
+            data = read_file(path)
+        with trace_span(tracer, 'feed', path):
+            html.feed(data)
+            html.check_closed_tags()
+        result.errors = html.errors
+        return result
 
-            command = input('\nВведіть теги через кому, або нічого щоб повернутися: ').strip()
+    @staticmethod
+    def write_file(path: str, root_tag: Tag):
+        """Записує текст дерева тегів у файл через тимчасовий файл
 
-            if not command:
-                break
-            else:
-                self.current_template.keep_white_space_inside = command.replace(' ', '').split(',')
-        self.current_template.save()
+        Текст пишеться у тимчасовий файл поруч, який потім замінює
+        основний файл, тому файл ніколи не буде записаний наполовину.
 
-    def menu_dont_break_if_inline_content(self):
-        while True:
-            system('cls')
-            print('Не ділити тег на строчки: ')
-            print(', '.join(self.current_template.dont_break_if_inline_content))
+        Parameters
+        ----------
+        path : str
+            Шлях до файлу
+        root_tag : Tag
+            Корневий тег дерева тегів
+        """
 
-            command = input('\nВведіть теги через кому, або нічого щоб повернутися: ').strip()
+        with NamedTemporaryFile('w', dir=dirname(path) or '.',
+                                prefix='.html-linter-', suffix='.tmp',
+                                delete=False) as file:
+            try:
+                file.writelines(root_tag.iter_text())
+            except BaseException:
+                file.close()
+                remove(file.name)
+                raise
+        copymode(path, file.name)
+        replace(file.name, path)
+
+    def format_text(self, text: str, template: CompiledTemplate,
+                    lines: Optional[List[LineRange]] = None
+                    ) -> Optional[str]:
+        """Форматує текст за шаблоном
 
-            if not command:
-                break
-            else:
-                self.current_template.dont_break_if_inline_content = command.replace(' ', '').split(',')
-        self.current_template.save()
+        Parameters
+        ----------
+        text : str
+            Html текст
+        template : CompiledTemplate
+            Шаблон форматування
+        lines : Optional[List[LineRange]]
+            Форматувати тільки теги на цих строчках, див.
+            LintPipeline.lint_lines
 
-    def menu_new_line_before_first_attr(self):
-        while True:
-            system('cls')
-            print('Вставити перенос строки перед першим тегом?')
-            print('1. Якщо тег не на одній строчці')
-            print('2. Ні')
+        Returns
+        -------
+        text : Optional[str]
+            Відформатований текст, або None якщо розмітка недійсна,
+            тоді повідомлення у errors
+        """
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+        self.feed(text)
+        self.check_closed_tags()
+        if self.break_html:
+            return None
+        pipeline = LintPipeline(template, self.tag_class)
+        if lines is None:
+            pipeline.lint(self._root_tag)
+        else:
+            pipeline.lint_lines(self._root_tag, lines)
+        return ''.join(self._root_tag.iter_text())
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.new_line_before_first_attr = True
-                break
-            elif command == '2':
-                self.current_template.new_line_before_first_attr = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+    def check_closed_tags(self):
+        """Перевіряє що після розбору всього тексту всі теги закриті"""
 
-    def menu_new_line_after_last_attr(self):
-        while True:
-            system('cls')
-            print('Вставити перенос строки після останнього тега?')
-            print('1. Якщо тег не на одній строчці')
-            print('2. Ні')
+        # Обрізана розмітка в кінці тексту стає текстом
+        self.goahead(True)
+        if not self.break_html:
+            if len(self._opened_pos) != 1:
+                self.error_no_closed_tags('')
+                self.break_html = True
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
+    def error_no_closed_tags(self, tag_name: str):
+        """Метод записує інформацію про плоху розмітку Html у errors
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.new_line_after_last_attr = True
-                break
-            elif command == '2':
-                self.current_template.new_line_after_last_attr = False
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+        Позиції тегів пораховані під час розбору, див. _opened_pos,
+        тому повідомлення про кожен тег не рахує текст дерева.
+        
+        Parameters
+        ----------
+        tag_name : str
+            Ім'я тегу після якого існують не закриті теги.
+        """
 
-    def menu_generate_quote_marks(self):
-        while True:
-            system('cls')
-            print('Замінити лапки у атрибутах?')
-            print('1. Не заміняти')
-            print('2. На одинарні')
-            print('3. На подвійні')
+        self.errors.append(
+            'Error: Нейдійсна розмітка "{}"'.format(self.path)
+        )
+        if self.validate_only:
+            names = self._opened_names
+        else:
+            names = [tag.name for tag in self._opened_tags]
+        tag_index = len(names) - 1
+        while tag_index and names[tag_index] != tag_name:
+            tag_index -= 1
+
+        self._resolve_positions()
+        for index in range(tag_index + 1, len(names)):
+            line, col = self._opened_pos[index]
+            self.errors.append(
+                'Незакритий тег "{}" на лінії {} та стовбчику {}'.format(
+                    names[index], line, col
+                )
+            )
 
-            print('\n0. Назад')
-            command = input('\nВиберіть пункт: ').strip()
 
-            if command == '0':
-                break
-            elif command == '1':
-                self.current_template.generate_quote_marks = Template.NONE
-                break
-            elif command == '2':
-                self.current_template.generate_quote_marks = Template.SINGLE
-                break
-            elif command == '3':
-                self.current_template.generate_quote_marks = Template.DOUBLE
-                break
-            else:
-                print('Невірна команда.')
-                input('\nНатисніть Enter щоби продовжити.')
-        self.current_template.save()
+class CheckResult:
+    """Результат перевірки Html файлу
 
-    def _create_template_menu(self):
-        """Відображає в консолі меню для створення шаблону"""
+    Attributes
+    ----------
+    path : str
+        Шлях до файлу
+    changed : bool
+        True якщо відформатований текст відрізняється від файлу
+    cached : bool
+        True якщо файл пропущено, бо кеш знає що він відформатований
+    errors : List[str]
+        Повідомлення про недійсну розмітку або помилку перевірки
+    size : int
+        Розмір файлу до перевірки
+    mtime : int
+        Час зміни файлу до перевірки у наносекундах
+    digest : str
+        Хеш тексту файлу до перевірки
+    profile : Optional[LintProfile]
+        Статистика правил форматування, якщо її рахували
+    trace : List[dict]
+        Події траси процесу-робітника, які ще не додані у трасу
+    """
 
-        while True:
-            system('cls')
-            print('HTML Linter v{}'.format(__version__))
+    def __init__(self, path: str):
+        self.path: str = path
+        self.changed: bool = False
+        self.cached: bool = False
+        self.errors: List[str] = []
+        self.size: int = 0
+        self.mtime: int = 0
+        self.digest: str = ''
+        self.profile: Optional[LintProfile] = None
+        self.trace: List[dict] = []
+
+    @property
+    def ok(self) -> bool:
+        """True якщо файл перевірено без помилок"""
+        return not self.errors
+
+
+# Шаблон процесу-робітника, задається в _init_worker
+_worker_template: Optional[CompiledTemplate] = None
+_worker_write: bool = True
+_worker_stream: bool = False
+_worker_profile: bool = False
+_worker_tracer = None
+_worker_lines: Optional[List[LineRange]] = None
+_worker_validate: bool = False
+
+
+def _init_worker(template: CompiledTemplate, write: bool, stream: bool,
+                 profile: bool, tracer, lines: Optional[List[LineRange]],
+                 validate: bool):
+    """Функція зберігає шаблон у процесі-робітнику"""
+
+    global _worker_template, _worker_write, _worker_stream, _worker_profile
+    global _worker_tracer, _worker_lines, _worker_validate
+    _worker_template = template
+    _worker_write = write
+    _worker_stream = stream
+    _worker_profile = profile
+    _worker_tracer = tracer
+    _worker_lines = lines
+    _worker_validate = validate
+
+
+def _check_file_in_worker(path: str) -> CheckResult:
+    """Функція перевіряє файл шаблоном процесу-робітника
+
+    Події траси робітника вертаются разом з результатом.
+    """
 
-            name = input(('\nВведить назву шаблону, або нічого щоб '
-                          'повернутися до попереднього меню: ')).strip()
+    result = check_file_safe(path, _worker_template, _worker_write,
+                             _worker_stream, _worker_profile,
+                             _worker_tracer, _worker_lines,
+                             _worker_validate)
+    if _worker_tracer is not None:
+        result.trace = _worker_tracer.pop_events()
+    return result
+
+
+def check_file_safe(path: str, template: CompiledTemplate, 
+                    write: bool = True, stream: bool = False,
+                    profile: bool = False, tracer=None,
+                    lines: Optional[List[LineRange]] = None,
+                    validate: bool = False) -> CheckResult:
+    """Перевіряє html файл, перетворюючи виключення на помилку результату
+    
+    Parameters
+    ----------
+    path : str
+        Шлях до файлу
+    template : CompiledTemplate
+        Шаблон перевірки
+    write : bool
+        Записати відформатований текст у файл, якщо він змінився?
+    stream : bool
+        Форматувати файл потоком, див. stream.StreamHtml? Шаблон
+        з balance_text потоком не підтримуєтся
+    profile : bool
+        Рахувати статистику правил у CheckResult.profile?
+    tracer : Optional[tracing.Tracer]
+        Траса, у яку записуются етапи перевірки
+    lines : Optional[List[LineRange]]
+        Форматувати тільки теги на цих строчках, потоком не
+        підтримуєтся, див. LintPipeline.lint_lines
+    validate : bool
+        Тільки перевірити розмітку, див. Html.validate_file? Тоді
+        решта параметрів крім tracer не використовуєтся
+
+    Returns
+    -------
+    result : CheckResult
+        Результат перевірки файлу
+    """
 
-            if not name:
-                break
-            
-            search_match = search(r'[^ `\w]', name)
-            if search_match:
-                print('Ім`я повинно містити тільки літери, '
-                      'числа, пробіл або апостроф.')
+    try:
+        with trace_span(tracer, 'check', path):
+            if validate:
+                return Html.validate_file(path, tracer)
+            if stream and lines is None and not template.balance_text:
+                # Потокове форматування імпортується тільки коли воно
+                # потрібне, бо stream імпортує цей модуль
+                from stream import StreamHtml
 
-                input('\nНатисніть Enter щоби продовжити.')
-                continue
+                return StreamHtml.check_file(path, template, write,
+                                             profile=profile,
+                                             tracer=tracer)
+            return Html.check_file(path, template, write, profile, tracer,
+                                   lines)
+    except Exception as error:
+        result = CheckResult(path)
+        result.errors.append('Error: {}: {} "{}"'.format(
+            type(error).__name__, error, path
+        ))
+        return result
 
-            self.current_template = Template.create_template(name)
-            break
 
-    def _select_template_menu(self):
-        """Відображає в консолі меню для вибору шаблону"""
+def is_html_file(name: str) -> bool:
+    """Перевіряє чи ім'я файлу - ім'я Html файлу"""
 
-        while True:
-            system('cls')
-            print('HTML Linter v{}'.format(__version__))
+    return name.__contains__('.') and name.split('.')[1] == 'html'
 
-            templates = Template.get_templates()
-            for num, template in enumerate(templates, start=1):
-                print('{}. {}'.format(num, template))
 
-            print('\n0. Назад')
+def find_html_files(path: str) -> List[str]:
+    """Шукає Html файли у каталозі
 
-            try:
-                command = int(input('\nВиберіть шаблон: ').strip())
-            except ValueError:
-                print('Невірна команда.')
+    Parameters
+    ----------
+    path : str
+        Шлях до каталогу
 
-                input('\nНатисніть Enter щоби продовжити.')
-                continue
+    Returns
+    -------
+    paths : List[str]
+        Шляхи до Html файлів у сталому порядку
+    """
 
-            if command == 0:
-                break
-            elif 1 <= command <= len(templates):
-                self.current_template = Template.load(templates[command - 1])
-                break
-            else:
-                print('Невірна команда.')
+    paths: List[str] = []
+    for root, dirs, files in walk(path):
+        dirs.sort()
+        for file in sorted(files):
+            if is_html_file(file):
+                paths.append(join(root, file))
+    return paths
 
-                input('\nНатисніть Enter щоби продовжити.')
-                continue
-    
-    def delete_template(self):
-        while True:
-            system('cls')
-            print('HTML Linter v{}'.format(__version__))
 
-            templates = Template.get_templates()[1:]
-            for num, template in enumerate(templates, start=1):
-                print('{}. {}'.format(num, template))
+def check_files(paths: List[str], template: CompiledTemplate, jobs: int = 1,
+                write: bool = True, cache=None, stream: bool = False,
+                profile: bool = False, tracer=None,
+                lines: Optional[List[LineRange]] = None,
+                validate: bool = False) -> List[CheckResult]:
+    """Перевіряє html файли за вказаним шаблоном
 
-            print('\n0. Назад')
+    Якщо jobs більше 1, файли перевіряються у пулі процесів. Шаблон
+    передається кожному процесу один раз, результати вертаються
+    у порядку paths.
 
-            try:
-                command = int(input('\nВиберіть шаблон: ').strip())
-            except ValueError:
-                print('Невірна команда.')
+    Файли які кеш знає як відформатовані пропускаються без читання,
+    а файли що не змінилися після перевірки додаются у кеш.
 
-                input('\nНатисніть Enter щоби продовжити.')
-                continue
+    Parameters
+    ----------
+    paths : List[str]
+        Шляхи до файлів
+    template : CompiledTemplate
+        Шаблон перевірки
+    jobs : int
+        Кількість процесів
+    write : bool
+        Записати відформатований текст у файли, які змінилися?
+    cache : Optional[cache.Cache]
+        Кеш відформатованих файлів
+    stream : bool
+        Форматувати файли потоком, див. stream.StreamHtml?
+    profile : bool
+        Рахувати статистику правил у CheckResult.profile?
+    tracer : Optional[tracing.Tracer]
+        Траса, у яку записуются етапи перевірки всіх процесів
+    lines : Optional[List[LineRange]]
+        Форматувати тільки теги на цих строчках кожного файлу, див.
+        LintPipeline.lint_lines
+    validate : bool
+        Тільки перевірити розмітку файлів, див. Html.validate_file?
+        Перевірені так файли не додаются у кеш
+
+    Returns
+    -------
+    results : List[CheckResult]
+        Результати перевірки у порядку paths
+    """
 
-            if command == 0:
-                break
-            elif 1 <= command <= len(templates):
-                if self.current_template.name == templates[command]:
-                    self.current_template = Template()
-                remove(join('templates', templates[command] + '.json'))
-                break
-            else:
-                print('Невірна команда.')
+    if cache is None:
+        return _check_files(paths, template, jobs, write, stream, profile,
+                            tracer, lines, validate)
+
+    results: List[Optional[CheckResult]] = []
+    unknown_paths: List[str] = []
+    for path in paths:
+        if cache.is_clean(path):
+            result = CheckResult(path)
+            result.cached = True
+            results.append(result)
+        else:
+            results.append(None)
+            unknown_paths.append(path)
+
+    checked = iter(_check_files(unknown_paths, template, jobs, write,
+                                stream, profile, tracer, lines, validate))
+    for index, result in enumerate(results):
+        if result is None:
+            result = results[index] = next(checked)
+            # Після форматування частини файлу решта може бути
+            # не відформатована, а після перевірки розмітки файл
+            # не форматувався взагалі
+            if (result.ok and not result.changed and lines is None
+                    and not validate):
+                cache.add(result)
+    return results
+
+
+def _check_files(paths: List[str], template: CompiledTemplate, jobs: int,
+                 write: bool, stream: bool, profile: bool, tracer,
+                 lines: Optional[List[LineRange]],
+                 validate: bool) -> List[CheckResult]:
+    """Перевіряє html файли без кешу, див. check_files"""
+
+    if jobs <= 1 or len(paths) <= 1:
+        return [check_file_safe(path, template, write, stream, profile,
+                                tracer, lines, validate)
+                for path in paths]
+
+    # Пул процесів імпортується тільки тут, бо імпорт multiprocessing
+    # помітно сповільнює запуск утиліти
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(jobs, initializer=_init_worker,
+                             initargs=(template, write, stream, profile,
+                                       tracer, lines, validate)) as pool:
+        results = list(pool.map(_check_file_in_worker, paths, 
+                                chunksize=chunksize))
+    if tracer is not None:
+        for result in results:
+            tracer.events.extend(result.trace)
+            result.trace = []
+    return results
 
-                input('\nНатисніть Enter щоби продовжити.')
-                continue
 
 if __name__ == "__main__":
-    linter = Linter()
-    linter.start_menu()
+    from cli import main
+    exit(main())
@@ -0,0 +1,904 @@
+"""Потокове форматування великих Html файлів
+
+Файл читається частинами і подається у HTMLParser.feed. Закритий
+дочірній тег форматується і записується, як тільки текст перед ним
+більше не зміниться, після чого замість нього у дереві залишаются
+тільки його метрики. У пам'яті залишаются відкриті теги та ще
+не записані дочірні теги останнього з них.
+
+Відкритий тег записується до закриття, якщо правила батька вже не
+змінять текст перед ним, а його правило lint_hard_wrap не змінює
+відступи перед ним. Правила такого тегу виконуются один раз на
+початку тегу, а заміни тексту, які вони роблять, запам'ятовуются
+і виконуются для кожного нового шматка тексту тегу. Рішення
+lint_hard_wrap приймається при закритті тегу, до того шматки
+з '</' чекають у пам'яті.
+
+Результат збігається з Html.check_file, крім перенесення тексту
+(Template.wrap_text), яке не дивиться далі за наступний тег
+з дочірніми тегами або WRAP_LOOKAHEAD символів. Рішення залежать
+тільки від тексту файлу, а не від розміру прочитаних частин.
+Закриті теги форматуются до кінця файлу, тому помилки розмітки
+знаходятся після форматування тегів перед ними.
+
+"""
+
+from collections import deque
+from hashlib import blake2b
+from os import remove
+from os import replace
+from os import stat
+from os.path import dirname
+from re import Pattern
+from shutil import copymode
+from tempfile import NamedTemporaryFile
+
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import TextIO
+from typing import Union
+
+from linter import EMPTY_METRICS
+from linter import END_TAG_RE
+from linter import END_TAG_SPACE_RE
+from linter import SLOT
+from linter import CheckResult
+from linter import CompiledTemplate
+from linter import Html
+from linter import LintPipeline
+from linter import LintProfile
+from linter import Metrics
+from linter import Tag
+from linter import TagFacts
+from linter import TextWrapper
+from linter import get_max_col
+from linter import join_metrics
+from linter import measure_text
+from linter import trace_span
+
+
+# Кількість символів, які читаются з файлу за один раз
+CHUNK_SIZE: int = 1 << 16
+
+# Скільки символів тексту після дочірнього тегу чекає перенесення
+# тексту перед ним, поки не стане остаточним
+WRAP_LOOKAHEAD: int = 1 << 12
+
+
+class StreamTag(Tag):
+    """Тег потокового форматування
+
+    Поза записом працює як Tag. Під час запису (_ops не None) заміни
+    тексту виконуются і запам'ятовуются, а lint_hard_wrap
+    та lint_wrap_text тільки запам'ятовуют свої параметри.
+
+    Attributes
+    ----------
+    is_closed : bool
+        Тег закритий?
+    _raw : Optional[Metrics]
+        Метрики прочитаного тексту тегу, коли тег закритий
+    _level : int
+        Позиція тегу у списку відкритих тегів
+    _ops : Optional[list]
+        Запам'ятовані заміни тексту
+    _state : Optional[TagStream]
+        Стан тегу, який записуєтся до закриття
+    """
+
+    __slots__ = ('is_closed', '_raw', '_level', '_ops', '_state')
+
+    def __init__(self, name: str, text: str, parent: Optional['StreamTag']):
+        super().__init__(name, text, parent)
+        self.is_closed: bool = False
+        self._raw: Optional[Metrics] = None
+        self._level: int = 0
+        self._ops: Optional[list] = None
+        self._state: Optional['TagStream'] = None
+
+    def _build_child(self, child: 'StreamTag'):
+        # Відкриті теги записуются до закриття, тому їх кеші можуть
+        # бути вже пораховані
+        self.append_child(child)
+
+    def _build_text(self, text: str):
+        self.append_text(text)
+
+    def _sub_text(self, pattern: Pattern, repl: Union[str, Callable],
+                  last_pattern: Optional[Pattern] = None, start: int = 0):
+        if self._ops is None:
+            super()._sub_text(pattern, repl, last_pattern, start)
+            return
+        self._ops.append(('sub', pattern, repl, last_pattern, start))
+        # Під час запису у тегу є тільки перший шматок, він не останній
+        super()._sub_text(pattern, repl, start=start)
+
+    def _replace_text(self, old: str, new: str):
+        if self._ops is not None:
+            self._ops.append(('replace', old, new))
+        super()._replace_text(old, new)
+
+    def lint_hard_wrap(self, template: CompiledTemplate, facts: TagFacts):
+        if self._ops is None:
+            super().lint_hard_wrap(template, facts)
+            return
+
+        if self.name in template.inline_elements:
+            return
+        if not facts.space_before_tag.__contains__('\n'):
+            if self.name in template.dont_break_if_inline_content:
+                return
+        self._ops.append(('hard_wrap', facts.col))
+
+    def lint_wrap_text(self, template: CompiledTemplate, facts: TagFacts):
+        if self._ops is None:
+            super().lint_wrap_text(template, facts)
+            return
+
+        tag_string = facts.tag_string
+        if tag_string.endswith('/>') or self.keeps_white_space(template):
+            return
+        wrapper = self.create_text_wrapper(
+            template, facts, self.get_text_string()
+        )
+        self._ops.append(('wrap', len(tag_string), wrapper))
+
+    def _reset_tree(self, pieces: List[str], childs: List[Tag]):
+        """Метод замінює шматки тексту та дочірні теги і скидає кеші"""
+
+        self._pieces = pieces
+        self.childs = childs
+        for child in childs:
+            child._space_before_tag = None
+            child._reset_position()
+        # Кеш батьків скидається тільки якщо кеш тегу заповнений
+        self._metrics = EMPTY_METRICS
+        self._text_changed(0)
+
+
+class TagStream:
+    """Стан тегу, який записуєтся до закриття
+
+    Номери шматків і дочірніх тегів рахуются від початку тегу,
+    навіть коли записані теги вже замінені на метрики.
+
+    Attributes
+    ----------
+    pre_ops : list
+        Заміни тексту до перенесення тексту
+    post_ops : list
+        Заміни тексту після перенесення тексту
+    wrapper : Optional[TextWrapper]
+        Перенесення тексту тегу, None якщо текст не переноситься
+        або вже перенесений
+    tag_length : int
+        Дліна тега та атрібутів, з якої починається текст для wrapper
+    hard_wrap_col : Optional[int]
+        Позиція тега для рішення lint_hard_wrap, поки воно не прийняте
+    hard_wrap : Optional[bool]
+        Рішення lint_hard_wrap, None поки тег не закритий
+    hard_wrap_metrics : Metrics
+        Метрики тексту тегу для рішення lint_hard_wrap
+    offset : int
+        Номер першого дочірнього тегу, який ще є у дереві
+    stubbed : bool
+        Перший дочірній тег у дереві заміняє записані теги?
+    measured : int
+        Кількість шматків, доданих у hard_wrap_metrics
+    processed : int
+        Кількість шматків, до яких застосовані pre_ops
+    source_ended : bool
+        Текст для wrapper у оброблених шматках закінчився?
+    sources : Dict[int, tuple]
+        Текст оброблених шматків для wrapper та чи закінчуєтся ним
+        текст для перенесення
+    fed_sources : int
+        Кількість шматків, текст яких переданий у wrapper
+    fed : int
+        Кількість дочірніх тегів, переданих у wrapper
+    finalized : int
+        Кількість відформатованих шматків
+    committed : int
+        Кількість записаних дочірніх тегів
+    parts : Dict[int, list]
+        Частини оброблених шматків: до тексту wrapper, перенесений
+        текст або None поки він не готовий, після тексту wrapper
+    waiting : Deque[int]
+        Шматки які чекають на перенесений текст
+    open_child : Optional[StreamTag]
+        Відкритий дочірній тег, який записуєтся
+    finished : bool
+        Тег закритий і повністю записаний?
+    """
+
+    def __init__(self, ops: list):
+        self.pre_ops: list = []
+        self.post_ops: list = []
+        self.wrapper: Optional[TextWrapper] = None
+        self.tag_length: int = 0
+        self.hard_wrap_col: Optional[int] = None
+        self.hard_wrap: Optional[bool] = False
+        self.hard_wrap_metrics: Metrics = EMPTY_METRICS
+
+        ops_list = self.pre_ops
+        for op in ops:
+            if op[0] == 'wrap':
+                self.tag_length, self.wrapper = op[1], op[2]
+                ops_list = self.post_ops
+            else:
+                if op[0] == 'hard_wrap':
+                    self.hard_wrap_col = op[1]
+                    self.hard_wrap = None
+                ops_list.append(op)
+
+        self.offset: int = 0
+        self.stubbed: bool = False
+        self.measured: int = 0
+        self.processed: int = 0
+        self.source_ended: bool = self.wrapper is None
+        self.sources: Dict[int, tuple] = {}
+        self.fed_sources: int = 0
+        self.fed: int = 0
+        self.finalized: int = 0
+        self.committed: int = 0
+        self.parts: Dict[int, list] = {}
+        self.waiting: Deque[int] = deque()
+        self.open_child: Optional[StreamTag] = None
+        self.finished: bool = False
+
+
+class StreamHtml(Html):
+    """Клас який форматує Html файл потоком
+
+    Attributes
+    ----------
+    template : CompiledTemplate
+        Шаблон форматування
+    output : Optional[TextIO]
+        Файл куди пишеться відформатований текст
+    digest : str
+        Хеш відформатованого тексту, після finish
+
+    Methods
+    -------
+    check_file(path: str, template: CompiledTemplate, write: bool,
+               chunk_size: int) : CheckResult
+        Перевіряє html файл за вказаним шаблоном потоком
+    feed(data: str)
+        Додає прочитаний текст та записує готові теги
+    finish()
+        Перевіряє закриття тегів та записує решту тексту
+    """
+
+    tag_class: type = StreamTag
+    # Теги записуются і звільняются під час читання, тому тексту
+    # з межами у прочитаному тексті не потрібно
+    zero_copy: bool = False
+
+    def __init__(self, path: str, template: CompiledTemplate,
+                 output: Optional[TextIO] = None,
+                 profile: Optional[LintProfile] = None, tracer=None):
+        """Конструктор класу
+
+        Parameters
+        ----------
+        path : str
+            Шлях до файлу
+        template : CompiledTemplate
+            Шаблон форматування
+        output : Optional[TextIO]
+            Файл куди писати відформатований текст, без нього
+            рахується тільки хеш
+        profile : Optional[LintProfile]
+            Статистика виконання правил, якщо її потрібно рахувати
+        tracer : Optional[tracing.Tracer]
+            Траса, у яку записуются довгі виклики правил
+        """
+
+        super().__init__(path)
+
+        self.template: CompiledTemplate = template
+        self.output: Optional[TextIO] = output
+        self.digest: str = ''
+        self._pipeline: LintPipeline = LintPipeline(template, StreamTag,
+                                                    profile, tracer)
+        self._hash = blake2b(digest_size=16)
+        # Метрики прочитаного тексту кожного відкритого тегу без його
+        # відкритих дочірніх тегів. Позиції тегів для повідомлень про
+        # недійсну розмітку рахує Html під час розбору
+        self._raw_stack: List[Metrics] = [EMPTY_METRICS]
+        # Теги що записуются до закриття, від кореневого тегу
+        self._spine: List[StreamTag] = []
+        self._started: bool = False
+
+    def start_tag(self, name: str, text: str):
+        super().start_tag(name, text)
+        tag = self._opened_tags[-1]
+        tag._level = len(self._opened_tags) - 1
+        self._raw_stack.append(EMPTY_METRICS)
+        self._add_raw(tag._pieces[0])
+
+    def start_end_tag(self, name: str, text: str):
+        super().start_end_tag(name, text)
+        tag = self._opened_tags[-1].childs[-1]
+        tag.is_closed = True
+        tag._raw = measure_text(tag._pieces[0])
+        self._add_raw(tag._pieces[0])
+
+    def end_tag(self, name: str, text: str):
+        closed_tag = self._opened_tags[-1]
+        super().end_tag(name, text)
+        if self.break_html:
+            return
+        closed_tag.is_closed = True
+        closed_tag._raw = self._raw_stack.pop()
+        self._raw_stack[-1] = join_metrics(self._raw_stack[-1],
+                                           closed_tag._raw)
+
+    def append_text(self, text: str):
+        super().append_text(text)
+        self._add_raw(text)
+
+    def _add_raw(self, text: str):
+        """Метод додає метрики прочитаного тексту"""
+
+        self._raw_stack[-1] = join_metrics(self._raw_stack[-1],
+                                           measure_text(text))
+
+    def _get_first_line(self, tag: StreamTag) -> Optional[int]:
+        """Вертає дліну першої строчки прочитаного тексту тегу
+
+        Returns
+        -------
+        length : Optional[int]
+            Дліна першої строчки або None, якщо вона ще не прочитана
+        """
+
+        if tag.is_closed:
+            return tag._raw[1]
+        metrics = EMPTY_METRICS
+        for raw in self._raw_stack[tag._level:]:
+            metrics = join_metrics(metrics, raw)
+            if metrics[0]:
+                return metrics[1]
+        return None
+
+    def feed(self, data: str):
+        """Додає прочитаний текст та записує готові теги"""
+
+        super().feed(data)
+        if self.break_html:
+            self._drop_tree()
+        else:
+            self._advance()
+
+    def finish(self):
+        """Перевіряє закриття тегів та записує решту тексту"""
+
+        self.check_closed_tags()
+        if self.break_html:
+            return
+
+        root_tag = self._root_tag
+        root_tag.is_closed = True
+        self._advance()
+        if not self._started:
+            self._pipeline.lint(root_tag)
+            for text in root_tag.iter_text():
+                self._write(text)
+        self.digest = self._hash.hexdigest()
+
+    def _write(self, text: str):
+        """Метод записує відформатований текст"""
+
+        if not text:
+            return
+        self._hash.update(text.encode('utf-8', 'surrogatepass'))
+        if self.output is not None:
+            self.output.write(text)
+
+    def _drop_tree(self):
+        """Метод видаляє текст відкритих тегів після недійсної розмітки
+
+        Далі файл тільки дочитується, тому зберігаются тільки
+        відкриті теги без тексту.
+        """
+
+        for tag in self._opened_tags:
+            tag._pieces = ['']
+            tag.childs = []
+            tag._prefix = []
+            tag._metrics = None
+
+    def _advance(self):
+        """Метод записує все, що вже не зміниться"""
+
+        if not self._started:
+            if not self._can_start():
+                return
+            self._start_tag(self._root_tag)
+            self._spine.append(self._root_tag)
+            self._started = True
+
+        while self._spine:
+            tag = self._spine[-1]
+            child = self._step(tag)
+            if child is not None:
+                self._spine.append(child)
+                continue
+            if not tag._state.finished:
+                break
+            self._spine.pop()
+
+    def _can_start(self) -> bool:
+        """Кореневий тег можна записувати до кінця файлу?
+
+        Текст тега кореневого тегу має бути у першому шматку, інакше
+        get_tag_string шукає його після дочірніх тегів.
+        """
+
+        root_tag = self._root_tag
+        if not root_tag.childs:
+            return False
+        piece = root_tag._pieces[0]
+        start = piece.find('<')
+        return start != -1 and piece.find('>', start) != -1
+
+    def _start_tag(self, tag: StreamTag):
+        """Метод виконує правила тегу по його першому шматку
+
+        Заміни тексту запам'ятовуются у стані тегу, для решти
+        шматків вони виконуются у _process.
+        """
+
+        pieces, childs = tag._pieces, tag.childs
+        tag._reset_tree([pieces[0]], [])
+        tag._ops = []
+        try:
+            self._pipeline.lint_tag(tag)
+            tag._state = TagStream(tag._ops)
+        finally:
+            tag._ops = None
+            tag._reset_tree(pieces, childs)
+
+    def _step(self, tag: StreamTag) -> Optional[StreamTag]:
+        """Метод записує готові дочірні теги тегу
+
+        Returns
+        -------
+        child : Optional[StreamTag]
+            Відкритий дочірній тег, який записуєтся, або None якщо
+            тег записаний повністю чи чекає на текст
+        """
+
+        state = tag._state
+        while True:
+            self._process(tag)
+            count = state.offset + len(tag.childs)
+            if tag.is_closed:
+                # Кількість строчок тегу для дочірніх тегів має бути
+                # остаточною, тому спочатку форматуются всі шматки
+                while state.finalized <= count and self._finalize(tag):
+                    pass
+
+            child = state.open_child
+            if child is not None:
+                if not child._state.finished:
+                    return child
+                state.open_child = None
+                self._collapse(tag)
+                continue
+
+            index = state.committed
+            if index == count:
+                if tag.is_closed:
+                    self._write(tag._pieces[-1])
+                    state.finished = True
+                return None
+
+            child = tag.childs[index - state.offset]
+            if state.finalized == index and not self._finalize(tag):
+                return None
+            if not self._can_lint_child(tag, child):
+                return None
+
+            if not self._can_start_child(tag, child):
+                if not child.is_closed:
+                    return None
+                self._pipeline.lint(child)
+                self._write(tag._pieces[index - state.offset])
+                for text in child.iter_text():
+                    self._write(text)
+                state.committed += 1
+                self._collapse(tag)
+                continue
+
+            self._start_tag(child)
+            self._write(tag._pieces[index - state.offset])
+            state.committed += 1
+            state.open_child = child
+            return child
+
+    def _process(self, tag: StreamTag):
+        """Метод застосовує pre_ops до прочитаних шматків тегу
+        """
+
+        state = tag._state
+        count = state.offset + len(tag.childs)
+        if tag.is_closed:
+            count += 1
+
+        if state.hard_wrap_col is not None:
+            while state.measured < count:
+                index = state.measured
+                if index:
+                    child = tag.childs[index - 1 - state.offset]
+                    state.hard_wrap_metrics = join_metrics(
+                        state.hard_wrap_metrics, child._raw,
+                    )
+                text = self._apply_ops(tag, index, state.pre_ops, True)
+                state.hard_wrap_metrics = join_metrics(
+                    state.hard_wrap_metrics, measure_text(text),
+                )
+                state.measured += 1
+            if tag.is_closed:
+                state.hard_wrap = (
+                    get_max_col(state.hard_wrap_metrics, state.hard_wrap_col)
+                    > self.template.hard_wrap_column
+                )
+                state.hard_wrap_col = None
+
+        while state.processed < count:
+            index = state.processed
+            text = self._apply_ops(tag, index, state.pre_ops)
+            if text is None:
+                break
+            self._split_wrap(tag, index, text)
+            state.processed += 1
+
+    def _apply_ops(self, tag: StreamTag, index: int, ops: list,
+                   before_hard_wrap: bool = False) -> Optional[str]:
+        """Метод застосовує запам'ятовані заміни до шматка тексту
+
+        Parameters
+        ----------
+        tag : StreamTag
+            Тег, який записуєтся до закриття
+        index : int
+            Номер шматка
+        ops : list
+            Заміни тексту
+        before_hard_wrap : bool
+            Зупинитися на lint_hard_wrap?
+
+        Returns
+        -------
+        text : Optional[str]
+            Шматок тексту або None, якщо він чекає на рішення
+            lint_hard_wrap
+        """
+
+        state = tag._state
+        text = tag._pieces[index - state.offset]
+        is_last = tag.is_closed and index == state.offset + len(tag.childs)
+        for op in ops:
+            kind = op[0]
+            if kind == 'sub':
+                text = self._apply_sub(op, index, is_last, text)
+            elif kind == 'replace':
+                text = text.replace(op[1], op[2])
+            elif before_hard_wrap:
+                break
+            elif state.hard_wrap is None:
+                if text.__contains__('</'):
+                    return None
+            elif state.hard_wrap:
+                text = END_TAG_SPACE_RE.sub('\n', text)
+        return text
+
+    def _split_wrap(self, tag: StreamTag, index: int, text: str):
+        """Метод відокремлює частину шматка, яку треба перенести
+
+        Як і Tag.get_text_string, текст для перенесення починається
+        після тега та атрібутів і закінчуєтся перед першим '</'
+        з відступами перед ним. Частини шматка зберігаются у parts,
+        а текст для перенесення у sources.
+        """
+
+        state = tag._state
+        if state.source_ended:
+            state.parts[index] = [text, '', '']
+            return
+
+        start = state.tag_length if index == 0 else 0
+        end_tag = END_TAG_RE.search(text)
+        end = max(start, end_tag.start()) if end_tag else len(text)
+        state.parts[index] = [text[:start], None, text[end:]]
+
+        is_last = tag.is_closed and index == state.offset + len(tag.childs)
+        state.source_ended = bool(end_tag) or is_last
+        state.sources[index] = (text[start:end], state.source_ended)
+
+    def _feed_wrapper(self, tag: StreamTag) -> bool:
+        """Метод передає у wrapper наступний текст або дочірній тег
+
+        Текст передаєтся тільки коли він потрібний, щоб рішення
+        про перенесення не залежали від того, скільки файлу вже
+        прочитано.
+
+        Returns
+        -------
+        is_fed : bool
+            False якщо наступний текст ще не прочитаний
+        """
+
+        state = tag._state
+        wrapper = state.wrapper
+        if wrapper is None:
+            return False
+
+        if state.fed_sources == state.fed:
+            index = state.fed_sources
+            if state.processed <= index:
+                return False
+            text, is_end = state.sources.pop(index)
+            wrapper.feed(text)
+            state.waiting.append(index)
+            state.fed_sources += 1
+            if is_end:
+                for body in wrapper.finish().split(SLOT):
+                    state.parts[state.waiting.popleft()][1] = body
+                state.wrapper = None
+            return True
+
+        child = tag.childs[state.fed - state.offset]
+        length = self._get_first_line(child)
+        if length is None:
+            return False
+        wrapper.feed(SLOT, [length])
+        state.fed += 1
+        return True
+
+    def _finalize(self, tag: StreamTag) -> bool:
+        """Метод форматує наступний оброблений шматок тегу
+
+        Перенесений текст шматка забирається з wrapper, коли
+        перенесення вже не змінить його, див. TextWrapper.is_final.
+        Інакше перед дочірнім тегом з дочірніми тегами, який може
+        записуватися до закриття, текст забирається одразу, а перед
+        іншим тегом після WRAP_LOOKAHEAD символів тексту за ним
+        або перед текстом після наступного тегу з дочірніми тегами.
+
+        Returns
+        -------
+        is_finalized : bool
+            False якщо шматок ще не оброблений або перенесений
+        """
+
+        state = tag._state
+        index = state.finalized
+        if state.processed <= index:
+            return False
+
+        parts = state.parts[index]
+        if parts[1] is None:
+            while state.wrapper is not None and state.fed <= index:
+                if not self._feed_wrapper(tag):
+                    return False
+
+        if parts[1] is None:
+            child = tag.childs[index - state.offset]
+            if not child.childs and not child.is_closed:
+                return False
+            while not child.childs and state.wrapper is not None:
+                text = state.wrapper.text
+                end = text.index(SLOT) + 1
+                if (state.wrapper.is_final(end)
+                        or len(text) - end >= WRAP_LOOKAHEAD):
+                    break
+                if (state.fed_sources == state.fed
+                        and tag.childs[state.fed - 1 - state.offset].childs):
+                    break
+                if not self._feed_wrapper(tag):
+                    return False
+
+        if parts[1] is None:
+            wrapper = state.wrapper
+            text = wrapper.release(wrapper.text.index(SLOT) + 1)
+            parts[1] = text[:-1]
+            state.waiting.popleft()
+
+        del state.parts[index]
+        text = self._apply_post_ops(tag, index, ''.join(parts))
+        tag._set_piece(index - state.offset, text)
+        state.finalized += 1
+        return True
+
+    def _apply_post_ops(self, tag: StreamTag, index: int, text: str) -> str:
+        """Метод застосовує заміни після перенесення тексту"""
+
+        state = tag._state
+        is_last = tag.is_closed and index == state.offset + len(tag.childs)
+        for op in state.post_ops:
+            if op[0] == 'sub':
+                text = self._apply_sub(op, index, is_last, text)
+            else:
+                text = text.replace(op[1], op[2])
+        return text
+
+    @staticmethod
+    def _apply_sub(op: tuple, index: int, is_last: bool, text: str) -> str:
+        """Метод застосовує запам'ятований Tag._sub_text до шматка"""
+
+        pattern = op[1]
+        if is_last and op[3] is not None:
+            pattern = op[3]
+        start = op[4]
+        if index == 0 and start:
+            return text[:start] + pattern.sub(op[2], text[start:])
+        return pattern.sub(op[2], text)
+
+    def _can_lint_child(self, tag: StreamTag, child: StreamTag) -> bool:
+        """Дочірній тег можна форматувати до закриття тегу?
+
+        Правило lint_indents порівнює кількість строчок батька
+        з Template.dont_indent_child_tag_size. Поки батько не закритий,
+        рішення відоме тільки коли строчок перед дочірнім тегом вже
+        більше.
+        """
+
+        if tag.is_closed:
+            return True
+        return self._is_indent_known(tag, child)
+
+    def _is_indent_known(self, tag: StreamTag, child: StreamTag) -> bool:
+        """Рішення lint_indents про відступ дочірнього тегу вже відоме?
+
+        Без Template.dont_indent_child_tag_size рішення не залежить
+        від кількості строчок батька, інакше строчок перед дочірнім
+        тегом має бути вже більше.
+        """
+
+        size = self.template.dont_indent_child_tag_size
+        if not size:
+            return True
+        space = tag._get_space_before_tag(child)
+        lines_count = (tag._get_metrics_before(child)[0]
+                       - space.count('\n'))
+        return 1 + lines_count > size
+
+    def _can_start_child(self, tag: StreamTag, child: StreamTag) -> bool:
+        """Відкритий дочірній тег можна записувати до закриття?
+
+        Перший шматок тегу має бути прочитаний, а lint_hard_wrap
+        тегу не повинен змінювати відступи перед тегом: після нього
+        відступи все одно замінюют lint_remove_new_line_before,
+        lint_insert_new_line_before або lint_indents. Правила тегу
+        бачать тільки його перший шматок, тому рішення lint_indents,
+        яке рахує строчки батька разом з тегом, має бути вже відоме.
+        """
+
+        if not child.childs:
+            return False
+        if not self._is_indent_known(tag, child):
+            return False
+
+        template = self.template
+        name = child.name
+        if name in template.inline_elements:
+            return True
+        if tag._get_space_before_tag(child).__contains__('\n'):
+            return True
+        return (name in template.remove_new_line_before
+                or name in template.insert_new_line_before
+                or name in template.dont_break_if_inline_content)
+
+    def _collapse(self, tag: StreamTag):
+        """Метод заміняє записані дочірні теги на їх метрики"""
+
+        state = tag._state
+        last = state.committed - 1
+        if state.open_child is not None:
+            last -= 1
+        if state.hard_wrap_col is not None:
+            # Метрики дочірнього тегу ще потрібні для hard_wrap_metrics
+            last = min(last, state.measured - 2)
+
+        index = last - state.offset
+        if index < 0 or (index == 0 and state.stubbed):
+            return
+
+        child = tag.childs[index]
+        stub = Tag('', '', tag)
+        stub._metrics = join_metrics(tag._get_metrics_before(child),
+                                     child.get_metrics())
+        tag.childs = [stub] + tag.childs[index + 1:]
+        tag._pieces = [''] + tag._pieces[index + 1:]
+        for position, child in enumerate(tag.childs):
+            child._index = position
+        tag._prefix = []
+        state.offset = last
+        state.stubbed = True
+
+    @classmethod
+    def check_file(cls, path: str, template: CompiledTemplate,
+                   write: bool = True, chunk_size: int = CHUNK_SIZE,
+                   profile: bool = False, tracer=None) -> CheckResult:
+        """Перевіряє html файл за вказаним шаблоном потоком
+
+        Відформатований текст пишеться у тимчасовий файл поруч, який
+        замінює основний файл тільки якщо текст змінився.
+
+        Parameters
+        ----------
+        path : str
+            Шлях до файлу
+        template : CompiledTemplate
+            Шаблон перевірки
+        write : bool
+            Записати відформатований текст у файл, якщо він змінився?
+        chunk_size : int
+            Кількість символів, які читаются за один раз
+        profile : bool
+            Рахувати статистику правил у CheckResult.profile?
+        tracer : Optional[tracing.Tracer]
+            Траса, у яку записуются етапи перевірки. Читання та
+            форматування чергуются, тому інтервали пишуться для
+            кожного прочитаного шматка
+
+        Returns
+        -------
+        result : CheckResult
+            Результат перевірки файлу
+        """
+
+        result = CheckResult(path)
+        if profile:
+            result.profile = LintProfile()
+        file_stat = stat(path)
+        result.size = file_stat.st_size
+        result.mtime = file_stat.st_mtime_ns
+
+        output = None
+        if write:
+            output = NamedTemporaryFile('w', dir=dirname(path) or '.',
+                                        prefix='.html-linter-',
+                                        suffix='.tmp', delete=False)
+        try:
+            html = cls(path, template, output, result.profile, tracer)
+            input_hash = blake2b(digest_size=16)
+            with open(path, 'r') as file:
+                while True:
+                    with trace_span(tracer, 'read', path):
+                        data = file.read(chunk_size)
+                    if not data:
+                        break
+                    input_hash.update(data.encode('utf-8', 'surrogatepass'))
+                    with trace_span(tracer, 'feed', path):
+                        html.feed(data)
+            with trace_span(tracer, 'finish', path):
+                html.finish()
+        except BaseException:
+            if output is not None:
+                output.close()
+                remove(output.name)
+            raise
+
+        result.digest = input_hash.hexdigest()
+        if html.break_html:
+            result.errors = html.errors
+        else:
+            result.changed = html.digest != result.digest
+
+        if output is not None:
+            output.close()
+            if result.changed:
+                with trace_span(tracer, 'write', path):
+                    copymode(path, output.name)
+                    replace(output.name, path)
+            else:
+                remove(output.name)
+        return result
@@ -0,0 +1,166 @@
+"""Запис траси перевірки у форматі Chrome trace-event
+
+Траса відкривається у chrome://tracing або https://ui.perfetto.dev:
+
+    python cli.py check site/ --jobs 8 --trace trace.json
+
+"""
+
+from contextlib import contextmanager
+from json import dump
+from os import getpid
+from time import perf_counter
+
+from typing import Callable
+from typing import Iterator
+from typing import List
+
+from linter import CompiledTemplate
+from linter import Tag
+from linter import TagFacts
+
+
+class Tracer:
+    """Траса перевірки файлів у форматі Chrome trace-event
+
+    Кожен інтервал записуєтся як подія 'X' з шляхом до файлу. Події
+    всіх процесів-робітників мають один pid, а tid - pid процесу, тому
+    робітники показуются окремими рядками на одній шкалі часу.
+    perf_counter на Linux спільний для всіх процесів, тому час подій
+    різних процесів можна порівнювати.
+
+    Виклики правил форматування записуются тільки якщо вони довші за
+    rule_threshold, інакше траса великого каталогу буде завеликою.
+
+    Attributes
+    ----------
+    rule_threshold : float
+        Мінімальна тривалість виклику правила у секундах
+    events : List[dict]
+        Записані події
+    path : str
+        Файл, який зараз перевіряєтся
+
+    Methods
+    -------
+    span(name: str, path: str)
+        Контекстний менеджер, який записує інтервал
+    wrap(name: str, method: Callable) : Callable
+        Обгортає метод правила записом довгих викликів
+    pop_events() : List[dict]
+        Вертає записані події та очищує їх
+    write(path: str)
+        Записує трасу у JSON файл
+    """
+
+    def __init__(self, rule_threshold: float = 0.001):
+        """Конструктор класу
+
+        Parameters
+        ----------
+        rule_threshold : float
+            Мінімальна тривалість виклику правила у секундах
+        """
+
+        self.rule_threshold: float = rule_threshold
+        self.events: List[dict] = []
+        self.path: str = ''
+
+    def _add_event(self, name: str, category: str, start: float,
+                   seconds: float, args: dict):
+        """Метод записує подію інтервалу"""
+
+        self.events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': start * 1e6,
+            'dur': seconds * 1e6,
+            'pid': 1,
+            'tid': getpid(),
+            'args': args,
+        })
+
+    @contextmanager
+    def span(self, name: str, path: str) -> Iterator[None]:
+        """Контекстний менеджер, який записує інтервал
+
+        Parameters
+        ----------
+        name : str
+            Назва інтервалу: 'walk', 'check', 'read', 'feed', 'lint',
+            'compare' або 'write'
+        path : str
+            Файл або каталог, якого стосуєтся інтервал
+        """
+
+        self.path = path
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self._add_event(name, 'file', start, perf_counter() - start,
+                            {'path': path})
+
+    def wrap(self, name: str,
+             method: Callable[[Tag, CompiledTemplate, TagFacts], None]
+             ) -> Callable[[Tag, CompiledTemplate, TagFacts], None]:
+        """Обгортає метод правила записом довгих викликів
+
+        Parameters
+        ----------
+        name : str
+            Ім'я правила
+        method : Callable[[Tag, CompiledTemplate, TagFacts], None]
+            Метод правила
+
+        Returns
+        -------
+        wrapper : Callable[[Tag, CompiledTemplate, TagFacts], None]
+            Метод, який виконує правило та записує довгі виклики
+        """
+
+        def wrapper(tag: Tag, template: CompiledTemplate, facts: TagFacts):
+            start = perf_counter()
+            method(tag, template, facts)
+            seconds = perf_counter() - start
+            if seconds >= self.rule_threshold:
+                self._add_event(name, 'rule', start, seconds, {
+                    'path': self.path,
+                    'tag': tag.name,
+                })
+
+        return wrapper
+
+    def pop_events(self) -> List[dict]:
+        """Метод вертає записані події та очищує їх"""
+
+        events, self.events = self.events, []
+        return events
+
+    def write(self, path: str):
+        """Записує трасу у JSON файл
+
+        Parameters
+        ----------
+        path : str
+            Шлях до файлу траси
+        """
+
+        main_tid = getpid()
+        names = [
+            {
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': 1,
+                'tid': tid,
+                'args': {'name': 'main' if tid == main_tid
+                         else 'worker {}'.format(tid)},
+            }
+            for tid in sorted({event['tid'] for event in self.events})
+        ]
+        with open(path, 'w') as file:
+            dump({
+                'traceEvents': names + self.events,
+                'displayTimeUnit': 'ms',
+            }, file)
@@ -0,0 +1,429 @@
+"""Режим спостереження: форматує Html файли після їх зміни
+
+Шаблон компілюєтся один раз, а після запуску форматуются тільки
+змінені файли:
+
+    python cli.py watch templates/ --debounce 200
+
+На Linux зміни приходять від inotify, на інших системах каталоги
+періодично переглядаются за розміром та часом зміни файлів.
+
+"""
+
+from ctypes import CDLL
+from ctypes import get_errno
+from ctypes.util import find_library
+from os import O_CLOEXEC
+from os import O_NONBLOCK
+from os import close
+from os import read
+from os import stat
+from os import strerror
+from os import walk
+from os.path import dirname
+from os.path import isdir
+from os.path import join
+from select import select
+from struct import calcsize
+from struct import unpack_from
+from sys import stderr
+from time import perf_counter
+
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from linter import CheckResult
+from linter import CompiledTemplate
+from linter import check_file_safe
+from linter import find_html_files
+from linter import is_html_file
+
+
+# Розмір та час зміни файлу у наносекундах
+FileStat = Tuple[int, int]
+
+
+def get_file_stat(path: str) -> Optional[FileStat]:
+    """Функція вертає розмір та час зміни файлу, або None без файлу"""
+
+    try:
+        file_stat = stat(path)
+    except OSError:
+        return None
+    return file_stat.st_size, file_stat.st_mtime_ns
+
+
+class FileWatcher:
+    """Джерело змін Html файлів у каталогах
+
+    Attributes
+    ----------
+    paths : List[str]
+        Каталоги та файли, за якими ведеться спостереження
+
+    Methods
+    -------
+    wait(timeout: Optional[float]) : Set[str]
+        Чекає змін і вертає змінені Html файли
+    close()
+        Звільняє ресурси спостереження
+    """
+
+    def __init__(self, paths: List[str]):
+        self.paths: List[str] = paths
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Чекає змін не довше timeout секунд і вертає змінені файли
+
+        Parameters
+        ----------
+        timeout : Optional[float]
+            Максимальний час очікування, None - без обмеження
+
+        Returns
+        -------
+        changed : Set[str]
+            Шляхи до змінених Html файлів, пустий якщо змін не було
+        """
+
+        raise NotImplementedError
+
+    def close(self):
+        """Звільняє ресурси спостереження"""
+
+
+class PollingWatcher(FileWatcher):
+    """Спостереження періодичним переглядом розміру та часу зміни файлів
+
+    Attributes
+    ----------
+    interval : float
+        Час між переглядами у секундах
+    """
+
+    def __init__(self, paths: List[str], interval: float = 1.0):
+        """Конструктор класу
+
+        Parameters
+        ----------
+        paths : List[str]
+            Каталоги та файли, за якими ведеться спостереження
+        interval : float
+            Час між переглядами у секундах
+        """
+
+        super().__init__(paths)
+
+        self.interval: float = interval
+        self._stats: Dict[str, Optional[FileStat]] = self._scan()
+        self._next_scan: float = perf_counter() + interval
+
+    def _scan(self) -> Dict[str, Optional[FileStat]]:
+        """Метод знаходить всі Html файли та їх стан"""
+
+        stats: Dict[str, Optional[FileStat]] = {}
+        for path in self.paths:
+            files = find_html_files(path) if isdir(path) else [path]
+            for file in files:
+                stats[file] = get_file_stat(file)
+        return stats
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        while True:
+            delay = self._next_scan - perf_counter()
+            if timeout is not None and timeout < delay:
+                select([], [], [], timeout)
+                return set()
+            if delay > 0:
+                select([], [], [], delay)
+                if timeout is not None:
+                    timeout -= delay
+            self._next_scan = perf_counter() + self.interval
+
+            stats = self._scan()
+            changed = {path for path, file_stat in stats.items()
+                       if file_stat is not None
+                       and self._stats.get(path) != file_stat}
+            self._stats = stats
+            if changed or timeout is not None:
+                return changed
+
+
+class InotifyWatcher(FileWatcher):
+    """Спостереження через inotify, тільки на Linux
+
+    Кожен каталог має свій watch, нові каталоги додаются при
+    створенні. Якщо черга подій ядра переповнилась, всі файли
+    вважаются зміненими.
+
+    Raises
+    ------
+    OSError
+        inotify недоступний
+    """
+
+    IN_CLOSE_WRITE: int = 0x00000008
+    IN_MOVED_TO: int = 0x00000080
+    IN_CREATE: int = 0x00000100
+    IN_Q_OVERFLOW: int = 0x00004000
+    IN_ISDIR: int = 0x40000000
+    MASK: int = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    # wd, mask, cookie, len перед ім'ям файлу
+    EVENT_FORMAT: str = 'iIII'
+    EVENT_SIZE: int = calcsize(EVENT_FORMAT)
+
+    def __init__(self, paths: List[str]):
+        """Конструктор класу
+
+        Parameters
+        ----------
+        paths : List[str]
+            Каталоги та файли, за якими ведеться спостереження
+        """
+
+        super().__init__(paths)
+
+        library = find_library('c')
+        if library is None:
+            raise OSError('libc не знайдено')
+        self._libc = CDLL(library, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError('inotify недоступний')
+        self._fd: int = self._libc.inotify_init1(O_NONBLOCK | O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(strerror(get_errno()))
+
+        self._directories: Dict[int, str] = {}
+        # Каталоги, всі Html файли яких під спостереженням
+        self._trees: Set[int] = set()
+        # Окремі файли, за якими ведеться спостереження
+        self._files: Set[str] = set()
+        for path in paths:
+            if isdir(path):
+                self._add_tree(path)
+            else:
+                # Файл замінюєтся новим при записі, тому спостерігаєтся
+                # його каталог
+                self._files.add(path)
+                self._add_directory(dirname(path) or '.')
+
+    def _add_directory(self, path: str) -> int:
+        """Метод додає watch на каталог"""
+
+        wd = self._libc.inotify_add_watch(self._fd, path.encode(),
+                                          self.MASK)
+        if wd < 0:
+            raise OSError(strerror(get_errno()))
+        self._directories[wd] = path
+        return wd
+
+    def _add_tree(self, path: str):
+        """Метод додає watch на каталог та всі вкладені каталоги"""
+
+        for root, _, _ in walk(path):
+            self._trees.add(self._add_directory(root))
+
+    def _get_all_files(self) -> Set[str]:
+        """Метод вертає всі Html файли, за якими ведеться спостереження"""
+
+        files: Set[str] = set()
+        for path in self.paths:
+            files.update(find_html_files(path) if isdir(path) else [path])
+        return files
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        # Події тимчасових файлів та каталогів не повертаются, тому
+        # очікування продовжуєтся до першої зміни Html файлу
+        deadline = None if timeout is None else perf_counter() + timeout
+        while True:
+            if deadline is not None:
+                timeout = max(deadline - perf_counter(), 0)
+            if not select([self._fd], [], [], timeout)[0]:
+                return set()
+            changed = self._read_events()
+            if changed:
+                return changed
+
+    def _read_events(self) -> Set[str]:
+        """Метод читає події inotify і вертає змінені Html файли"""
+
+        changed: Set[str] = set()
+        data = read(self._fd, 1 << 16)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = unpack_from(self.EVENT_FORMAT, data,
+                                              offset)
+            offset += self.EVENT_SIZE
+            name = data[offset:offset + length].rstrip(b'\0').decode()
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                changed.update(self._get_all_files())
+                continue
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            path = join(directory, name)
+            if mask & self.IN_ISDIR:
+                if mask & self.IN_CREATE and wd in self._trees:
+                    # Файли могли з'явитися до додавання watch
+                    self._add_tree(path)
+                    changed.update(find_html_files(path))
+            elif mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO):
+                if path in self._files or (wd in self._trees
+                                           and is_html_file(name)):
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        close(self._fd)
+
+
+def create_watcher(paths: List[str], polling: bool = False,
+                   interval: float = 1.0) -> FileWatcher:
+    """Функція створює inotify спостереження, або перегляд без нього
+
+    Parameters
+    ----------
+    paths : List[str]
+        Каталоги та файли, за якими ведеться спостереження
+    polling : bool
+        Завжди використовувати періодичний перегляд?
+    interval : float
+        Час між переглядами у секундах
+    """
+
+    if not polling:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths, interval)
+
+
+class Watch:
+    """Форматування змінених Html файлів
+
+    Зміни збираются, поки файли змінюются частіше ніж раз на debounce
+    секунд, тому серія збережень форматує файл один раз. Після
+    перевірки запам'ятовуєтся розмір та час зміни файлу, тому подія
+    від власного запису файлу не форматує його повторно.
+
+    Attributes
+    ----------
+    template : CompiledTemplate
+        Шаблон перевірки
+    watcher : FileWatcher
+        Джерело змін файлів
+    write : bool
+        Записати відформатований текст у файли, які змінилися?
+    debounce : float
+        Час без змін у секундах, після якого файли форматуются
+    stream : bool
+        Форматувати файли потоком, див. stream.StreamHtml?
+
+    Methods
+    -------
+    run()
+        Форматує змінені файли до переривання
+    process(changed: Dict[str, float]) : List[CheckResult]
+        Форматує змінені файли і друкує затримку кожного
+    """
+
+    def __init__(self, template: CompiledTemplate, watcher: FileWatcher,
+                 write: bool = True, debounce: float = 0.1,
+                 stream: bool = False):
+        """Конструктор класу
+
+        Parameters
+        ----------
+        template : CompiledTemplate
+            Шаблон перевірки
+        watcher : FileWatcher
+            Джерело змін файлів
+        write : bool
+            Записати відформатований текст у файли, які змінилися?
+        debounce : float
+            Час без змін у секундах, після якого файли форматуются
+        stream : bool
+            Форматувати файли потоком, див. stream.StreamHtml?
+        """
+
+        self.template: CompiledTemplate = template
+        self.watcher: FileWatcher = watcher
+        self.write: bool = write
+        self.debounce: float = debounce
+        self.stream: bool = stream
+        # Стан файлів після останньої перевірки
+        self._checked: Dict[str, Optional[FileStat]] = {}
+
+    def run(self):
+        """Форматує змінені файли до переривання"""
+
+        while True:
+            # Час першої події кожного файлу, від нього рахуєтся затримка
+            changed: Dict[str, float] = {}
+            for path in self.watcher.wait(None):
+                changed.setdefault(path, perf_counter())
+            while True:
+                paths = self.watcher.wait(self.debounce)
+                if not paths:
+                    break
+                for path in paths:
+                    changed.setdefault(path, perf_counter())
+            self.process(changed)
+
+    def process(self, changed: Dict[str, float]) -> List[CheckResult]:
+        """Форматує змінені файли і друкує затримку кожного
+
+        Parameters
+        ----------
+        changed : Dict[str, float]
+            Змінені файли та perf_counter першої події кожного
+
+        Returns
+        -------
+        results : List[CheckResult]
+            Результати перевірки файлів, які справді змінились
+        """
+
+        results: List[CheckResult] = []
+        for path, event_time in sorted(changed.items()):
+            file_stat = get_file_stat(path)
+            if file_stat is None or self._checked.get(path) == file_stat:
+                continue
+            result = check_file_safe(path, self.template, self.write,
+                                     self.stream)
+            self._checked[path] = get_file_stat(path)
+            results.append(result)
+            print_event(result, self.write, perf_counter() - event_time)
+        return results
+
+
+def print_event(result: CheckResult, write: bool, latency: float):
+    """Функція друкує результат перевірки зміненого файлу
+
+    Parameters
+    ----------
+    result : CheckResult
+        Результат перевірки
+    write : bool
+        Відформатований текст записаний у файл?
+    latency : float
+        Час від першої події файлу до кінця перевірки у секундах
+    """
+
+    for error in result.errors:
+        print(error, file=stderr)
+    if not result.ok:
+        status = 'З помилками'
+    elif result.changed:
+        status = 'Змінено' if write else 'Буде змінено'
+    else:
+        status = 'Без змін'
+    print('{} {} ({:.1f} мс)'.format(status, result.path, latency * 1000),
+          flush=True)